@@ -5,6 +5,14 @@ from dotenv import load_dotenv
 import openai
 import httpx
 
+from units import add_canonical
+from shopping_item import ShoppingItem, items_frame
+from regex_parser import RegexItemParser
+from splitter import analyze_multi
+from normalize import normalize_text
+from llm_json import decode_item, decode_items, DecodeError
+from llm_scheduler import llm_scheduler, request_context, QueueFull, BULK
+
 # ----------------------------
 # 1. Environment & Client Setup
 # ----------------------------
@@ -27,19 +35,30 @@ if not azure_openai_deployment_name:
 # Ensure endpoint doesn't have trailing slash (Azure OpenAI client handles /v1 automatically)
 endpoint = azure_openai_endpoint.rstrip('/')
 
-# Create custom HTTP client for Azure OpenAI (optional - AzureOpenAI handles most of this)
-http_client = httpx.Client(
-    timeout=60.0,
-    follow_redirects=True
-)
+def create_client():
+    """Build the Azure OpenAI client; forked workers call reset_client() to get their own"""
+    # Create custom HTTP client for Azure OpenAI (optional - AzureOpenAI handles most of this)
+    http_client = httpx.Client(
+        timeout=60.0,
+        follow_redirects=True
+    )
+
+    # Initialize Azure OpenAI client
+    return openai.AzureOpenAI(
+        api_key=azure_openai_api_key,
+        api_version=azure_openai_api_version,
+        azure_endpoint=endpoint,
+        http_client=http_client
+    )
+
 
-# Initialize Azure OpenAI client
-client = openai.AzureOpenAI(
-    api_key=azure_openai_api_key,
-    api_version=azure_openai_api_version,
-    azure_endpoint=endpoint,
-    http_client=http_client
-)
+client = create_client()
+
+
+def reset_client():
+    """Replace the module client; connection pools must not be shared across a fork"""
+    global client
+    client = create_client()
 
 # ----------------------------
 # 2. Configurations (No Hardcoding) in dictionary form
@@ -61,6 +80,27 @@ Extract structured information in strict JSON with the following fields:
   "details": "extra details or empty string"
 }
 Only return valid JSON (no explanations).
+""",
+    # Whole-list mode: one call for an entire dictated session
+    "list_max_tokens": 4000,
+    "list_system_prompt": """You are a shopping list analyzer.
+
+The user text is a whole dictated shopping session that may contain many items.
+Return strict JSON of the form:
+{
+  "items": [
+    {
+      "itemName": "product name",
+      "quantity": "numeric value or empty string",
+      "unit": "unit of measurement or empty string",
+      "brand": "brand name or empty string",
+      "priority": "HIGH/MEDIUM/LOW",
+      "details": "extra details or empty string",
+      "source": "the exact words of the transcript describing this item"
+    }
+  ]
+}
+One entry per distinct item, in the order spoken. Only return valid JSON (no explanations).
 """
 }
 
@@ -68,17 +108,52 @@ Only return valid JSON (no explanations).
 # ----------------------------
 # 3. Core Analyzer
 # ----------------------------
+# Local parser for malformed list entries; it has no per-call state
+_regex_parser = RegexItemParser()
+
+
+def _mark_fallback(item: ShoppingItem, source: str) -> ShoppingItem:
+    """Tag a result the LLM did not produce so callers can keep it out of the parse cache"""
+    item["fallback"] = source
+    return item
+
+
+def is_fallback(result) -> bool:
+    """True when a parse result (or any item of a multi-item result) came from a fallback"""
+    items = result.get("items") or [result]
+    return any(item.get("fallback") for item in items)
+
+
 class ShoppingItemParser:
     def __init__(self, config=CONFIG):
         self.config = config
+        # Token accounting across calls, used by the benchmarks
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
 
-    def analyze(self, text: str) -> dict:
+    def _record_usage(self, response):
+        usage = getattr(response, "usage", None)
+        self.usage["calls"] += 1
+        if usage is not None:
+            self.usage["prompt_tokens"] += usage.prompt_tokens or 0
+            self.usage["completion_tokens"] += usage.completion_tokens or 0
+
+    @staticmethod
+    def _complete(text: str, **request):
+        """Chat completion through the shared scheduler; raises QueueFull when shed"""
+        # The module client is looked up per call so reset_client() after a fork takes effect
+        return llm_scheduler.run(
+            lambda: client.chat.completions.create(**request),
+            item_priority=_regex_parser.determine_priority(text)['priority']
+        )
+
+    def analyze(self, text: str) -> ShoppingItem:
         """
         Passes text to LLM and returns structured JSON.
         Falls back to safe parsing if LLM fails.
         """
         try:
-            response = client.chat.completions.create(
+            response = self._complete(
+                text,
                 model=self.config["deployment_name"],  # Azure OpenAI uses deployment name instead of model name
                 messages=[
                     {"role": "system", "content": self.config["system_prompt"]},
@@ -88,50 +163,156 @@ class ShoppingItemParser:
                 max_tokens=self.config["max_tokens"]
             )
 
-            # Parse JSON safely
+            self._record_usage(response)
+
+            # Tolerant decode: strips fences/prose, repairs JSON defects and coerces types
             raw_output = response.choices[0].message.content.strip()
-            result = json.loads(raw_output)
+            result = self._fill_from_regex(decode_item(raw_output), text)
 
             # Always include original description
             result["description"] = text
-            return result
+            # Keep the raw quantity/unit and add canonical values for aggregation
+            return add_canonical(ShoppingItem.from_dict(result))
 
+        except QueueFull as e:
+            # Load shedding: the regex extractors still give a usable answer
+            print(f"⚠️ {e} → regex fallback for: {text}")
+            return _mark_fallback(self._regex_fallback(text), "regex")
+        except DecodeError as e:
+            # The model answered, but nothing usable could be recovered from it
+            print(f"⚠️ Undecodable LLM output ({e}) → regex fallback for: {text}")
+            return _mark_fallback(self._regex_fallback(text), "regex")
         except Exception as e:
             print(f"⚠️ LLM error: {e} → using fallback for: {text}")
-            return self._fallback_parse(text)
+            return _mark_fallback(self._fallback_parse(text), "text")
+
+    def analyze_list(self, transcript: str) -> list:
+        """
+        Extracts every item of a dictated session with a single LLM call.
+        Malformed entries are re-parsed locally from their source text; if the
+        whole response is unusable the transcript is split and parsed locally.
+        """
+        try:
+            response = self._complete(
+                transcript,
+                model=self.config["deployment_name"],
+                messages=[
+                    {"role": "system", "content": self.config["list_system_prompt"]},
+                    {"role": "user", "content": transcript}
+                ],
+                temperature=self.config["temperature"],
+                max_tokens=self.config["list_max_tokens"],
+                response_format={"type": "json_object"}
+            )
+            self._record_usage(response)
+
+            raw_output = response.choices[0].message.content.strip()
+            entries = decode_items(raw_output)
+            if not entries:
+                raise ValueError("response has no items")
+        except Exception as e:
+            print(f"⚠️ LLM list error: {e} → parsing transcript locally")
+            return self._local_list_fallback(transcript)
 
-    def _fallback_parse(self, text: str) -> dict:
-        """Minimal fallback if LLM fails"""
-        return {
-            "itemName": text,
-            "quantity": "",
-            "unit": "",
-            "brand": "",
-            "priority": "MEDIUM",
-            "details": "",
-            "description": text
-        }
+        items = []
+        for entry in entries:
+            if entry is None:
+                continue
+            source = str(entry.pop("source", "") or "").strip()
+            try:
+                if entry["itemName"]:
+                    entry["description"] = source or entry["itemName"]
+                    items.append(add_canonical(ShoppingItem.from_dict(self._fill_from_regex(entry, source))))
+                    continue
+            except Exception as e:
+                # One bad entry must not send the whole list to the local fallback
+                print(f"⚠️ LLM list entry error: {e} → re-parsing locally: {source}")
+            # Malformed entry: recover it locally from the words it came from
+            if source:
+                items.append(_mark_fallback(self._regex_fallback(source), "regex"))
+        return items
+
+    @staticmethod
+    def _fill_from_regex(item: dict, text: str) -> dict:
+        """Fill a quantity/unit/brand the model left empty from the regex extractors; values it gave are kept"""
+        text = normalize_text(text)
+        if text and not item.get("quantity"):
+            local = _regex_parser.extract_quantity_and_unit(text)
+            if local:
+                item["quantity"] = local["quantity"]
+                item["unit"] = item.get("unit") or local["unit"]
+        if text and not item.get("brand"):
+            local = _regex_parser.extract_brand(text)
+            if local:
+                item["brand"] = local["brand"]
+        return item
+
+    @staticmethod
+    def _regex_fallback(text: str) -> ShoppingItem:
+        return _regex_parser.analyze(text)
+
+    @staticmethod
+    def _local_list_fallback(transcript: str) -> list:
+        items = []
+        for line in transcript.splitlines():
+            if line.strip():
+                items.extend(_mark_fallback(item, "regex") for item in analyze_multi(_regex_parser, line))
+        return items
+
+    def _fallback_parse(self, text: str) -> ShoppingItem:
+        """Minimal fallback if LLM fails: the whole text as the item name"""
+        return add_canonical(ShoppingItem(itemName=text, description=text))
 
 
 # ----------------------------
 # 4. File Processing Utility
 # ----------------------------
-def process_excel(input_file: str, output_file: str, parser: ShoppingItemParser):
-    try:
+RESULT_COLUMNS = ["quantity", "unit", "itemName", "brand", "priority", "details", "description",
+                  "canonicalQuantity", "canonicalUnit"]
+
+
+def read_rows(input_file: str) -> list:
+    """Non-empty texts from the first column of an XLSX or CSV file"""
+    if input_file.lower().endswith(".csv"):
+        df = pd.read_csv(input_file)
+    else:
         df = pd.read_excel(input_file)
-        results = []
+    texts = []
+    for value in df.iloc[:, 0] if len(df.columns) else []:
+        text = str(value) if pd.notna(value) else ""
+        if text.strip():
+            texts.append(text)
+    return texts
+
+
+def analyze_rows(texts, parser: ShoppingItemParser, client: str = "", progress=None, throttle=None) -> list:
+    """Parse rows as bulk LLM work; progress(done, total) is called after each row
+
+    throttle(text), when given, is called before each row and blocks until the row may run.
+    """
+    results = []
+    # Bulk work queues behind interactive requests; rows of one file share a fair-share slot
+    with request_context(BULK, client=client):
+        for idx, text in enumerate(texts):
+            print(f"🔍 Processing row {idx+1}: {text}")
+            if throttle is not None:
+                throttle(text)
+            results.append(parser.analyze(text))
+            if progress is not None:
+                progress(idx + 1, len(texts))
+    return results
 
-        for idx, row in df.iterrows():
-            text = str(row.iloc[0]) if pd.notna(row.iloc[0]) else ""
-            if text.strip():
-                print(f"🔍 Processing row {idx+1}: {text}")
-                results.append(parser.analyze(text))
+
+def results_frame(results: list) -> pd.DataFrame:
+    return items_frame(results, RESULT_COLUMNS)
+
+
+def process_excel(input_file: str, output_file: str, parser: ShoppingItemParser):
+    try:
+        results = analyze_rows(read_rows(input_file), parser, client=os.path.basename(input_file))
 
         if results:
-            results_df = pd.DataFrame(results)
-            col_order = ["quantity", "unit", "itemName", "brand", "priority", "details", "description"]
-            results_df = results_df.reindex(columns=col_order)
-            results_df.to_excel(output_file, index=False)
+            results_frame(results).to_excel(output_file, index=False)
             print(f"✅ Saved results to {output_file}")
         else:
             print("⚠️ No valid rows found.")
@@ -149,7 +330,7 @@ if __name__ == "__main__":
     # Example single test
     print("\n=== Single Item Test ===")
     example = "Cereal brand: Morning Star, sugar check needed for 4 boxes, medium priority."
-    print(json.dumps(parser.analyze(example), indent=2))
+    print(json.dumps(parser.analyze(example).to_dict(), indent=2))
 
     # Example Excel file processing
     # process_excel("processing/inputfile.xlsx", "processing/output.xlsx", parser)
@@ -0,0 +1,175 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytz
+from pymongo import UpdateOne, ASCENDING, DESCENDING
+
+from units import to_canonical
+from list_updates import reported_doc
+
+# ----------------------------
+# 1. Rollup keys
+# ----------------------------
+# One rollup document per (day, shop, itemName, priority, unit). Lists are folded
+# in on insert, and a patch takes the old items out and puts the new ones in, so
+# reports read a handful of rollup rows per day instead of unnesting every saved list.
+ROLLUP_COLLECTION = 'item_rollups'
+PRIORITIES = ('HIGH', 'MEDIUM', 'LOW')
+# created_at is stored in IST by save_shopping_list, so days are IST days
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def _normalize_key(value) -> str:
+    return ' '.join(str(value or '').lower().split())
+
+
+def normalize_priority(value) -> str:
+    priority = str(value or '').upper()
+    return priority if priority in PRIORITIES else 'MEDIUM'
+
+
+# ----------------------------
+# 2. Incremental updates
+# ----------------------------
+def ensure_indexes(db, collection: str = ROLLUP_COLLECTION):
+    rollups = db[collection]
+    rollups.create_index(
+        [('day', ASCENDING), ('shop', ASCENDING), ('itemName', ASCENDING),
+         ('priority', ASCENDING), ('unit', ASCENDING)],
+        unique=True
+    )
+    rollups.create_index([('shop', ASCENDING), ('day', ASCENDING)])
+
+
+def rollup_operations(shopping_list: dict, sign: int = 1):
+    """Build the $inc upserts that fold one saved list into the rollups (sign=-1 takes it out)"""
+    day = str(shopping_list.get('created_at', ''))[:10] or datetime.now(IST).strftime('%Y-%m-%d')
+    shop = _normalize_key(shopping_list.get('favoriteShop'))
+
+    # Collapse repeated items within the list so each rollup row gets one update
+    totals = {}
+    for item in shopping_list.get('items') or []:
+        if not isinstance(item, dict):
+            continue
+        name = _normalize_key(item.get('itemName'))
+        if not name:
+            continue
+        quantity, unit = to_canonical(item.get('quantity'), item.get('unit'))
+        quantity = quantity or 0.0
+        key = (name, normalize_priority(item.get('priority')), unit)
+        count, total = totals.get(key, (0, 0.0))
+        totals[key] = (count + 1, total + quantity)
+
+    return [
+        UpdateOne(
+            {'day': day, 'shop': shop, 'itemName': name, 'priority': priority, 'unit': unit},
+            {'$inc': {'count': sign * count, 'quantity': sign * quantity}},
+            upsert=True
+        )
+        for (name, priority, unit), (count, quantity) in totals.items()
+    ]
+
+
+def record_list(db, shopping_list: dict) -> int:
+    """Fold a newly inserted list into the rollups; returns rows touched"""
+    return record_lists(db, [shopping_list])
+
+
+def record_lists(db, lists, retired=()) -> int:
+    """Fold a batch of new lists into the rollups with a single bulk_write
+
+    retired are earlier versions of patched lists; their items are taken out in the same write.
+    """
+    operations = [operation for shopping_list in retired for operation in rollup_operations(shopping_list, -1)]
+    operations += [operation for shopping_list in lists for operation in rollup_operations(shopping_list)]
+    if operations:
+        db[ROLLUP_COLLECTION].bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def rebuild(db, batch_size: int = 1000) -> int:
+    """Recompute all rollups from db.lists (one-off backfill)
+
+    The rollups are built in a separate collection and renamed over the live one, so the
+    reporting worker never writes into a half-built, unindexed collection. Lists it folds in
+    while the rebuild runs can still be missed; run it with the worker stopped.
+    """
+    building = db[f'{ROLLUP_COLLECTION}_rebuild_{uuid.uuid4().hex[:8]}']
+    ensure_indexes(db, building.name)
+    try:
+        processed = _fill(db, building, batch_size)
+        building.rename(ROLLUP_COLLECTION, dropTarget=True)
+    except Exception:
+        building.drop()
+        raise
+    return processed
+
+
+def _fill(db, rollups, batch_size):
+    processed = 0
+    pending = []
+    fields = {'created_at': 1, 'favoriteShop': 1, 'items': 1, 'pending_changes': 1, 'reported_version': 1}
+    for shopping_list in db.lists.find({}, fields):
+        # Patches still pending are applied by the reporting worker on top of this
+        pending.extend(rollup_operations(reported_doc(shopping_list)))
+        processed += 1
+        if len(pending) >= batch_size:
+            rollups.bulk_write(pending, ordered=False)
+            pending = []
+    if pending:
+        rollups.bulk_write(pending, ordered=False)
+    return processed
+
+
+# ----------------------------
+# 3. Queries
+# ----------------------------
+def top_items(db, shop: str = '', days: int = 7, priority: str = '', limit: int = 10, end_day: str = ''):
+    """Most requested items over the last `days` days, answered from the rollups only
+
+    Raises ValueError for a priority other than HIGH, MEDIUM or LOW.
+    """
+    end = datetime.strptime(end_day, '%Y-%m-%d') if end_day else datetime.now(IST)
+    start = end - timedelta(days=days - 1)
+
+    match = {'day': {'$gte': start.strftime('%Y-%m-%d'), '$lte': end.strftime('%Y-%m-%d')}}
+    if shop:
+        match['shop'] = _normalize_key(shop)
+    if priority:
+        if priority.upper() not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        match['priority'] = priority.upper()
+
+    pipeline = [
+        {'$match': match},
+        {'$group': {
+            '_id': {'itemName': '$itemName', 'priority': '$priority', 'unit': '$unit'},
+            'count': {'$sum': '$count'},
+            'quantity': {'$sum': '$quantity'},
+        }},
+        # Items patched out of every list leave rows that add up to zero
+        {'$match': {'count': {'$gt': 0}}},
+        {'$sort': {'count': DESCENDING, 'quantity': DESCENDING}},
+        {'$limit': limit},
+    ]
+    return [
+        {
+            'itemName': row['_id']['itemName'],
+            'priority': row['_id']['priority'],
+            'unit': row['_id']['unit'],
+            'count': row['count'],
+            'quantity': row['quantity'],
+        }
+        for row in db[ROLLUP_COLLECTION].aggregate(pipeline)
+    ]
+
+
+if __name__ == '__main__':
+    import os
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    from storage import MONGODB_DATABASE
+
+    load_dotenv()
+    db = MongoClient(os.getenv('MONGODB_URI'))[MONGODB_DATABASE]
+    print(f"✅ Rebuilt rollups from {rebuild(db)} lists")
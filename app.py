@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory, make_response
+from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
 from pymongo import MongoClient
 from datetime import datetime
@@ -9,28 +9,57 @@ import re
 #import assemblyai as aai
 
 
+import analyser
 from analyser import process_excel,ShoppingItemParser
+from bill_pdf import get_bill_pdf, render_bills_archive, pdf_cache, safe_filename
+from static_assets import StaticAssetServer
+import analytics
+import export_store
+import reporting
+from engines import default_registry, EngineRouter, LOCAL_ENGINES
+from rate_limit import create_limiter, RateLimited, retry_after_header, estimate_tokens
+from splitter import analyze_multi, split_utterance
+from suggest import Suggester, SUGGEST_TOP
+import health
+from list_updates import prepare_new_list, ListNotFound, VersionConflict
+import list_sync
+from storage import create_storage, STORAGE_BACKEND, MONGODB_DATABASE, PARSE_CACHE_TTL
+from llm_json import decode_stats
+from normalize import normalize_text
+import shopping_item
+import profiling
+from llm_scheduler import llm_scheduler, request_context, current_request, INTERACTIVE
+from excel_jobs import ExcelJobManager, JobNotFound, JobNotReady, read_status
 import pytz
 import openai
+import io
 import json
 import time
+import threading
+import ipaddress
 from functools import lru_cache
-import pandas as pd
-from bson import ObjectId
 import httpx
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__, static_folder='dist', static_url_path='')
+# Initialize Flask app. Flask's own static route is disabled so that
+# serve/serve_static below (backed by StaticAssetServer) handle the build output.
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dist')
+app = Flask(__name__, static_folder=None)
+# Larger request bodies (Excel uploads included) are refused with 413 before they are read
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 16)) * 1024 * 1024
+
+# Index the built frontend once; index.html is kept in memory
+static_server = StaticAssetServer(STATIC_FOLDER)
 
 # Configure CORS
 CORS(app, resources={
     r"/*": {
         "origins": "*",
-        "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "methods": ["GET", "POST", "PATCH", "OPTIONS"],
+        "allow_headers": ["Content-Type", "X-Parser-Engine", "X-Client-Id", "Idempotency-Key"],
+        "expose_headers": ["Retry-After", "X-Parser-Engine"]
     }
 })
 
@@ -57,8 +86,11 @@ except Exception as e:
 # Configure AssemblyAI
 #aai.settings.api_key = os.getenv("ASSEMBLYAI_API_KEY")
 
-# Initialize the shopping item parser
+# Initialize the shopping item parser and the engine router used by /api/analyze.
+# PARSER_ENGINE picks the default engine, PARSER_ENGINE_SPLIT (e.g. "tiered:80,llm:20")
+# splits traffic, and PARSER_SHADOW_ENGINE/PARSER_SHADOW_RATE measure field agreement.
 parser = ShoppingItemParser()
+engine_router = None  # built below, once MongoDB is configured for the rate limiter
 
 # Initialize Azure OpenAI client
 try:
@@ -101,17 +133,212 @@ except Exception as e:
     print(f"❌ Error initializing Azure OpenAI client: {e}")
     raise
 
-# Set up MongoDB Atlas connection
+# Set up MongoDB Atlas connection; STORAGE_BACKEND=sqlite runs without one and keeps
+# lists, the parse cache and corrections in a local file (storage.py)
 MONGODB_URI = os.getenv('MONGODB_URI')
-mongo_client = MongoClient(MONGODB_URI)
-db = mongo_client['grocery_db']
-collection = db['cereal_analysis']
+if STORAGE_BACKEND == 'mongo':
+    mongo_client = MongoClient(MONGODB_URI)
+    db = mongo_client[MONGODB_DATABASE]
+    collection = db['cereal_analysis']
+else:
+    mongo_client = db = collection = None
+store = create_storage(db)
+
+
+def reinit_after_fork():
+    """Give a forked gunicorn worker its own MongoDB and Azure OpenAI connection pools"""
+    global mongo_client, db, collection, store, rate_limiter, suggestions
+    if STORAGE_BACKEND == 'mongo':
+        mongo_client = MongoClient(MONGODB_URI)
+        db = mongo_client[MONGODB_DATABASE]
+        collection = db['cereal_analysis']
+    # SQLite connections are per process too; the store opens new ones after a fork
+    store = create_storage(db)
+    analyser.reset_client()
+    # The Mongo-backed bucket store holds a collection from the master's client
+    rate_limiter = create_limiter(db)
+    suggestions = Suggester(store)
+    start_reporting_worker()
+    health_monitor.ensure_started()
+    # Picks up Excel jobs a recycled or crashed worker left unfinished
+    excel_jobs.start()
+
+
+reporting_worker = None
+
+
+def start_reporting_worker():
+    """Run the reporting worker in this process unless REPORTING_WORKER=off (separate process)"""
+    global reporting_worker
+    if os.getenv('REPORTING_WORKER', 'thread') != 'thread' or reporting_worker is not None or db is None:
+        return
+    # Every gunicorn worker starts one; the lease lets a single one do the work
+    reporting_worker = reporting.ReportingWorker(db).start()
+
+
+# Per-client budgets for LLM vs local parses plus a global tokens-per-minute budget
+rate_limiter = create_limiter(db)
+
+
+def llm_token_cost(text, completion=150):
+    return estimate_tokens(text, parser.config['system_prompt'], completion)
+
+
+def charge_llm(client, tokens, calls=1):
+    """Spend the client's LLM budget and the global token budget; raises RateLimited"""
+    rate_limiter.hit('llm', client, calls)
+    try:
+        rate_limiter.hit('llm_tokens', 'global', tokens)
+    except RateLimited:
+        # The call is not made, so the client keeps its LLM tokens
+        rate_limiter.refund('llm', client, calls)
+        raise
+
+
+def llm_escalation_allowed(text):
+    """Escalation gate for tiered engines: each escalation is charged like an LLM request"""
+    _, client = current_request()
+    try:
+        charge_llm(client, llm_token_cost(text))
+        return True
+    except RateLimited:
+        return False
+
+
+# Bulk rows may spend the global token budget only down to the rest of it, which stays
+# reserved for interactive requests (LLM_BULK_TOKEN_SHARE=0.8 keeps 20% for them)
+BULK_TOKEN_SHARE = min(1.0, max(0.1, float(os.getenv('LLM_BULK_TOKEN_SHARE', 0.8))))
+
+
+def wait_for_llm_tokens(text):
+    """Throttle for bulk rows: each row is charged to the global token budget, waiting while it is spent"""
+    while True:
+        try:
+            rate_limiter.hit('llm_tokens', 'global', llm_token_cost(text), reserve=1.0 - BULK_TOKEN_SHARE)
+            return
+        except RateLimited as e:
+            time.sleep(min(e.retry_after, 5.0))
+
+
+def shadow_allowed(text):
+    """Shadow gate: a shadow LLM parse is charged to the global token budget, skipped when it is spent"""
+    if engine_router.shadow in LOCAL_ENGINES:
+        return True
+    return rate_limiter.allows('llm_tokens', 'global', llm_token_cost(text))
+
+
+def charge_analyze(client, engine, mode, text, cached=False):
+    """Spend the budgets of one /api/analyze request; raises RateLimited"""
+    # Tiered engines are charged as local parses; their escalations are charged by the gate
+    if cached or engine in LOCAL_ENGINES or engine.startswith('tiered'):
+        rate_limiter.hit('local', client)
+    elif mode == 'list':
+        charge_llm(client, llm_token_cost(text, parser.config['list_max_tokens'] // 4))
+    elif mode == 'multi':
+        # One LLM call per item clause
+        clauses = split_utterance(text)[0]
+        charge_llm(client, sum(llm_token_cost(clause) for clause in clauses), len(clauses))
+    else:
+        charge_llm(client, llm_token_cost(text))
+
+
+engine_router = EngineRouter(default_registry(llm_parser=parser, escalation_gate=llm_escalation_allowed),
+                             shadow_gate=shadow_allowed)
+# Bulk XLSX/CSV parsing runs on a background pool, not on request threads
+excel_jobs = ExcelJobManager(parser, throttle=wait_for_llm_tokens)
+# Typeahead tries for itemName/brand, built on first use
+suggestions = Suggester(store)
+
+# Dependency probes run in the background; /health/* only reads their last results.
+# The lambdas read the module globals, so they follow reinit_after_fork's new clients.
+health_probes = [
+    health.Probe(store.backend, health.storage_probe(lambda: store)),
+    health.Probe('disk', health.disk_probe()),
+]
+if health.HEALTH_LLM_PROBE != 'off':
+    # Parsing falls back to regex without the LLM, so by default it only degrades the status
+    health_probes.append(health.Probe(
+        'llm', health.llm_probe(lambda: analyser.client, azure_openai_deployment_name),
+        interval=health.HEALTH_LLM_INTERVAL, critical=os.getenv('HEALTH_LLM_CRITICAL', '0') == '1'))
+health_monitor = health.HealthMonitor(health_probes)
+
+
+def item_response(payload, status=200):
+    """JSON response for parser results, encoded straight from the ShoppingItem slots"""
+    return Response(shopping_item.dumps(payload), status=status, mimetype='application/json')
+
+
+# Proxies (IPs or CIDR ranges) allowed to say who the client is; anyone can forge the headers
+TRUSTED_PROXIES = [ipaddress.ip_network(entry.strip(), strict=False)
+                   for entry in os.getenv('TRUSTED_PROXIES', '').split(',') if entry.strip()]
+
+
+def _trusted_proxy(address):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_id():
+    """Caller identity for rate limiting
+
+    X-Client-Id and X-Forwarded-For are only read from a TRUSTED_PROXIES peer; the
+    client is then the last forwarded hop that is not one of our proxies.
+    """
+    remote = request.remote_addr or 'unknown'
+    if not _trusted_proxy(remote):
+        return remote
+    if request.headers.get('X-Client-Id'):
+        return request.headers['X-Client-Id']
+    hops = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted_proxy(hop):
+            return hop
+    return remote
+
+
+# Optional capture of POST traffic for benchmarks/loadtest.py (off unless the env var is set)
+TRAFFIC_RECORD_FILE = os.getenv('TRAFFIC_RECORD_FILE')
+RECORDED_PATHS = {'/api', '/api/analyze'}
+
+if TRAFFIC_RECORD_FILE:
+    _record_lock = threading.Lock()
+
+    @app.after_request
+    def record_traffic(response):
+        if request.method == 'POST' and request.path in RECORDED_PATHS:
+            entry = {
+                'ts': time.time(),
+                'method': request.method,
+                'path': request.path,
+                'headers': {k: v for k, v in request.headers.items() if k in ('X-Parser-Engine', 'X-Client-Id')},
+                'body': request.get_json(silent=True),
+                'status': response.status_code,
+            }
+            with _record_lock, open(TRAFFIC_RECORD_FILE, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+        return response
+
+
+profiling.start_tracemalloc()
+
+try:
+    store.ensure_indexes()
+    # Rollups and daily reports are built from MongoDB change streams only
+    if db is not None:
+        analytics.ensure_indexes(db)
+        reporting.ensure_indexes(db)
+except Exception as e:
+    print(f"❌ Error creating analytics indexes: {e}")
 
 @app.route('/')
 def serve():
     try:
-        response = make_response(send_from_directory(app.static_folder, 'index.html'))
-        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response = static_server.serve_index(request)
+        if response is None:
+            return "Not Found", 404
         return response
     except Exception as e:
         print(f"Error serving index.html: {e}")
@@ -120,14 +347,16 @@ def serve():
 @app.route('/<path:path>')
 def serve_static(path):
     try:
-        if path and os.path.exists(os.path.join(app.static_folder, path)):
-            return send_from_directory(app.static_folder, path)
-        return "Not Found", 404
+        response = static_server.serve(path, request)
+        if response is None:
+            return "Not Found", 404
+        return response
     except Exception as e:
         print(f"Error serving static file {path}: {e}")
         return "Server Error", 500
 
 @app.route('/api/analyze', methods=['POST'])
+@profiling.profiled('analyze')
 def analyze():
     try:
         data = request.json
@@ -136,15 +365,97 @@ def analyze():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
             
-        # Use the parser to analyze text
-        result = parser.analyze(text)
-        return jsonify(result)
+        client = client_id()
+        mode = data.get('mode')
+        engine = 'llm' if mode == 'list' else engine_router.choose(
+            data.get('engine') or request.headers.get('X-Parser-Engine', ''), client
+        )
+        # Unknown engines are refused before any budget is spent
+        if engine not in engine_router.registry:
+            return jsonify({'error': f'Unknown engine: {engine}'}), 400
+        cache_key = parse_cache_key(engine, mode, text)
+        cached = cached_parse(cache_key) if cache_key else None
+        try:
+            charge_analyze(client, engine, mode, text, cached is not None)
+        except RateLimited as e:
+            response = jsonify({'error': str(e), 'retryAfter': round(e.retry_after, 1)})
+            response.headers['Retry-After'] = retry_after_header(e.retry_after)
+            return response, 429
+
+        if cached is not None:
+            # The key is the normalized text, so echo this request's own wording
+            if mode == 'multi':
+                for item in cached.get('items', []):
+                    item['utterance'] = text
+            else:
+                cached['description'] = text
+            response = item_response(cached)
+            response.headers['X-Parser-Engine'] = engine
+            return response
+
+        try:
+            # LLM calls below are queued ahead of bulk jobs and shared fairly between clients
+            with request_context(INTERACTIVE, client):
+                if mode == 'list':
+                    # Whole dictated session in one LLM call: {"items": [...]}
+                    return item_response({'items': parser.analyze_list(text)})
+                if mode == 'multi':
+                    # One utterance may hold several items: {"items": [...]}
+                    answered, items = engine_router.analyze(text, engine, analyze=analyze_multi)
+                    result = {'items': items}
+                else:
+                    answered, result = engine_router.analyze(text, engine)
+        except KeyError as e:
+            return jsonify({'error': str(e.args[0])}), 400
+        # Only real LLM answers are kept; a fallback guess would be served for a day
+        if cache_key and not analyser.is_fallback(result):
+            cache_parse(cache_key, result)
+        engine = answered
+
+        response = item_response(result)
+        response.headers['X-Parser-Engine'] = engine
+        return response
         
     except Exception as e:
         print(f"Error in analyze endpoint: {e}")
         return jsonify({'error': str(e)}), 500
 
+def parse_cache_key(engine, mode, text):
+    """Cache LLM parses of repeated utterances; None when this request is not cached
+
+    Local engines are faster than the lookup, and a tiered result may be the regex
+    guess kept because the escalation was refused, so neither is cached. Keyed on the
+    normalized text so spoken variants ("do kilo chawal", "2 kilo rice") share an entry.
+    """
+    if PARSE_CACHE_TTL <= 0 or mode == 'list' or engine in LOCAL_ENGINES or engine.startswith('tiered'):
+        return None
+    return f"{engine}:{mode or 'single'}:{normalize_text(text)}"
+
+
+def cached_parse(key):
+    try:
+        return store.cached_parse(key)
+    except Exception as e:
+        print(f"⚠️ Parse cache lookup failed: {e}")
+        return None
+
+
+def cache_parse(key, result):
+    try:
+        store.cache_parse(key, json.loads(shopping_item.dumps(result)))
+    except Exception as e:
+        print(f"⚠️ Could not cache parse: {e}")
+
+
+def add_suggestions(shopping_list):
+    try:
+        suggestions.add_list(shopping_list)
+    except Exception as e:
+        print(f"⚠️ Could not update suggestions: {e}")
+
+
 @app.route('/api', methods=['POST', 'OPTIONS'])
+@profiling.profiled('save_shopping_list')
 def save_shopping_list():
     if request.method == 'OPTIONS':
         return '', 200
@@ -162,41 +473,35 @@ def save_shopping_list():
         ist_now = utc_now.replace(tzinfo=pytz.UTC).astimezone(ist)
         data['created_at'] = ist_now.strftime('%Y-%m-%d %H:%M:%S')
 
-        # Save to MongoDB
-        result = db.lists.insert_one(data)
-        print("✅ Saved to MongoDB with ID:", result.inserted_id)
-        print("📝 Bill Number:", data['billNumber'])
-
-        # Save to Excel
-        try:
-            # Create the processing folder if it doesn't exist
-            os.makedirs('processing', exist_ok=True)
-            
-            # Define the output file path
-            output_file = os.path.join('processing', 'output_app.xlsx')
-            
-            # Convert the data to a DataFrame
-            df = pd.DataFrame([data])
-            
-            # If the file already exists, append to it
-            if os.path.exists(output_file):
-                df = pd.read_excel(output_file)
-                existing_df = pd.read_excel(output_file)
-                df = pd.concat([existing_df, df], ignore_index=True)
-            
-            # Save the DataFrame to Excel
-            df.to_excel(output_file, index=False)
-            print(f"✅ Saved to Excel at: {output_file}")
-        except Exception as excel_error:
-            print(f"❌ Error saving to Excel: {excel_error}")
+        # Retried submissions carry the same key and get the stored list back
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotencyKey')
+        if idempotency_key:
+            data['idempotencyKey'] = idempotency_key
+            saved = list_sync.save_lists(store, [data], data['created_at'])[0]
+            print(f"✅ List {saved['billNumber']} {saved['status']} ({saved['id']})")
+            if saved['status'] == 'created':
+                add_suggestions(data)
+            return jsonify(dict(saved, success=True)), 201 if saved['status'] == 'created' else 200
 
+        # Save to the store; version and itemIds let clients PATCH single items later
+        prepare_new_list(data)
+        list_id = store.insert_list(data)
+        print(f"✅ Saved to {store.backend} with ID:", list_id)
+        print("📝 Bill Number:", data['billNumber'])
+        add_suggestions(data)
 
+        # Rollups, daily reports and the Parquet export are updated by the
+        # reporting worker (reporting.py), which tails inserts into db.lists
 
         return jsonify({
             'success': True,
-            'id': str(result.inserted_id),
-            'billNumber': data['billNumber']
+            'id': str(list_id),
+            'billNumber': data['billNumber'],
+            'version': data['version'],
+            'itemIds': [item.get('itemId') for item in data.get('items') or [] if isinstance(item, dict)]
         }), 201
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print("❌ Error while processing /api request:", str(e))
         return jsonify({
@@ -204,12 +509,269 @@ def save_shopping_list():
             'error': str(e)
         }), 500
 
+@app.route('/api/sync', methods=['POST'])
+def sync_lists():
+    """Upload lists queued offline: {"lists": [{..., "idempotencyKey": "..."}]}; safe to retry"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'body must be a JSON object with a lists array'}), 400
+        entries = data.get('lists')
+        ist_now = datetime.now(pytz.timezone('Asia/Kolkata'))
+        results = list_sync.save_lists(store, entries, ist_now.strftime('%Y-%m-%d %H:%M:%S'))
+        created = [entry for entry, result in zip(entries, results) if result['status'] == 'created']
+        for entry in created:
+            add_suggestions(entry)
+        print(f"🔄 Sync: {len(created)} created, {len(results) - len(created)} already stored")
+        return jsonify({'success': True, 'results': results})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error syncing lists: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/lists/<list_id>', methods=['GET'])
+def get_list(list_id):
+    try:
+        shopping_list = store.get_list(list_id)
+    except Exception as e:
+        print(f"❌ Error reading list {list_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+    if shopping_list is None:
+        return jsonify({'error': 'List not found'}), 404
+    shopping_list['id'] = str(shopping_list.pop('_id'))
+    shopping_list.setdefault('version', 0)
+    return jsonify(shopping_list)
+
+@app.route('/api/lists/<list_id>', methods=['PATCH'])
+def patch_list(list_id):
+    """Item-level changes against a known version: {"version", "set", "add", "remove", "update"}
+
+    The reporting worker carries the change into the daily reports, rollups and export.
+    """
+    try:
+        result = store.patch_list(list_id, request.get_json(silent=True))
+        return jsonify(dict(result, success=True, id=list_id))
+    except ListNotFound:
+        return jsonify({'error': 'List not found'}), 404
+    except VersionConflict as e:
+        return jsonify({'error': str(e), 'version': e.current}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error updating list {list_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/lists/<bill_number>/pdf', methods=['GET'])
+def bill_pdf(bill_number):
+    try:
+        bill = store.list_by_bill(bill_number)
+        if not bill:
+            return jsonify({'error': 'Bill not found'}), 404
+
+        pdf = get_bill_pdf(bill)
+        response = Response(pdf, mimetype='application/pdf')
+        response.headers['Content-Disposition'] = f'attachment; filename="{safe_filename(bill_number)}.pdf"'
+        return response
+    except Exception as e:
+        print(f"❌ Error rendering PDF for {bill_number}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/lists/pdf', methods=['GET'])
+def bills_archive():
+    """Batch-render every bill created on ?date=YYYY-MM-DD into one zip"""
+    try:
+        day = request.args.get('date', '')
+        try:
+            datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+
+        bills = store.lists_for_day(day)
+        archive = render_bills_archive(bills)
+        response = Response(archive, mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename="bills-{day}.zip"'
+        print(f"📦 PDF cache: {pdf_cache.stats()}")
+        return response
+    except Exception as e:
+        print(f"❌ Error rendering bill archive: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/excel', methods=['POST'])
+def create_excel_job():
+    """Upload an XLSX/CSV (first column = item texts) for background parsing"""
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'No file provided'}), 400
+    try:
+        rate_limiter.hit('jobs', client_id())
+    except RateLimited as e:
+        response = jsonify({'error': str(e), 'retryAfter': round(e.retry_after, 1)})
+        response.headers['Retry-After'] = retry_after_header(e.retry_after)
+        return response, 429
+    try:
+        status = excel_jobs.submit(upload)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error creating Excel job: {e}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify(status), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def excel_job_status(job_id):
+    try:
+        return jsonify(read_status(job_id))
+    except JobNotFound:
+        return jsonify({'error': 'Job not found'}), 404
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def excel_job_result(job_id):
+    fmt = request.args.get('format', 'xlsx')
+    try:
+        path = excel_jobs.result_path(job_id, fmt)
+    except JobNotFound:
+        return jsonify({'error': 'Job not found'}), 404
+    except JobNotReady as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=f'{job_id}.{fmt}')
+
+@app.route('/api/export/excel', methods=['GET'])
+def export_excel():
+    """Saved lists (one row per item) as XLSX; ?from=&to=&shop=
+
+    Read from the Parquet store when EXPORT_SHARED says every instance sees it, otherwise
+    from MongoDB: the reporting worker writes the store on the lease holder's disk only.
+    """
+    if db is None:
+        return jsonify({'error': 'The Excel export needs STORAGE_BACKEND=mongo'}), 501
+    start, end = request.args.get('from', ''), request.args.get('to', '')
+    for day in (start, end):
+        if day:
+            try:
+                datetime.strptime(day, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': 'from and to must be YYYY-MM-DD'}), 400
+    try:
+        output = io.BytesIO()
+        rows = export_store.export_excel(output, start, end, request.args.get('shop', ''),
+                                         db=None if export_store.EXPORT_SHARED else db)
+        print(f"📤 Exported {rows} item rows to Excel")
+        response = Response(
+            output.getvalue(),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="lists-{start or "all"}-{end or "all"}.xlsx"'
+        return response
+    except Exception as e:
+        print(f"❌ Error exporting lists to Excel: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reports/daily', methods=['GET'])
+def daily_shop_reports():
+    """Materialized per-shop totals for ?date=YYYY-MM-DD (optionally &shop=)"""
+    try:
+        day = request.args.get('date', '')
+        try:
+            datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+        if db is None:
+            return jsonify({'error': 'Daily reports need STORAGE_BACKEND=mongo'}), 501
+        return jsonify({
+            'date': day,
+            'shops': reporting.daily_reports(db, day, request.args.get('shop', '')),
+            'worker': reporting_worker.status() if reporting_worker else reporting.worker_status(db),
+        })
+    except Exception as e:
+        print(f"❌ Error reading daily reports: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/top-items', methods=['GET'])
+def analytics_top_items():
+    try:
+        days = int(request.args.get('days', 7))
+        limit = int(request.args.get('limit', 10))
+        if days < 1 or limit < 1:
+            return jsonify({'error': 'days and limit must be positive'}), 400
+        if db is None:
+            return jsonify({'error': 'Analytics need STORAGE_BACKEND=mongo'}), 501
+
+        items = analytics.top_items(
+            db,
+            shop=request.args.get('shop', ''),
+            days=days,
+            priority=request.args.get('priority', ''),
+            limit=limit,
+            end_day=request.args.get('end', '')
+        )
+        return jsonify({'items': items})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error in analytics endpoint: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/suggest', methods=['GET'])
+def suggest_names():
+    """Typeahead for ?q=<prefix>&field=item|brand, most saved first"""
+    try:
+        # The tries only keep SUGGEST_TOP completions per prefix
+        limit = max(1, min(int(request.args.get('limit', 8)), SUGGEST_TOP))
+        field = request.args.get('field', 'item')
+        query = request.args.get('q', '')
+        return jsonify({
+            'field': field,
+            'query': query,
+            'suggestions': suggestions.suggest(field, query, limit),
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error in suggest endpoint: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/corrections', methods=['GET', 'POST'])
+def corrections():
+    """Word fixes made by users: POST {"original", "corrected"}; GET ?limit= lists the most frequent"""
+    try:
+        if request.method == 'GET':
+            limit = min(int(request.args.get('limit', 100)), 1000)
+            return jsonify({'corrections': store.corrections(limit)})
+        data = request.get_json(silent=True) or {}
+        original, corrected = data.get('original'), data.get('corrected')
+        if not isinstance(original, str) or not isinstance(corrected, str) or not original.strip() or not corrected.strip():
+            return jsonify({'error': 'original and corrected are required'}), 400
+        store.record_correction(original.strip().lower(), corrected.strip())
+        return jsonify({'success': True}), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error in corrections endpoint: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/engines', methods=['GET'])
+def engine_stats():
+    report = engine_router.report()
+    # How often LLM output needed repairs/coercion before it was usable, in this worker only
+    report['decoder'] = decode_stats.as_dict()
+    report['rate_limited'] = dict(rate_limiter.rejected)
+    report['llm_scheduler'] = llm_scheduler.report()
+    return jsonify(report)
+
 @app.route('/health', methods=['GET'])
+@app.route('/health/ready', methods=['GET'])
 def health_check():
-    return jsonify({
-        'status': 'healthy',
-        'mongodb': 'connected'
-    }), 200
+    """Readiness: 503 while a critical dependency (the list store, disk) is failing"""
+    ready, report = health_monitor.ensure_started().readiness()
+    return jsonify(report), 200 if ready else 503
+
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the worker answers requests; dependencies are not consulted"""
+    return jsonify(health_monitor.ensure_started().liveness()), 200
 
 @app.route('/api/transcribe', methods=['POST', 'OPTIONS'])
 def transcribe_audio():
@@ -259,6 +821,45 @@ def transcribe_audio():
     #any one side web speech API was needed to be used
     return jsonify({'message': 'Using Web Speech API instead'}), 200
 
+@app.route('/api/debug/profiles', methods=['GET'])
+def list_profiles():
+    """Recent request profiles of the worker that answers (PROFILE_TOKEN / PROFILE_SAMPLE_RATE)"""
+    if not profiling.ENABLED or not profiling.authorized():
+        return jsonify({'error': 'Resource not found'}), 404
+    return jsonify({'pid': os.getpid(), 'profiles': profiling.profiles.list()})
+
+@app.route('/api/debug/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """?format=summary (default), folded (flamegraph.pl input) or prof (pstats/snakeviz)"""
+    if not profiling.ENABLED or not profiling.authorized():
+        return jsonify({'error': 'Resource not found'}), 404
+    fmt = request.args.get('format', 'summary')
+    if fmt == 'summary':
+        entry = profiling.profiles.get(profile_id)
+        return jsonify(entry) if entry else (jsonify({'error': 'Profile not found'}), 404)
+    path = profiling.profiles.file(profile_id, fmt)
+    if path is None or not os.path.exists(path):
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=f'{profile_id}.{fmt}')
+
+@app.route('/api/debug/memory', methods=['GET'])
+def memory_snapshot():
+    """Top allocation sites of this worker (TRACEMALLOC_FRAMES); ?compare=1 diffs with the last call"""
+    if not profiling.ENABLED or not profiling.authorized():
+        return jsonify({'error': 'Resource not found'}), 404
+    try:
+        top = max(1, min(int(request.args.get('top', 20)), profiling.MEMORY_TOP_MAX))
+    except ValueError:
+        return jsonify({'error': 'top must be an integer'}), 400
+    report = profiling.memory_report(
+        limit=top,
+        key_type=request.args.get('key', 'lineno') if request.args.get('key') in ('lineno', 'filename', 'traceback') else 'lineno',
+        compare=request.args.get('compare') == '1'
+    )
+    if report is None:
+        return jsonify({'error': 'tracemalloc is off; set TRACEMALLOC_FRAMES'}), 404
+    return jsonify(report)
+
 @app.errorhandler(404)
 def not_found(e):
     return jsonify({"error": "Resource not found"}), 404
@@ -269,9 +870,12 @@ def server_error(e):
 
 
 if __name__ == '__main__':
+    start_reporting_worker()
+    health_monitor.ensure_started()
+    excel_jobs.start()
     port = int(os.environ.get('PORT', 3000))
     print(f"�� Server starting on https://localhost:{port}")
-    print(f"📁 Serving static files from: {os.path.abspath(app.static_folder)}")
+    print(f"📁 Serving static files from: {STATIC_FOLDER}")
     
     # Check if SSL certificates exist, if not generate them
     if not (os.path.exists('cert.pem') and os.path.exists('key.pem')):
@@ -0,0 +1,114 @@
+"""
+Write and read time of saved-list exports: the Parquet store vs the old Excel file.
+
+Generates synthetic lists (5 items each, spread over 30 days) and measures
+  - Parquet: one append per save, one batched append, reading back a week/all days
+  - Excel:   the old save path (read the whole file, concat, rewrite) and a single
+             to_excel/read_excel of the same rows. Excel is only run up to --excel-max
+             lists because it is several orders of magnitude slower.
+
+    python benchmarks/bench_export.py [--lists 100000] [--excel-max 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import export_store
+
+ITEMS = ['rice', 'milk', 'eggs', 'sugar', 'atta', 'tea', 'soap', 'oil', 'dal', 'bread']
+UNITS = ['kg', 'g', 'l', 'ml', 'pcs', 'packet']
+SHOPS = ['DMart', 'Reliance Fresh', 'More', 'Spencer']
+
+
+def make_lists(count, seed=7):
+    rng = random.Random(seed)
+    lists = []
+    for i in range(count):
+        day = 1 + i % 30
+        lists.append({
+            'billNumber': f'BILL-2024-06-{day:02d}-{i}',
+            'customerName': f'Customer {i % 500}',
+            'favoriteShop': rng.choice(SHOPS),
+            'created_at': f'2024-06-{day:02d} 10:{i % 60:02d}:00',
+            'items': [{
+                'itemName': rng.choice(ITEMS),
+                'brand': '',
+                'quantity': str(rng.randint(1, 5)),
+                'unit': rng.choice(UNITS),
+                'priority': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+                'details': '',
+                'description': '',
+            } for _ in range(5)],
+        })
+    return lists
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<42} {elapsed:9.3f} s")
+    return result, elapsed
+
+
+def bench_parquet(lists, per_save):
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Parquet store ({len(lists)} lists)")
+        batched = os.path.join(root, 'batched')
+        timed('append, one batch', lambda: export_store.append_lists(lists, batched))
+
+        incremental = os.path.join(root, 'incremental')
+        sample = lists[:per_save]
+        _, elapsed = timed(f'append, one call per save ({len(sample)} saves)',
+                           lambda: [export_store.append_lists([l], incremental) for l in sample])
+        print(f"  {'  -> per save':<42} {elapsed / len(sample) * 1000:9.3f} ms")
+        timed('compact all days', lambda: [export_store.compact(d, incremental) for d in export_store.days(incremental)])
+
+        week, _ = timed('read one week', lambda: export_store.read_items('2024-06-01', '2024-06-07', export_dir=batched))
+        rows, _ = timed('read all days', lambda: export_store.read_items(export_dir=batched))
+        timed('read all days, one shop', lambda: export_store.read_items(shop='DMart', export_dir=batched))
+        print(f"  rows: week={len(week)} all={len(rows)}")
+
+
+def bench_excel(lists):
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Excel file ({len(lists)} lists)")
+        path = os.path.join(root, 'output_app.xlsx')
+
+        def old_save_path():
+            # What save_shopping_list did per request: read the whole file, append, rewrite
+            for shopping_list in lists:
+                df = pd.DataFrame([shopping_list])
+                if os.path.exists(path):
+                    df = pd.concat([pd.read_excel(path), df], ignore_index=True)
+                df.to_excel(path, index=False)
+
+        _, elapsed = timed('old save path, one rewrite per save', old_save_path)
+        print(f"  {'  -> per save':<42} {elapsed / len(lists) * 1000:9.3f} ms")
+
+        rows = [row for l in lists for row in export_store.flatten_list(l)]
+        flat = os.path.join(root, 'flat.xlsx')
+        timed('to_excel, flattened rows', lambda: pd.DataFrame(rows).to_excel(flat, index=False))
+        timed('read_excel, flattened rows', lambda: pd.read_excel(flat))
+
+
+def main():
+    cli = argparse.ArgumentParser()
+    cli.add_argument('--lists', type=int, default=100000)
+    cli.add_argument('--per-save', type=int, default=500, help='saves timed one by one')
+    cli.add_argument('--excel-max', type=int, default=2000)
+    args = cli.parse_args()
+
+    lists = make_lists(args.lists)
+    bench_parquet(lists, args.per_save)
+    bench_excel(lists[:min(args.excel_max, len(lists))])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Brand/product recognition throughput with a large gazetteer.
+
+    python benchmarks/bench_gazetteer.py [entries] [utterances]
+
+Builds a Gazetteer from the catalog plus synthetic brand and product names
+(default 50k entries in total) and times find() over dictated-style utterances.
+For comparison, the same entries are compiled into one word-bounded regex
+alternation (longest first), which is what extending BRAND_PATTERN would give.
+"""
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import PRODUCTS, BRANDS
+from gazetteer import Gazetteer
+
+SYLLABLES = ['ka', 'ri', 'mo', 'la', 'su', 'ne', 'ta', 'vi', 'ro', 'pa', 'de', 'shi', 'go', 'ma', 'nu', 'zo']
+ADJECTIVES = ['fresh', 'organic', 'toned', 'premium', 'classic', 'spicy', 'roasted', 'instant', 'lite', 'gold']
+FILLER = ['2 kg', '1 litre', 'please', 'with high priority', 'and', '3 packets', 'for tomorrow', '500 g']
+
+
+def synthetic_entries(count, rng):
+    entries = {(name, 'brand') for name in BRANDS} | {(name, 'product') for name in PRODUCTS}
+    while len(entries) < count:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.5:
+            entries.add((word.capitalize() + rng.choice(['', ' Foods', ' Fresh']), 'brand'))
+        else:
+            entries.add((f'{rng.choice(ADJECTIVES)} {word}', 'product'))
+    return sorted(entries)
+
+
+def utterances(entries, count, rng):
+    texts = []
+    for _ in range(count):
+        parts = [rng.choice(FILLER)]
+        for _ in range(rng.randint(1, 3)):
+            parts.append(rng.choice(entries)[0])
+            parts.append(rng.choice(FILLER))
+        texts.append(' '.join(parts))
+    return texts
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    rng = random.Random(0)
+    entries = synthetic_entries(size, rng)
+    texts = utterances(entries, count, rng)
+    words = sum(len(text.split()) for text in texts)
+
+    gazetteer, build = timed(lambda: Gazetteer(entries))
+    matches, scan = timed(lambda: sum(len(gazetteer.find(text)) for text in texts))
+
+    alternation = '|'.join(re.escape(name) for name in sorted({n for n, _ in entries}, key=len, reverse=True))
+    pattern, compile_time = timed(lambda: re.compile(rf'\b(?:{alternation})\b', re.IGNORECASE))
+    sample = texts[:max(1, count // 50)]
+    _, regex_scan = timed(lambda: sum(len(pattern.findall(text)) for text in sample))
+    regex_per_text = regex_scan / len(sample)
+
+    print(f"{gazetteer.size} entries, {len(gazetteer.goto)} automaton states, "
+          f"{count} utterances ({words / count:.1f} words each)\n")
+    print(f"{'':<24}{'build s':>9}{'utt/s':>11}{'µs/utt':>9}")
+    print(f"{'Aho–Corasick find()':<24}{build:>9.2f}{count / scan:>11.0f}{scan / count * 1e6:>9.1f}")
+    print(f"{'regex alternation':<24}{compile_time:>9.2f}{1 / regex_per_text:>11.0f}{regex_per_text * 1e6:>9.1f}"
+          f"   (on {len(sample)} utterances)")
+    print(f"\n{matches} matches found")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Throughput of each gunicorn profile in gunicorn.conf.py.
+
+Starts `gunicorn -c gunicorn.conf.py server:app` once per profile and drives
+/api/analyze (local regex engine, so no Azure calls) and /health with a fixed
+number of concurrent clients. Placeholder Azure settings are used when none
+are configured; MongoDB is not needed for these endpoints.
+
+    python benchmarks/bench_gunicorn_profiles.py [--profiles gthread sync gevent]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def drive(port, method, path, body, total, concurrency):
+    payload = json.dumps(body).encode('utf-8') if body is not None else None
+    headers = {'Content-Type': 'application/json'} if payload else {}
+
+    def worker(count):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        latencies, errors = [], 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            latencies.append(time.perf_counter() - start)
+        conn.close()
+        return latencies, errors
+
+    per_client = total // concurrency
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, [per_client] * concurrency))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for result, _ in results for l in result)
+    errors = sum(e for _, e in results)
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return len(latencies) / elapsed, pick(0.5), pick(0.95), errors
+
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser()
+    args.add_argument('--profiles', nargs='+', default=['gthread', 'sync', 'gevent'])
+    args.add_argument('--requests', type=int, default=2000)
+    args.add_argument('--concurrency', type=int, default=32)
+    args.add_argument('--workers', type=int, default=2)
+    args.add_argument('--port', type=int, default=8765)
+    options = args.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('AZURE_OPENAI_ENDPOINT', 'http://127.0.0.1:9')
+    env.setdefault('AZURE_OPENAI_API_KEY', 'benchmark')
+    env.setdefault('AZURE_OPENAI_DEPLOYMENT_NAME', 'benchmark')
+    env.setdefault('MONGODB_URI', 'mongodb://127.0.0.1:9/?serverSelectionTimeoutMS=200')
+    env.update(PORT=str(options.port), WEB_CONCURRENCY=str(options.workers), PARSER_ENGINE='regex')
+
+    scenarios = [
+        ('analyze', 'POST', '/api/analyze', {'text': '2 kg basmati rice from India Gate with high priority'}),
+        ('health', 'GET', '/health', None),
+    ]
+    print(f"{options.workers} workers, {options.concurrency} concurrent clients, {options.requests} requests\n")
+    print(f"{'profile':<10}{'endpoint':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+
+    for profile in options.profiles:
+        env['GUNICORN_PROFILE'] = profile
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', os.devnull, 'server:app'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not wait_for_port(options.port):
+                print(f"{profile:<10}failed to start")
+                continue
+            time.sleep(1)  # let every worker finish booting
+            for label, method, path, body in scenarios:
+                rps, p50, p95, errors = drive(options.port, method, path, body, options.requests, options.concurrency)
+                print(f"{profile:<10}{label:<10}{rps:>10.0f}{p50:>10.1f}{p95:>10.1f}{errors:>8}")
+        finally:
+            process.terminate()
+            process.wait()
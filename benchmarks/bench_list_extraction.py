@@ -0,0 +1,53 @@
+"""
+Whole-list one-shot extraction vs. one LLM call per item.
+
+Builds dictated sessions from the labelled corpus and reports end-to-end
+time, LLM calls and tokens for both modes. Calls Azure OpenAI, so the usual
+AZURE_OPENAI_* variables must be set.
+
+    python benchmarks/bench_list_extraction.py [--sizes 5 10 20]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyser import ShoppingItemParser
+from bench_parsers import load_corpus
+
+
+def usage_delta(parser, before):
+    return {key: parser.usage[key] - before[key] for key in parser.usage}
+
+
+def per_item(parser, texts):
+    before = dict(parser.usage)
+    start = time.perf_counter()
+    items = [parser.analyze(text) for text in texts]
+    return time.perf_counter() - start, len(items), usage_delta(parser, before)
+
+
+def one_shot(parser, texts):
+    before = dict(parser.usage)
+    start = time.perf_counter()
+    items = parser.analyze_list('\n'.join(texts))
+    return time.perf_counter() - start, len(items), usage_delta(parser, before)
+
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser()
+    args.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 20])
+    options = args.parse_args()
+
+    corpus = [case['text'] for case in load_corpus()]
+    parser = ShoppingItemParser()
+
+    print(f"{'mode':<10}{'items':>7}{'found':>7}{'seconds':>10}{'calls':>7}{'prompt tok':>12}{'output tok':>12}")
+    for size in options.sizes:
+        texts = [corpus[i % len(corpus)] for i in range(size)]
+        for label, run in (('per-item', per_item), ('one-shot', one_shot)):
+            seconds, found, usage = run(parser, texts)
+            print(f"{label:<10}{size:>7}{found:>7}{seconds:>10.2f}{usage['calls']:>7}"
+                  f"{usage['prompt_tokens']:>12}{usage['completion_tokens']:>12}")
@@ -0,0 +1,68 @@
+"""
+How often the tiered engine escalates to the LLM, with and without the
+spoken-number / Hinglish normalization pass.
+
+    python benchmarks/bench_normalize.py [corpus.txt]
+
+Each corpus line is one dictated utterance. The fast engine is the real regex
+parser; the slow engine only counts escalations, so no Azure OpenAI calls are made.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import normalize
+from engines import ParserAdapter, ParserEngine, TieredEngine
+from normalize import normalize_text
+from regex_parser import RegexItemParser
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'spoken_utterances.txt')
+
+
+class CountingEngine(ParserEngine):
+    """Stands in for the LLM: remembers what it was asked, returns nothing useful"""
+    name = 'llm'
+
+    def __init__(self):
+        self.seen = []
+
+    def analyze(self, text):
+        self.seen.append(text)
+        return {'itemName': text, 'description': text}
+
+
+def escalations(texts, normalized):
+    # The regex parser normalizes its own input; the switch is read on every call
+    normalize.NORMALIZE_TEXT = normalized
+    slow = CountingEngine()
+    engine = TieredEngine('tiered', ParserAdapter('regex', RegexItemParser()), slow)
+    for text in texts:
+        engine.analyze(text)
+    return engine.escalations, slow.seen
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS
+    with open(path) as f:
+        corpus = [line.strip() for line in f if line.strip()]
+
+    start = time.perf_counter()
+    for text in corpus:
+        normalize_text(text)
+    per_text_us = (time.perf_counter() - start) / len(corpus) * 1e6
+
+    raw_escalations, raw_seen = escalations(corpus, False)
+    norm_escalations, norm_seen = escalations(corpus, True)
+    print(f"{len(corpus)} utterances, normalization {per_text_us:.1f} µs each\n")
+    print(f"{'':<28}{'raw':>8}{'normalized':>12}")
+    print(f"{'LLM escalations':<28}{raw_escalations:>8}{norm_escalations:>12}")
+    print(f"{'escalation rate':<28}{raw_escalations / len(corpus):>8.1%}{norm_escalations / len(corpus):>12.1%}")
+
+    print("\nStill escalated after normalization:")
+    for text in norm_seen:
+        print(f"  {text}")
+
+
+if __name__ == '__main__':
+    main()
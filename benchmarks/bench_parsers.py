@@ -0,0 +1,87 @@
+"""
+Accuracy and throughput of the shopping item parsers on a labelled corpus.
+
+    python benchmarks/bench_parsers.py                # local parsers only
+    python benchmarks/bench_parsers.py --llm          # also the Azure OpenAI parser
+
+Field accuracy is a case-insensitive exact match against the labels in
+benchmarks/data/utterances.jsonl.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from regex_parser import RegexItemParser
+from local_nlp import LocalNLPParser
+from units import standardize_unit
+
+CORPUS = os.path.join(ROOT, 'benchmarks', 'data', 'utterances.jsonl')
+FIELDS = ['itemName', 'quantity', 'unit', 'brand', 'priority']
+
+
+def load_corpus(path=CORPUS):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def normalize(field, value):
+    value = str(value or '').strip().lower()
+    if field == 'unit':
+        return standardize_unit(value)
+    if field == 'quantity':
+        try:
+            return str(float(value))
+        except ValueError:
+            return value
+    return value
+
+
+def field_accuracy(results, corpus):
+    hits = {field: 0 for field in FIELDS}
+    for result, case in zip(results, corpus):
+        for field in FIELDS:
+            if normalize(field, result.get(field)) == normalize(field, case['expected'].get(field)):
+                hits[field] += 1
+    return {field: hits[field] / len(corpus) for field in FIELDS}
+
+
+def run(name, analyze_all, corpus, repeat):
+    texts = [case['text'] for case in corpus]
+    results = analyze_all(texts)
+    start = time.perf_counter()
+    for _ in range(repeat - 1):
+        analyze_all(texts)
+    elapsed = time.perf_counter() - start
+    per_second = len(texts) * (repeat - 1) / elapsed if repeat > 1 else float('nan')
+    accuracy = field_accuracy(results, corpus)
+    overall = sum(accuracy.values()) / len(accuracy)
+    print(f"{name:<14}{per_second:>12.0f}" + ''.join(f"{accuracy[f]:>11.0%}" for f in FIELDS) + f"{overall:>10.0%}")
+    return results
+
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser()
+    args.add_argument('--llm', action='store_true', help='include the Azure OpenAI parser (network, costs tokens)')
+    args.add_argument('--repeat', type=int, default=50)
+    options = args.parse_args()
+
+    corpus = load_corpus()
+    print(f"{len(corpus)} utterances\n")
+    print(f"{'engine':<14}{'items/s':>12}" + ''.join(f"{f:>11}" for f in FIELDS) + f"{'overall':>10}")
+
+    regex_parser = RegexItemParser()
+    run('regex', lambda texts: [regex_parser.analyze(t) for t in texts], corpus, options.repeat)
+
+    local_parser = LocalNLPParser()
+    label = 'local-nlp' if local_parser.nlp is not None else 'local (no nlp)'
+    run(label, local_parser.analyze_batch, corpus, options.repeat)
+
+    if options.llm:
+        from analyser import ShoppingItemParser
+        llm_parser = ShoppingItemParser()
+        run('llm', lambda texts: [llm_parser.analyze(t) for t in texts], corpus, 2)
@@ -0,0 +1,91 @@
+"""
+Per-item memory and serialization time: ShoppingItem vs the old result dicts.
+
+    python benchmarks/bench_shopping_item.py [items]
+
+Measures, for the same parsed items held both ways:
+  - memory per item (tracemalloc, whole object graph)
+  - JSON encoding of an {"items": [...]} response (json.dumps of dicts vs shopping_item.dumps)
+  - decoding back into records
+  - DataFrame construction (list of row dicts vs column-batched items_frame)
+"""
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import shopping_item
+from shopping_item import ShoppingItem, FIELDS, items_frame
+from regex_parser import RegexItemParser
+
+TEXTS = [
+    '2 kg basmati rice from India Gate with high priority',
+    '3 litres milk from Amul',
+    '12 eggs',
+    '500 g paneer with low fat and medium priority',
+    '1 packet tea from Tata',
+]
+
+
+def make_records(count):
+    parser = RegexItemParser()
+    items = [parser.analyze(TEXTS[i % len(TEXTS)]) for i in range(count)]
+    return items, [item.to_dict() for item in items]
+
+
+def memory_per_item(build, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del kept
+    return size / count
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    items, dicts = make_records(count)
+    print(f"{count} items (orjson: {'yes' if shopping_item.orjson else 'no'})\n")
+
+    # Rebuild from the same field values so both forms share the same string objects
+    values = [tuple(d[f] for f in FIELDS) for d in dicts]
+    dict_bytes = memory_per_item(lambda: [dict(zip(FIELDS, v)) for v in values], count)
+    item_bytes = memory_per_item(lambda: [ShoppingItem(*v) for v in values], count)
+
+    dict_json = timed(lambda: json.dumps({'items': dicts}))
+    item_json = timed(lambda: shopping_item.dumps({'items': items}))
+    payload_dicts = json.dumps({'items': dicts})
+    payload_items = shopping_item.dumps({'items': items})
+    dict_load = timed(lambda: json.loads(payload_dicts))
+    item_load = timed(lambda: shopping_item.loads(payload_items))
+    dict_frame = timed(lambda: pd.DataFrame(dicts).reindex(columns=list(FIELDS)), repeat=3)
+    item_frame = timed(lambda: items_frame(items), repeat=3)
+
+    rows = [
+        ('memory per item (bytes)', dict_bytes, item_bytes),
+        ('encode response (ms)', dict_json * 1000, item_json * 1000),
+        ('decode response (ms)', dict_load * 1000, item_load * 1000),
+        ('build DataFrame (ms)', dict_frame * 1000, item_frame * 1000),
+    ]
+    print(f"{'':<26}{'dict':>12}{'ShoppingItem':>15}{'ratio':>9}")
+    for label, old, new in rows:
+        print(f"{label:<26}{old:>12.1f}{new:>15.1f}{old / new:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
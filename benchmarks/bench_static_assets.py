@@ -0,0 +1,98 @@
+"""
+Requests/sec for static file serving, before and after static_assets.py.
+
+Runs in-process with the Flask test client against a copy of static/, so the
+numbers measure handler overhead rather than the network.
+
+    python benchmarks/bench_static_assets.py [requests]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from flask import Flask, request, send_from_directory, make_response
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from static_assets import StaticAssetServer, precompress
+
+REPO_STATIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+
+def build_before_app(root):
+    """The original app.py setup (Flask's static route plus send_from_directory)"""
+    app = Flask('before', static_folder=root, static_url_path='')
+
+    @app.route('/')
+    def serve():
+        response = make_response(send_from_directory(app.static_folder, 'index.html'))
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        return response
+
+    @app.route('/<path:path>')
+    def serve_static(path):
+        if path and os.path.exists(os.path.join(app.static_folder, path)):
+            return send_from_directory(app.static_folder, path)
+        return "Not Found", 404
+
+    return app
+
+
+def build_after_app(root):
+    app = Flask('after', static_folder=None)
+    server = StaticAssetServer(root)
+
+    @app.route('/')
+    def serve():
+        return server.serve_index(request)
+
+    @app.route('/<path:path>')
+    def serve_static(path):
+        return server.serve(path, request) or ("Not Found", 404)
+
+    return app
+
+
+def run(app, paths, total, headers=None):
+    client = app.test_client()
+    bytes_sent = 0
+    start = time.perf_counter()
+    for i in range(total):
+        response = client.get(paths[i % len(paths)], headers=headers or {})
+        bytes_sent += len(response.get_data())
+    elapsed = time.perf_counter() - start
+    return total / elapsed, bytes_sent / total
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    root = tempfile.mkdtemp()
+    try:
+        build_root = os.path.join(root, 'dist')
+        shutil.copytree(REPO_STATIC, build_root)
+        precompress(build_root)
+
+        paths = ['/'] + ['/assets/' + name for name in sorted(os.listdir(os.path.join(build_root, 'assets')))
+                         if not name.endswith(('.gz', '.br'))]
+
+        scenarios = [
+            ('before', build_before_app(build_root), None),
+            ('after (identity)', build_after_app(build_root), None),
+            ('after (gzip, br)', build_after_app(build_root), {'Accept-Encoding': 'gzip, br'}),
+        ]
+        print(f"{'handler':<20}{'req/s':>12}{'avg bytes':>14}")
+        for label, app, headers in scenarios:
+            rps, avg_bytes = run(app, paths, total, headers)
+            print(f"{label:<20}{rps:>12.0f}{avg_bytes:>14.0f}")
+
+        # Revalidation of a cached asset: 304 without a body
+        app = build_after_app(build_root)
+        client = app.test_client()
+        etag = client.get(paths[1]).headers['ETag']
+        start = time.perf_counter()
+        for _ in range(total):
+            client.get(paths[1], headers={'If-None-Match': etag})
+        print(f"{'after (304)':<20}{total / (time.perf_counter() - start):>12.0f}{0:>14}")
+    finally:
+        shutil.rmtree(root)
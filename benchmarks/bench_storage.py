@@ -0,0 +1,123 @@
+"""
+Insert and query throughput of the list stores (storage.py).
+
+    python benchmarks/bench_storage.py [lists] [mongodb-uri]
+
+Runs the same workload against SQLite (a temporary file, WAL mode) and, when a
+MongoDB URI is given (or MONGODB_URI is set and reachable), against a scratch
+`bench_storage` database there: single inserts as /api does them, batches of
+100 as /api/sync does them, reads by id and bill number, one day's lists, the
+suggestion history aggregation and version-checked patches.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import PRODUCTS, BRANDS
+from list_updates import prepare_new_list
+from storage import MongoStore, SQLiteStore
+
+BATCH = 100
+DAYS = 30
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def make_lists(count, rng):
+    lists = []
+    for index in range(count):
+        lists.append({
+            'billNumber': f'BILL-{index:07d}',
+            'customerName': f'customer {rng.randrange(500)}',
+            'favoriteShop': f'shop {rng.randrange(20)}',
+            'created_at': f'2026-09-{1 + index % DAYS:02d} {index % 24:02d}:{index % 60:02d}:00',
+            'items': [{'itemName': rng.choice(PRODUCTS), 'brand': rng.choice(BRANDS),
+                       'quantity': str(rng.randint(1, 5)), 'unit': 'kg', 'priority': 'MEDIUM'}
+                      for _ in range(rng.randint(2, 8))],
+        })
+    return lists
+
+
+def timed(calls):
+    """[(µs per call)] for a list of zero-argument callables"""
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def run(store, count, rng):
+    half = count // 2
+    lists = [prepare_new_list(doc) for doc in make_lists(count, rng)]
+    singles, batched = lists[:half], lists[half:]
+    for doc in batched:
+        doc['idempotencyKey'] = f"key-{doc['billNumber']}"
+    results = {}
+
+    results['insert_list'] = timed([lambda doc=doc: store.insert_list(doc) for doc in singles])
+    batches = [batched[start:start + BATCH] for start in range(0, len(batched), BATCH)]
+    results[f'insert_new_lists ({BATCH})'] = timed([lambda batch=batch: store.insert_new_lists(batch)
+                                                   for batch in batches])
+    ids = [str(doc['_id']) for doc in rng.sample(lists, 2000)]
+    results['get_list'] = timed([lambda list_id=list_id: store.get_list(list_id) for list_id in ids])
+    bills = [doc['billNumber'] for doc in rng.sample(lists, 2000)]
+    results['list_by_bill'] = timed([lambda bill=bill: store.list_by_bill(bill) for bill in bills])
+    days = [f'2026-09-{day:02d}' for day in range(1, DAYS + 1)]
+    results['lists_for_day'] = timed([lambda day=day: list(store.lists_for_day(day)) for day in days])
+    results['name_counts'] = timed([lambda: store.name_counts('itemName', 50000) for _ in range(5)])
+    targets = rng.sample(lists, 1000)
+    results['patch_list'] = timed([
+        lambda doc=doc: store.patch_list(str(doc['_id']), {'version': 1, 'update': [{'index': 0, 'fields': {'quantity': '9'}}]})
+        for doc in targets
+    ])
+    return results
+
+
+def report(name, results, count):
+    print(f"\n{name}: {count} lists")
+    print(f"{'':<26}{'ops/s':>10}{'p50 µs':>10}{'p99 µs':>10}")
+    for label, samples in results.items():
+        per_call = sum(samples) / len(samples)
+        # Batched inserts are reported per list, not per batch
+        per_op = per_call / BATCH if label.startswith('insert_new_lists') else per_call
+        print(f"{label:<26}{1e6 / per_op:>10.0f}{percentile(samples, 0.5):>10.1f}{percentile(samples, 0.99):>10.1f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    uri = sys.argv[2] if len(sys.argv) > 2 else os.getenv('MONGODB_URI')
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStore(os.path.join(directory, 'bench.db'))
+        store.ensure_indexes()
+        report('sqlite', run(store, count, random.Random(0)), count)
+
+    if not uri:
+        print("\nmongodb: skipped (pass a URI or set MONGODB_URI)")
+        return
+    from pymongo import MongoClient
+    client = MongoClient(uri, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command('ping')
+    except Exception as e:
+        print(f"\nmongodb: skipped ({e})")
+        return
+    client.drop_database('bench_storage')
+    store = MongoStore(client['bench_storage'])
+    store.ensure_indexes()
+    try:
+        report('mongodb', run(store, count, random.Random(0)), count)
+    finally:
+        client.drop_database('bench_storage')
+
+
+if __name__ == '__main__':
+    main()
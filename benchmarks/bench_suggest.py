@@ -0,0 +1,61 @@
+"""
+Typeahead latency of the suggestion trie at catalog scale.
+
+    python benchmarks/bench_suggest.py [terms]
+
+Bulk-builds a RadixTrie from the catalog plus synthetic "<brand> <product> <variant>"
+names with Zipf-like save counts, then times prefix lookups (1-4 characters,
+the typical keystrokes) and incremental inserts as lists are saved.
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import PRODUCTS, BRANDS
+from suggest import RadixTrie
+
+VARIANTS = ['', 'family pack', 'mini', '500 g', '1 kg', 'pouch', 'organic', 'classic', 'gold', 'lite']
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = random.Random(0)
+    names = set(PRODUCTS)
+    while len(names) < count:
+        names.add(' '.join(filter(None, [rng.choice(BRANDS), rng.choice(PRODUCTS), rng.choice(VARIANTS),
+                                         str(rng.randrange(1000))])))
+    names = sorted(names)
+
+    weighted = [(name, max(1, int(1000 / (1 + rank % 997)))) for rank, name in enumerate(names)]
+    start = time.perf_counter()
+    trie = RadixTrie.build(weighted)
+    build = time.perf_counter() - start
+
+    prefixes = [name[:rng.randint(1, 4)] for name in rng.sample(names, 5000)]
+    lookups = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        trie.complete(prefix, 8)
+        lookups.append((time.perf_counter() - start) * 1e6)
+
+    inserts = []
+    for name in rng.sample(names, 5000):
+        start = time.perf_counter()
+        trie.add(name)
+        inserts.append((time.perf_counter() - start) * 1e6)
+
+    print(f"{len(trie)} terms, built in {build:.2f} s")
+    print(f"{'':<22}{'p50 µs':>9}{'p99 µs':>9}{'max µs':>9}")
+    for label, values in (('complete(prefix, 8)', lookups), ('add(name)', inserts)):
+        print(f"{label:<22}{percentile(values, 0.5):>9.1f}{percentile(values, 0.99):>9.1f}{max(values):>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Replay recorded /api/analyze and /api traffic at fixed arrival rates and report
+throughput, latency percentiles and error rates per endpoint.
+
+By default the app is started under gunicorn (GUNICORN_PROFILE=--profile) with the
+MongoDB and Azure OpenAI stand-ins from benchmarks/standins.py, so the numbers
+show where that deployment profile saturates without touching real services.
+
+    python benchmarks/loadtest.py --rates 5 10 20 40 --duration 20 --profile gthread
+    python benchmarks/loadtest.py --profile inprocess        # werkzeug server, no gunicorn
+    python benchmarks/loadtest.py --target http://host:8000  # an already running server
+
+Arrivals are open-loop (Poisson) and latency is measured from the scheduled send
+time, so a saturated server shows up as growing latency instead of a slower client.
+Record real traffic with TRAFFIC_RECORD_FILE=traffic.jsonl on the server and pass
+it as --corpus.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(ROOT, 'benchmarks', 'data', 'traffic.jsonl')
+
+
+# ----------------------------
+# 1. Corpus
+# ----------------------------
+def load_corpus(path):
+    entries = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry.setdefault('method', 'POST')
+                entry.setdefault('headers', {})
+                entries.append(entry)
+    return entries
+
+
+def endpoint_label(entry):
+    body = entry.get('body') or {}
+    label = entry['path']
+    if entry['path'] == '/api/analyze':
+        engine = body.get('engine') or entry['headers'].get('X-Parser-Engine') or 'default'
+        label += f" [{body.get('mode') or 'single'}/{engine}]"
+    return label
+
+
+def prepare(entry, sequence):
+    """Body bytes for one replay; saved lists get a unique bill number"""
+    body = entry.get('body')
+    if entry['path'] == '/api' and isinstance(body, dict) and body.get('billNumber'):
+        body = dict(body, billNumber=f"{body['billNumber']}-{sequence}")
+    return json.dumps(body).encode('utf-8') if body is not None else None
+
+
+# ----------------------------
+# 2. Open-loop driver
+# ----------------------------
+class Results:
+    def __init__(self):
+        self.sent = 0
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.limited = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, label, latency, status):
+        with self._lock:
+            self.latencies[label].append(latency)
+            if status == 429:
+                self.limited[label] += 1
+            elif status is None or status >= 400:
+                self.errors[label] += 1
+
+
+_local = threading.local()
+
+
+def _connection(host, port):
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _local.conn = http.client.HTTPConnection(host, port, timeout=120)
+    return conn
+
+
+def send(host, port, entry, payload, scheduled, label, results):
+    headers = dict(entry['headers'])
+    if payload is not None:
+        headers['Content-Type'] = 'application/json'
+    status = None
+    try:
+        conn = _connection(host, port)
+        conn.request(entry['method'], entry['path'], body=payload, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        _local.conn = None
+    results.add(label, time.perf_counter() - scheduled, status)
+
+
+def run_rate(host, port, corpus, rate, duration, max_inflight, seed=0):
+    """Offer `rate` requests/s for `duration` seconds; returns (Results, elapsed)"""
+    rng = random.Random(seed)
+    results = Results()
+    pool = ThreadPoolExecutor(max_workers=max_inflight)
+    start = time.perf_counter()
+    next_at = start
+    sequence = 0
+    while True:
+        next_at += rng.expovariate(rate)
+        if next_at - start > duration:
+            break
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        entry = corpus[sequence % len(corpus)]
+        sequence += 1
+        pool.submit(send, host, port, entry, prepare(entry, sequence), next_at, endpoint_label(entry), results)
+    pool.shutdown(wait=True)
+    results.sent = sequence
+    return results, time.perf_counter() - start
+
+
+def emit(*args):
+    # The in-process server silences the app's prints by swapping sys.stdout
+    print(*args, file=sys.__stdout__, flush=True)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+def report(rate, results, elapsed, duration, slo_ms):
+    emit(f"\noffered {rate:g} req/s ({results.sent / duration:.1f} sent) for {duration:g}s, drained after {elapsed:.1f}s")
+    emit(f"{'endpoint':<36}{'done':>7}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'err %':>7}{'429':>6}")
+    total, errors_all, p99_all = 0, 0, []
+    for label in sorted(results.latencies):
+        latencies = results.latencies[label]
+        total += len(latencies)
+        p99_all.extend(latencies)
+        errors_all += results.errors[label]
+        errors = results.errors[label] / len(latencies) * 100
+        emit(f"{label:<36}{len(latencies):>7}{len(latencies) / elapsed:>8.1f}{percentile(latencies, 0.5):>9.0f}"
+              f"{percentile(latencies, 0.9):>9.0f}{percentile(latencies, 0.99):>9.0f}{errors:>7.1f}{results.limited[label]:>6}")
+    achieved = total / elapsed
+    p99 = percentile(p99_all, 0.99)
+    # Past saturation the backlog grows, which shows up as tail latency or errors
+    saturated = p99 > slo_ms or errors_all > 0.05 * max(total, 1)
+    emit(f"{'all':<36}{total:>7}{achieved:>8.1f}{'':>27}  p99 {p99:.0f} ms"
+          f"{'  <- saturated' if saturated else ''}")
+    return saturated
+
+
+# ----------------------------
+# 3. Server under test
+# ----------------------------
+def wait_for_port(host, port, timeout=90):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            return True
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.3)
+    return False
+
+
+def start_gunicorn(options, env):
+    env['GUNICORN_PROFILE'] = options.profile
+    env['PORT'] = str(options.port)
+    if options.workers:
+        env['WEB_CONCURRENCY'] = str(options.workers)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', os.devnull,
+         'benchmarks.standins:standin_app()'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def start_inprocess(port):
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    import standins
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    # The app prints per request; keep the report readable
+    sys.stdout = open(os.devnull, 'w')
+    app = standins.standin_app()
+    server = make_server('127.0.0.1', port, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument('--corpus', default=DEFAULT_CORPUS)
+    cli.add_argument('--rates', type=float, nargs='+', default=[5, 10, 20, 40])
+    cli.add_argument('--duration', type=float, default=20)
+    cli.add_argument('--max-inflight', type=int, default=512)
+    cli.add_argument('--slo-ms', type=float, default=3000, help='p99 above this counts as saturated')
+    cli.add_argument('--stop-at-saturation', action='store_true')
+    cli.add_argument('--target', help='URL of a running server (skips starting one)')
+    cli.add_argument('--profile', default='gthread', help='gunicorn profile, or inprocess')
+    cli.add_argument('--workers', type=int, default=0)
+    cli.add_argument('--port', type=int, default=8766)
+    cli.add_argument('--llm-ms', type=float, default=800)
+    cli.add_argument('--llm-error-rate', type=float, default=0.01)
+    cli.add_argument('--mongo-ms', type=float, default=2)
+    cli.add_argument('--mongo-error-rate', type=float, default=0.0)
+    cli.add_argument('--keep-rate-limits', action='store_true', help='leave RATE_LIMIT_* budgets on')
+    options = cli.parse_args()
+
+    corpus = load_corpus(options.corpus)
+    env = os.environ
+    env.update(
+        STANDIN_LLM_MS=str(options.llm_ms),
+        STANDIN_LLM_ERROR_RATE=str(options.llm_error_rate),
+        STANDIN_MONGO_MS=str(options.mongo_ms),
+        STANDIN_MONGO_ERROR_RATE=str(options.mongo_error_rate),
+    )
+    if not options.keep_rate_limits:
+        env.update(RATE_LIMIT_LLM='off', RATE_LIMIT_LOCAL='off')
+
+    process = server = None
+    if options.target:
+        url = urlparse(options.target)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = '127.0.0.1', options.port
+        if options.profile == 'inprocess':
+            server = start_inprocess(port)
+        else:
+            process = start_gunicorn(options, dict(env))
+    try:
+        if not wait_for_port(host, port):
+            emit(f"❌ Server on {host}:{port} did not come up")
+            return 1
+        emit(f"{len(corpus)} corpus entries, target {host}:{port} "
+              f"({'external' if options.target else options.profile}), LLM stand-in {options.llm_ms:g} ms")
+        for index, rate in enumerate(options.rates):
+            results, elapsed = run_rate(host, port, corpus, rate, options.duration, options.max_inflight, seed=index)
+            if report(rate, results, elapsed, options.duration, options.slo_ms) and options.stop_at_saturation:
+                break
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if server is not None:
+            server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Local stand-ins for MongoDB and Azure OpenAI, used by benchmarks/loadtest.py.
+
+install() must run before `import app`: it points pymongo.MongoClient at mongomock
+and analyser's client factory at FakeAzureClient, both with configurable latency
+and error rates. gunicorn can serve the patched app directly:
+
+    gunicorn -c gunicorn.conf.py 'benchmarks.standins:standin_app()'
+
+Settings (environment, so gunicorn workers see them too):
+    STANDIN_LLM_MS          median chat completion latency (default 800)
+    STANDIN_LLM_SIGMA       log-normal spread of that latency (default 0.5)
+    STANDIN_LLM_ERROR_RATE  share of calls that raise (default 0.01)
+    STANDIN_LLM_MALFORMED   share of replies wrapped in prose/fences (default 0.05)
+    STANDIN_MONGO_MS        median latency per MongoDB operation (default 2)
+    STANDIN_MONGO_ERROR_RATE share of operations that raise AutoReconnect (default 0)
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import tempfile
+import threading
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _setting(name, default):
+    return float(os.getenv(name, default))
+
+
+def sample_latency(median_ms, sigma):
+    """Seconds from a log-normal distribution with the given median"""
+    if median_ms <= 0:
+        return 0.0
+    return random.lognormvariate(math.log(median_ms / 1000.0), sigma)
+
+
+# ----------------------------
+# 1. MongoDB stand-in
+# ----------------------------
+MONGO_METHODS = ['insert_one', 'insert_many', 'find_one', 'find', 'update_one', 'update_many',
+                 'bulk_write', 'find_one_and_update', 'count_documents', 'aggregate']
+# mongomock is not thread-safe; operations are serialized, simulated latency is not
+_mongo_lock = threading.RLock()
+
+
+def _slow(method):
+    from pymongo.errors import AutoReconnect
+
+    def wrapper(*args, **kwargs):
+        time.sleep(sample_latency(_setting('STANDIN_MONGO_MS', 2), 0.3))
+        if random.random() < _setting('STANDIN_MONGO_ERROR_RATE', 0):
+            raise AutoReconnect('stand-in MongoDB error')
+        with _mongo_lock:
+            result = method(*args, **kwargs)
+            # Materialize cursors inside the lock
+            return list(result) if method.__name__ == 'aggregate' else result
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+def install_mongo():
+    import pymongo
+    import mongomock
+    from mongomock.collection import Collection
+
+    for name in MONGO_METHODS:
+        setattr(Collection, name, _slow(getattr(Collection, name)))
+    # watch() is missing, so the reporting worker uses its polling fallback
+    pymongo.MongoClient = lambda *args, **kwargs: mongomock.MongoClient()
+
+
+# ----------------------------
+# 2. Azure OpenAI stand-in
+# ----------------------------
+class FakeCompletions:
+    """chat.completions.create() answering from the regex parser after a simulated delay"""
+
+    def __init__(self):
+        from regex_parser import RegexItemParser
+        self.parser = RegexItemParser()
+
+    def create(self, messages, max_tokens=None, response_format=None, **kwargs):
+        time.sleep(sample_latency(_setting('STANDIN_LLM_MS', 800), _setting('STANDIN_LLM_SIGMA', 0.5)))
+        if random.random() < _setting('STANDIN_LLM_ERROR_RATE', 0.01):
+            raise RuntimeError('stand-in Azure OpenAI error')
+
+        text = messages[-1]['content']
+        if response_format:
+            from splitter import analyze_multi
+            items = [item.to_dict() for item in analyze_multi(self.parser, text)]
+            for item in items:
+                item['source'] = item.pop('description', '')
+            content = json.dumps({'items': items})
+        else:
+            content = json.dumps(self.parser.analyze(text).to_dict())
+        if random.random() < _setting('STANDIN_LLM_MALFORMED', 0.05):
+            content = f"Here is the JSON:\n```json\n{content}\n```"
+
+        usage = SimpleNamespace(prompt_tokens=(len(messages[0]['content']) + len(text)) // 4,
+                                completion_tokens=len(content) // 4)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _list_models():
+    # The health probe's deployment listing: no tokens, a short round trip
+    time.sleep(sample_latency(_setting('STANDIN_LLM_MS', 800) / 10, 0.3))
+    return SimpleNamespace(data=[])
+
+
+class FakeAzureClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=FakeCompletions())
+        self.models = SimpleNamespace(list=_list_models)
+
+
+def install_azure():
+    import analyser
+    analyser.create_client = FakeAzureClient
+    analyser.reset_client()
+
+
+# ----------------------------
+# 3. Patched app
+# ----------------------------
+def install():
+    os.environ.setdefault('AZURE_OPENAI_ENDPOINT', 'http://127.0.0.1:9')
+    os.environ.setdefault('AZURE_OPENAI_API_KEY', 'standin')
+    os.environ.setdefault('AZURE_OPENAI_DEPLOYMENT_NAME', 'standin')
+    os.environ.setdefault('MONGODB_URI', 'mongodb://standin')
+    os.environ.setdefault('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'loadtest_parquet'))
+    os.environ.setdefault('JOBS_DIR', os.path.join(tempfile.gettempdir(), 'loadtest_jobs'))
+    # nltk resources are not needed by the endpoints under test
+    import nltk
+    nltk.download = lambda *args, **kwargs: True
+    install_mongo()
+    install_azure()
+
+
+def standin_app():
+    """App factory for gunicorn: stand-ins installed, then the real app imported"""
+    install()
+    from app import app
+    return app
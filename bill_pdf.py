@@ -0,0 +1,212 @@
+import os
+import io
+import re
+import json
+import hashlib
+import zipfile
+import threading
+from collections import OrderedDict
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+# ----------------------------
+# 1. Pre-compiled bill template
+# ----------------------------
+# Everything that does not depend on the bill contents is built once at import
+# time, so each render only lays out the rows. Mirrors generatePDF() in App.tsx.
+PAGE_SIZE = A4
+MARGIN = 20 * mm
+TABLE_WIDTH = PAGE_SIZE[0] - 2 * MARGIN
+
+COLUMNS = [
+    ("#", 0.05),
+    ("Item Name", 0.2),
+    ("Brand", 0.15),
+    ("Quantity", 0.1),
+    ("Unit", 0.1),
+    ("Priority", 0.15),
+    ("Details", 0.25),
+]
+COLUMN_WIDTHS = [TABLE_WIDTH * fraction for _, fraction in COLUMNS]
+HEADER_ROW = [header for header, _ in COLUMNS]
+ITEM_FIELDS = ["itemName", "brand", "quantity", "unit", "priority", "details"]
+
+TITLE_STYLE = ParagraphStyle(
+    "BillTitle", fontName="Helvetica-Bold", fontSize=24, leading=28,
+    alignment=1, textColor=colors.Color(28 / 255, 69 / 255, 135 / 255)
+)
+DATE_STYLE = ParagraphStyle(
+    "BillDate", fontName="Helvetica-Bold", fontSize=14, leading=18, alignment=1
+)
+META_STYLE = ParagraphStyle(
+    "BillMeta", fontName="Helvetica", fontSize=12, leading=16,
+    textColor=colors.Color(100 / 255, 100 / 255, 100 / 255)
+)
+CELL_STYLE = ParagraphStyle("BillCell", fontName="Helvetica", fontSize=10, leading=12)
+
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.Color(25 / 255, 65 / 255, 133 / 255)),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, 0), 11),
+    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+    ("ALIGN", (0, 1), (0, -1), "CENTER"),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("REPEATROWS", (0, 0), (-1, 0)),
+])
+
+
+# ----------------------------
+# 2. Rendering
+# ----------------------------
+_UNSAFE_FILENAME = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def bill_items(bill: dict) -> list:
+    """The bill's items; entries that are not item objects are skipped"""
+    return [item for item in bill.get("items") or [] if isinstance(item, dict)]
+
+
+def safe_filename(name, default: str = "bill") -> str:
+    """Bill number reduced to characters safe in a Content-Disposition header or zip entry"""
+    name = _UNSAFE_FILENAME.sub("_", str(name or "")).strip("._")[:100]
+    return name or default
+
+
+def bill_fingerprint(bill: dict) -> str:
+    """Content hash over the fields that end up on the PDF"""
+    payload = {
+        "billNumber": bill.get("billNumber", ""),
+        "created_at": bill.get("created_at", ""),
+        "customerName": bill.get("customerName", ""),
+        "favoriteShop": bill.get("favoriteShop", ""),
+        "items": [[str(item.get(f, "") or "") for f in ITEM_FIELDS] for item in bill_items(bill)],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def render_bill_pdf(bill: dict) -> bytes:
+    """Render a stored shopping list document to PDF bytes"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=PAGE_SIZE,
+        leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN,
+        title=bill.get("billNumber", "Shopping List")
+    )
+
+    rows = [HEADER_ROW]
+    for idx, item in enumerate(bill_items(bill), start=1):
+        cells = [str(item.get(f, "") or "") for f in ITEM_FIELDS]
+        # Details wrap inside their column, the rest are short single-line values
+        cells[-1] = Paragraph(_escape(cells[-1]), CELL_STYLE)
+        rows.append([str(idx)] + cells)
+
+    table = Table(rows, colWidths=COLUMN_WIDTHS, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+
+    story = [
+        Paragraph("Customer Shopping List", TITLE_STYLE),
+        Spacer(1, 4 * mm),
+        Paragraph(f"Date: {_escape(bill.get('created_at', ''))}", DATE_STYLE),
+        Spacer(1, 3 * mm),
+        Paragraph(f"Bill Number: {_escape(bill.get('billNumber', ''))}", META_STYLE),
+        Paragraph(f"Customer Name: {_escape(bill.get('customerName', ''))}", META_STYLE),
+        Paragraph(f"Favorite Shop: {_escape(bill.get('favoriteShop', ''))}", META_STYLE),
+        Spacer(1, 4 * mm),
+        table,
+    ]
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _escape(value) -> str:
+    """Escape text for reportlab's mini-markup"""
+    return str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+# ----------------------------
+# 3. Size-bounded PDF cache
+# ----------------------------
+class PDFCache:
+    """LRU cache of rendered PDFs keyed by content hash, bounded by total bytes"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf
+
+    def put(self, key: str, pdf: bytes):
+        if len(pdf) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            self._entries[key] = pdf
+            self.current_bytes += len(pdf)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+pdf_cache = PDFCache(int(os.getenv("PDF_CACHE_MAX_BYTES", 32 * 1024 * 1024)))
+
+
+def get_bill_pdf(bill: dict, cache: PDFCache = pdf_cache) -> bytes:
+    """Return the PDF for a bill, rendering only when its contents changed"""
+    key = bill_fingerprint(bill)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = render_bill_pdf(bill)
+        cache.put(key, pdf)
+    return pdf
+
+
+def render_bills_archive(bills, cache: PDFCache = pdf_cache) -> bytes:
+    """Render many bills into a single zip archive (one PDF per bill)"""
+    buffer = io.BytesIO()
+    # PDFs are already deflate-compressed internally, so store them as-is
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        used = set()
+        for bill in bills:
+            fingerprint = bill_fingerprint(bill)[:12]
+            stem = safe_filename(bill.get('billNumber'), fingerprint)
+            # Bill numbers are not unique; a repeated one gets the fingerprint, then a counter
+            name, counter = stem, 1
+            if name in used:
+                name = f"{stem}-{fingerprint}"
+            while name in used:
+                counter += 1
+                name = f"{stem}-{fingerprint}-{counter}"
+            used.add(name)
+            archive.writestr(f"{name}.pdf", get_bill_pdf(bill, cache))
+    return buffer.getvalue()
@@ -33,6 +33,7 @@ python check_requirements.py
 #npm used to install the dependencies for the frontend(nodesjs)
 npm install
 npm run build
+python static_assets.py dist  # precompress .gz/.br variants of the built assets
 
 
 if [ ! -d "dist" ]; 
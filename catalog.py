@@ -0,0 +1,61 @@
+import os
+import json
+
+# ----------------------------
+# 1. Built-in catalog
+# ----------------------------
+# Common grocery products and the brands shoppers name most often. Deployments
+# add their own with CATALOG_FILE: {"products": [...], "brands": [...]}.
+CATALOG_FILE = os.getenv('CATALOG_FILE', '')
+
+PRODUCTS = [
+    'rice', 'basmati rice', 'brown rice', 'poha', 'wheat', 'atta', 'maida', 'sooji', 'besan',
+    'flour', 'sugar', 'brown sugar', 'jaggery', 'salt', 'rock salt', 'oil', 'mustard oil',
+    'sunflower oil', 'groundnut oil', 'olive oil', 'coconut oil', 'ghee', 'butter', 'cheese',
+    'paneer', 'curd', 'yogurt', 'milk', 'toned milk', 'buttermilk', 'cream', 'eggs', 'bread',
+    'brown bread', 'pav', 'biscuits', 'cookies', 'rusk', 'cornflakes', 'oats', 'muesli',
+    'noodles', 'pasta', 'vermicelli', 'tea', 'green tea', 'coffee', 'honey', 'jam', 'ketchup',
+    'mayonnaise', 'pickle', 'papad', 'toor dal', 'moong dal', 'masoor dal', 'chana dal',
+    'urad dal', 'rajma', 'kabuli chana', 'peanuts', 'almonds', 'cashews', 'raisins', 'walnuts',
+    'turmeric', 'chilli powder', 'coriander powder', 'cumin', 'garam masala', 'mustard seeds',
+    'black pepper', 'cardamom', 'cloves', 'cinnamon', 'potatoes', 'onions', 'tomatoes',
+    'garlic', 'ginger', 'green chillies', 'coriander', 'mint', 'spinach', 'cauliflower',
+    'cabbage', 'carrots', 'beans', 'peas', 'okra', 'brinjal', 'capsicum', 'cucumber',
+    'lemons', 'bananas', 'apples', 'oranges', 'grapes', 'mangoes', 'papaya', 'pomegranate',
+    'watermelon', 'chicken', 'mutton', 'fish', 'prawns', 'water', 'soft drink', 'juice',
+    'chips', 'chocolate', 'ice cream', 'soap', 'shampoo', 'toothpaste', 'detergent',
+    'dishwash liquid', 'toilet cleaner', 'tissues', 'diapers',
+]
+
+BRANDS = [
+    'Amul', 'Mother Dairy', 'Nandini', 'Aavin', 'Britannia', 'Parle', 'Sunfeast', 'ITC',
+    'Aashirvaad', 'Pillsbury', 'Fortune', 'Saffola', 'Dhara', 'Patanjali', 'Dabur',
+    'India Gate', 'Daawat', 'Kohinoor', 'Tata', 'Tata Sampann', 'Tata Tea', 'Red Label',
+    'Taj Mahal', 'Brooke Bond', 'Bru', 'Nescafe', 'Nestle', 'Maggi', 'Yippee', 'Kissan',
+    'Heinz', 'Everest', 'MDH', 'Haldiram', 'Bikaji', 'Lays', 'Kurkure', 'Cadbury',
+    'Kwality Walls', 'Vadilal', 'Kelloggs', 'Quaker', 'Saffola Oats', 'Tropicana',
+    'Paper Boat', 'Bisleri', 'Kinley', 'Aquafina', 'Coca Cola', 'Pepsi', 'Thums Up',
+    'Surf Excel', 'Ariel', 'Tide', 'Rin', 'Vim', 'Harpic', 'Lizol', 'Colgate', 'Pepsodent',
+    'Close Up', 'Dove', 'Lux', 'Lifebuoy', 'Dettol', 'Santoor', 'Head and Shoulders',
+    'Clinic Plus', 'Sunsilk', 'Pampers', 'Huggies', 'Gowardhan', 'Epigamia',
+    'Licious', 'Fresho', 'Organic Tattva', '24 Mantra',
+]
+
+
+# ----------------------------
+# 2. Loading
+# ----------------------------
+def load_catalog(path=None):
+    """{'product': [...], 'brand': [...]}: the built-in lists plus CATALOG_FILE, if any"""
+    catalog = {'product': list(PRODUCTS), 'brand': list(BRANDS)}
+    path = path if path is not None else CATALOG_FILE
+    if path:
+        try:
+            with open(path) as f:
+                extra = json.load(f)
+            catalog['product'].extend(extra.get('products', []))
+            catalog['brand'].extend(extra.get('brands', []))
+            print(f"✅ Catalog extended from {path}")
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read catalog file {path}: {e}")
+    return catalog
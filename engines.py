@@ -0,0 +1,321 @@
+import os
+import time
+import zlib
+import random
+import threading
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+from units import add_canonical
+from llm_scheduler import request_context, BULK
+from regex_parser import CONNECTING_WORDS, ITEM_STOPWORDS
+from shopping_item import ShoppingItem
+
+# ----------------------------
+# 1. Engine interface
+# ----------------------------
+COMPARED_FIELDS = ['itemName', 'quantity', 'unit', 'brand', 'priority']
+# Engines that never call the LLM (used for rate-limit budgets)
+LOCAL_ENGINES = {'regex', 'local'}
+RESULT_FIELDS = ['itemName', 'quantity', 'unit', 'brand', 'priority', 'details', 'description']
+
+
+class ParserEngine:
+    """Common interface: analyze(text) returns the ShoppingItemParser schema"""
+    name = 'base'
+
+    def analyze(self, text: str) -> dict:
+        raise NotImplementedError
+
+    def analyze_batch(self, texts):
+        return [self.analyze(text) for text in texts]
+
+
+class ParserAdapter(ParserEngine):
+    """Wraps any parser object whose entry point has a different method name"""
+
+    def __init__(self, name, parser, method='analyze'):
+        self.name = name
+        self.parser = parser
+        self._method = getattr(parser, method)
+        self._batch = getattr(parser, 'analyze_batch', None)
+
+    def analyze(self, text):
+        result = self._method(text) or {}
+        # Legacy parsers disagree on keys and types, normalize to the shared schema
+        normalized = {field: result.get(field, '') for field in RESULT_FIELDS}
+        normalized['quantity'] = str(normalized['quantity'] or '')
+        normalized['priority'] = str(normalized['priority'] or 'MEDIUM').upper()
+        normalized['description'] = normalized['description'] or text
+        for key, value in result.items():
+            normalized.setdefault(key, value)
+        return add_canonical(ShoppingItem.from_dict(normalized))
+
+    def analyze_batch(self, texts):
+        if self._batch is not None:
+            return self._batch(texts)
+        return super().analyze_batch(texts)
+
+
+class TieredEngine(ParserEngine):
+    """Try a cheap engine first and escalate to an expensive one only when it is unsure"""
+
+    def __init__(self, name, fast, slow, escalation_gate=None):
+        self.name = name
+        self.fast = fast
+        self.slow = slow
+        # escalation_gate(text) -> bool; when it refuses, the fast result is returned as-is
+        self.escalation_gate = escalation_gate
+        self.escalations = 0
+        self.refused = 0
+        self.calls = 0
+
+    @staticmethod
+    def is_confident(result: dict) -> bool:
+        item_name = result.get('itemName', '')
+        # "need urgent" is what is left of a request, not an item
+        words = CONNECTING_WORDS.sub(' ', item_name).lower().split()
+        return bool(
+            item_name
+            and any(word not in ITEM_STOPWORDS for word in words)
+            and item_name != result.get('description')
+            and result.get('quantity')
+            and result.get('unit')
+        )
+
+    def analyze(self, text):
+        self.calls += 1
+        result = self.fast.analyze(text)
+        if self.is_confident(result):
+            return result
+        if self.escalation_gate is not None and not self.escalation_gate(text):
+            self.refused += 1
+            return result
+        self.escalations += 1
+        return self.slow.analyze(text)
+
+
+# ----------------------------
+# 2. Registry
+# ----------------------------
+class EngineRegistry:
+    """Engine factories by name; engines are built on first use and then reused"""
+
+    def __init__(self):
+        self._factories = {}
+        self._engines = {}
+        # Re-entrant: composite engines (tiered) build their parts from inside a factory
+        self._lock = threading.RLock()
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def register_class(self, name, dotted_path, method='analyze'):
+        """Register a parser class by 'module:Class' so its module is only imported when used"""
+        def factory():
+            module_name, class_name = dotted_path.split(':')
+            parser_class = getattr(importlib.import_module(module_name), class_name)
+            return ParserAdapter(name, parser_class(), method)
+        self.register(name, factory)
+
+    def names(self):
+        return sorted(self._factories)
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def loaded(self):
+        return dict(self._engines)
+
+    def get(self, name) -> ParserEngine:
+        engine = self._engines.get(name)
+        if engine is None:
+            if name not in self._factories:
+                raise KeyError(f'Unknown engine: {name}')
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    engine = self._factories[name]()
+                    self._engines[name] = engine
+        return engine
+
+
+def default_registry(llm_parser=None, escalation_gate=None):
+    """Registry with the built-in engines; llm_parser reuses an existing ShoppingItemParser"""
+    registry = EngineRegistry()
+
+    def regex_factory():
+        from regex_parser import RegexItemParser
+        return ParserAdapter('regex', RegexItemParser())
+
+    def local_factory():
+        from local_nlp import LocalNLPParser
+        return ParserAdapter('local', LocalNLPParser())
+
+    def llm_factory():
+        parser = llm_parser
+        if parser is None:
+            from analyser import ShoppingItemParser
+            parser = ShoppingItemParser()
+        return ParserAdapter('llm', parser)
+
+    registry.register('regex', regex_factory)
+    registry.register('local', local_factory)
+    registry.register('llm', llm_factory)
+    registry.register('tiered', lambda: TieredEngine(
+        'tiered', registry.get('regex'), registry.get('llm'), escalation_gate))
+    registry.register('tiered-local', lambda: TieredEngine(
+        'tiered-local', registry.get('local'), registry.get('llm'), escalation_gate))
+    # Earlier OpenAI-based parsers, kept for comparison (text_analyzer_temp/U2 are not importable)
+    registry.register_class('legacy-regex-openai', 'Text_analyser.text_analyzer_regex_openAI:ShoppingItemParser', 'parse_text')
+    registry.register_class('legacy-openai-excel', 'text_analyzer_regex_openAI_excel:ShoppingItemParser', 'parse_with_context')
+    return registry
+
+
+# ----------------------------
+# 3. Routing and per-engine stats
+# ----------------------------
+def parse_split(spec: str):
+    """'tiered:80,llm:20' -> [('tiered', 80), ('llm', 20)]"""
+    split = []
+    for part in (spec or '').split(','):
+        if ':' in part:
+            name, weight = part.split(':', 1)
+            split.append((name.strip(), int(weight)))
+    return split
+
+
+class EngineStats:
+    __slots__ = ('calls', 'errors', 'total_ms', 'max_ms', 'compared', 'agreement')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.compared = 0
+        self.agreement = {field: 0 for field in COMPARED_FIELDS}
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            'max_ms': round(self.max_ms, 2),
+            'compared': self.compared,
+            'agreement': {
+                field: round(hits / self.compared, 3) if self.compared else None
+                for field, hits in self.agreement.items()
+            },
+        }
+
+
+def _same(a, b):
+    return str(a or '').strip().lower() == str(b or '').strip().lower()
+
+
+class EngineRouter:
+    """Picks an engine per request (explicit > traffic split > default) and records stats"""
+
+    def __init__(self, registry, default=None, split=None, shadow=None, shadow_rate=None, shadow_gate=None):
+        self.registry = registry
+        self.default = default or os.getenv('PARSER_ENGINE', 'llm')
+        self.split = split if split is not None else parse_split(os.getenv('PARSER_ENGINE_SPLIT', ''))
+        # A reference engine re-parses a sample of traffic off the request path to measure agreement
+        self.shadow = shadow if shadow is not None else os.getenv('PARSER_SHADOW_ENGINE', '')
+        self.shadow_rate = shadow_rate if shadow_rate is not None else float(os.getenv('PARSER_SHADOW_RATE', 0))
+        # shadow_gate(text) -> bool, e.g. a rate-limit check; a refused shadow parse is skipped
+        self.shadow_gate = shadow_gate
+        self.shadows_refused = 0
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._shadow_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='parser-shadow')
+
+    def choose(self, requested='', client_key=''):
+        if requested:
+            return requested
+        if self.split:
+            # Stable per client so one user sees consistent behaviour during an experiment
+            bucket = zlib.crc32(client_key.encode('utf-8')) % 100 if client_key else random.randrange(100)
+            total = 0
+            for name, weight in self.split:
+                total += weight
+                if bucket < total:
+                    return name
+        return self.default
+
+    def _stats_for(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.stats.setdefault(name, EngineStats())
+        return stats
+
+    def analyze(self, text, requested='', client_key='', analyze=None):
+        """Returns (engine name, result); raises KeyError for unknown engines
+
+        analyze(engine, text) overrides how the engine is applied, e.g. splitter.analyze_multi.
+        """
+        name = self.choose(requested, client_key)
+        engine = self.registry.get(name)
+        stats = self._stats_for(name)
+
+        start = time.perf_counter()
+        try:
+            result = analyze(engine, text) if analyze else engine.analyze(text)
+        except Exception:
+            with self._lock:
+                stats.errors += 1
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+
+        if analyze is None and self.shadow and name != self.shadow and random.random() < self.shadow_rate:
+            if self.shadow_gate is None or self.shadow_gate(text):
+                self._shadow_pool.submit(self._compare, name, text, dict(result))
+            else:
+                with self._lock:
+                    self.shadows_refused += 1
+        return name, result
+
+    def _compare(self, name, text, result):
+        try:
+            # Measurement only: queued behind interactive requests like bulk work
+            with request_context(BULK, client='shadow'):
+                reference = self.registry.get(self.shadow).analyze(text)
+        except Exception as e:
+            print(f"⚠️ Shadow parse with {self.shadow} failed: {e}")
+            return
+        stats = self._stats_for(name)
+        with self._lock:
+            stats.compared += 1
+            for field in COMPARED_FIELDS:
+                if _same(result.get(field), reference.get(field)):
+                    stats.agreement[field] += 1
+
+    def report(self):
+        escalation = {
+            name: round(engine.escalations / engine.calls, 3)
+            for name, engine in self.registry.loaded().items()
+            if isinstance(engine, TieredEngine) and engine.calls
+        }
+        refused = {
+            name: engine.refused
+            for name, engine in self.registry.loaded().items()
+            if isinstance(engine, TieredEngine) and engine.refused
+        }
+        with self._lock:
+            return {
+                'default': self.default,
+                'split': dict(self.split),
+                'shadow': self.shadow,
+                'shadow_rate': self.shadow_rate,
+                'shadows_refused': self.shadows_refused,
+                'engines': {name: stats.as_dict() for name, stats in self.stats.items()},
+                'escalation_rate': escalation,
+                'escalations_refused': refused,
+                'available': self.registry.names(),
+            }
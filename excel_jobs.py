@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from analyser import read_rows, analyze_rows, results_frame
+
+# ----------------------------
+# 1. Job storage
+# ----------------------------
+# Each job lives in its own folder: the uploaded file, status.json and the results.
+# Status is kept on disk so any gunicorn worker can answer for a job another one runs.
+JOBS_DIR = os.getenv('JOBS_DIR', os.path.join('processing', 'jobs'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+# Legacy .xls would need xlrd; it is refused like any other unsupported type
+ALLOWED_EXTENSIONS = {'.xlsx', '.csv'}
+RESULT_FORMATS = ('xlsx', 'csv')
+# Progress is flushed to disk at most this often (seconds)
+STATUS_INTERVAL = 1.0
+# Parsed rows are appended to partial.csv in chunks of this many rows; a resumed job
+# starts after the last saved chunk
+CHECKPOINT_ROWS = int(os.getenv('JOB_CHECKPOINT_ROWS', 50))
+# The process holding a queued or running job rewrites its status this often (seconds).
+# A job whose heartbeat is older than JOB_STALE_AFTER lost its worker (restart, OOM kill)
+# and is resumed from its input file by another worker.
+HEARTBEAT_INTERVAL = 30.0
+JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', 90))
+# A job that keeps taking its worker down is failed after this many attempts
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+# Finished job folders are deleted after this many seconds
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', 7 * 86400))
+ACTIVE_STATES = ('queued', 'running')
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+class JobNotReady(Exception):
+    pass
+
+
+class JobReleased(Exception):
+    """The worker running the job is shutting down; another one resumes it"""
+
+
+def _job_dir(job_id):
+    # Job ids are uuid hex; anything else could escape JOBS_DIR
+    if not job_id.isalnum():
+        raise JobNotFound(job_id)
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def _write_status(job_id, status):
+    path = os.path.join(_job_dir(job_id), 'status.json')
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(status, f)
+    # Atomic swap so readers never see a half-written file
+    os.replace(tmp, path)
+
+
+def _is_orphaned(status, now):
+    return (status.get('state') in ACTIVE_STATES
+            and now - status.get('heartbeat_at', status.get('created_at', 0)) > JOB_STALE_AFTER)
+
+
+def _input_file(job_id):
+    for name in os.listdir(_job_dir(job_id)):
+        if name.startswith('input.'):
+            return os.path.join(_job_dir(job_id), name)
+    raise FileNotFoundError(f'No input file for job {job_id}')
+
+
+def read_status(job_id):
+    try:
+        with open(os.path.join(_job_dir(job_id), 'status.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise JobNotFound(job_id)
+
+
+def cleanup_jobs(now=None):
+    """Delete folders of jobs finished JOB_RETENTION ago; returns how many were removed"""
+    now = time.time() if now is None else now
+    removed = 0
+    try:
+        job_ids = os.listdir(JOBS_DIR)
+    except FileNotFoundError:
+        return 0
+    for job_id in job_ids:
+        directory = os.path.join(JOBS_DIR, job_id)
+        if not job_id.isalnum() or not os.path.isdir(directory):
+            continue
+        try:
+            with open(os.path.join(directory, 'status.json')) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            # A folder without a readable status is an upload that never got one
+            status = {'state': 'failed', 'finished_at': os.path.getmtime(directory)}
+        if status.get('state') not in ACTIVE_STATES and now - status.get('finished_at', 0) > JOB_RETENTION:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+# ----------------------------
+# 2. Job manager
+# ----------------------------
+class ExcelJobManager:
+    """Runs uploaded XLSX/CSV files through the parser on a background pool
+
+    Jobs outlive the worker that started them: results are saved in chunks, a worker
+    that shuts down hands its jobs back (release), and start() in any worker picks up
+    jobs whose worker is gone and continues them after their last saved chunk.
+    """
+
+    def __init__(self, parser, workers=JOB_WORKERS, throttle=None):
+        self.parser = parser
+        self.workers = workers
+        # throttle(text) blocks each row until the shared LLM budget admits it
+        self.throttle = throttle
+        self._pool = None
+        self._lock = threading.Lock()
+        # Jobs this process has queued or is running: job id -> status
+        self._active = {}
+        self._status_lock = threading.Lock()
+        self._closing = False
+
+    def start(self):
+        """Create the pool and resume orphaned jobs; called once per worker process"""
+        self._executor()
+        return self
+
+    def _executor(self):
+        # Created on first use so the pool belongs to the worker process, not the preloaded master
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    cleanup_jobs()
+                    threading.Thread(target=self._heartbeat, name='excel-job-heartbeat', daemon=True).start()
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='excel-job')
+                    self.resume_orphaned()
+        return self._pool
+
+    def _save(self, job_id, status):
+        with self._status_lock:
+            if self._closing and status['state'] in ACTIVE_STATES:
+                # Handed back once; after that another worker may own the status file.
+                # heartbeat_at 0 makes the job an orphan right away.
+                if self._active.pop(job_id, None) is not None:
+                    status.update(state='queued', released=True, heartbeat_at=0)
+                    _write_status(job_id, status)
+                return
+            status['heartbeat_at'] = time.time()
+            _write_status(job_id, status)
+            if status['state'] in ACTIVE_STATES:
+                self._active[job_id] = status
+            else:
+                self._active.pop(job_id, None)
+
+    def _heartbeat(self):
+        last_cleanup = time.time()
+        while not self._closing:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._status_lock:
+                active = list(self._active.items())
+            for job_id, status in active:
+                try:
+                    self._save(job_id, status)
+                except Exception as e:
+                    print(f"⚠️ Could not refresh Excel job {job_id}: {e}")
+            try:
+                self.resume_orphaned()
+            except Exception as e:
+                print(f"⚠️ Could not resume Excel jobs: {e}")
+            if time.time() - last_cleanup > 3600:
+                last_cleanup = time.time()
+                try:
+                    cleanup_jobs()
+                except Exception as e:
+                    print(f"⚠️ Excel job cleanup failed: {e}")
+
+    def resume_orphaned(self, now=None):
+        """Queue the jobs whose worker is gone in this process; returns their ids"""
+        now = time.time() if now is None else now
+        resumed = []
+        try:
+            job_ids = os.listdir(JOBS_DIR)
+        except FileNotFoundError:
+            return resumed
+        for job_id in job_ids:
+            if self._closing or not job_id.isalnum() or job_id in self._active:
+                continue
+            try:
+                status = read_status(job_id)
+            except (JobNotFound, OSError, ValueError):
+                continue
+            if _is_orphaned(status, now) and self._claim(job_id, status):
+                resumed.append(job_id)
+        return resumed
+
+    def _claim(self, job_id, status):
+        # Every worker sees the orphan; the one that creates this resume's marker takes it
+        resumes = status.get('resumes', 0) + 1
+        try:
+            os.close(os.open(os.path.join(_job_dir(job_id), f'claim-{resumes}'), os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            return False
+        # A released job was handed back on purpose; only lost workers count as attempts
+        attempts = status.get('attempts', 1) + (0 if status.get('released') else 1)
+        status.update(resumes=resumes, attempts=attempts, released=False)
+        if attempts > JOB_MAX_ATTEMPTS:
+            print(f"❌ Excel job {job_id} lost its worker {attempts - 1} times, giving up")
+            status.update(state='failed', finished_at=time.time(),
+                          error='The job stopped its worker repeatedly; upload a smaller file')
+            self._save(job_id, status)
+            return True
+        try:
+            input_file = _input_file(job_id)
+        except FileNotFoundError as e:
+            status.update(state='failed', error=str(e), finished_at=time.time())
+            self._save(job_id, status)
+            return True
+        print(f"🔄 Resuming Excel job {job_id} after row {status.get('rows_saved', 0)}")
+        status['state'] = 'queued'
+        self._save(job_id, status)
+        self._executor().submit(self._run, job_id, input_file, status)
+        return True
+
+    def release(self):
+        """Hand this process's jobs back before it exits so another worker resumes them at once"""
+        self._closing = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._status_lock:
+            active = list(self._active.items())
+        for job_id, status in active:
+            self._save(job_id, status)
+
+    def submit(self, file_storage):
+        """Save an uploaded file and queue it; returns the initial status"""
+        filename = os.path.basename(file_storage.filename or '')
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            raise ValueError(f'Unsupported file type: {extension or filename}')
+
+        job_id = uuid.uuid4().hex
+        os.makedirs(_job_dir(job_id), exist_ok=True)
+        input_file = os.path.join(_job_dir(job_id), 'input' + extension)
+        file_storage.save(input_file)
+
+        status = {
+            'id': job_id,
+            'filename': filename,
+            'state': 'queued',
+            'rows_total': None,
+            'rows_done': 0,
+            'rows_per_sec': 0.0,
+            'eta_seconds': None,
+            'created_at': time.time(),
+            'error': None,
+        }
+        executor = self._executor()
+        self._save(job_id, status)
+        executor.submit(self._run, job_id, input_file, status)
+        return status
+
+    def _update(self, status, **changes):
+        # The heartbeat thread serializes the same dict under this lock
+        with self._status_lock:
+            status.update(changes)
+
+    def _checkpoint(self, job_id, status, results):
+        """Append parsed rows to partial.csv and record how far the file is valid"""
+        if self._closing:
+            raise JobReleased(job_id)
+        partial = os.path.join(_job_dir(job_id), 'partial.csv')
+        saved_bytes = status.get('saved_bytes', 0)
+        with open(partial, 'a+b') as f:
+            # Drop rows a lost worker appended after its last recorded checkpoint
+            f.truncate(saved_bytes)
+            f.seek(saved_bytes)
+            results_frame(results).to_csv(f, index=False, header=saved_bytes == 0)
+            f.flush()
+            os.fsync(f.fileno())
+            saved_bytes = f.tell()
+        self._update(status, rows_saved=status.get('rows_saved', 0) + len(results), saved_bytes=saved_bytes)
+        self._save(job_id, status)
+
+    def _run(self, job_id, input_file, status):
+        try:
+            if self._closing:
+                raise JobReleased(job_id)
+            texts = read_rows(input_file)
+            offset = status.get('rows_saved', 0)
+            started = time.time()
+            self._update(status, state='running', rows_total=len(texts), rows_done=offset, started_at=started)
+            self._save(job_id, status)
+            last_flush = [started]
+
+            def progress(done, total):
+                if self._closing:
+                    raise JobReleased(job_id)
+                now = time.time()
+                done += chunk_start
+                rate = (done - offset) / (now - started) if now > started else 0.0
+                self._update(
+                    status,
+                    rows_done=done,
+                    rows_per_sec=round(rate, 2),
+                    eta_seconds=round((len(texts) - done) / rate, 1) if rate else None,
+                )
+                if now - last_flush[0] >= STATUS_INTERVAL:
+                    last_flush[0] = now
+                    self._save(job_id, status)
+
+            for chunk_start in range(offset, len(texts), CHECKPOINT_ROWS):
+                chunk = texts[chunk_start:chunk_start + CHECKPOINT_ROWS]
+                results = analyze_rows(chunk, self.parser, client=job_id, progress=progress, throttle=self.throttle)
+                self._checkpoint(job_id, status, results)
+            if not texts:
+                self._checkpoint(job_id, status, [])
+            # CSV is the stored format; XLSX is produced on first download
+            os.replace(os.path.join(_job_dir(job_id), 'partial.csv'), os.path.join(_job_dir(job_id), 'result.csv'))
+            self._update(status, state='done', eta_seconds=0, finished_at=time.time())
+            print(f"✅ Excel job {job_id} finished: {len(texts)} rows")
+        except JobReleased:
+            # release() already handed the job back
+            return
+        except Exception as e:
+            print(f"❌ Excel job {job_id} failed: {e}")
+            self._update(status, state='failed', error=str(e), finished_at=time.time())
+        self._save(job_id, status)
+
+    @staticmethod
+    def result_path(job_id, fmt='xlsx'):
+        """Path of the finished result in the requested format (xlsx or csv)
+
+        Raises ValueError for an unknown format and JobNotReady until the job is done.
+        """
+        if fmt not in RESULT_FORMATS:
+            raise ValueError(f'Unsupported format: {fmt}')
+        status = read_status(job_id)
+        if status['state'] != 'done':
+            raise JobNotReady(f"Job {job_id} is {status['state']}")
+        csv_path = os.path.join(_job_dir(job_id), 'result.csv')
+        if fmt == 'csv':
+            return csv_path
+        xlsx_path = os.path.join(_job_dir(job_id), 'result.xlsx')
+        if not os.path.exists(xlsx_path):
+            # Concurrent first downloads each write their own file; the last complete one wins
+            tmp = f'{xlsx_path}.{uuid.uuid4().hex}.xlsx'
+            try:
+                pd.read_csv(csv_path, keep_default_na=False).to_excel(tmp, index=False)
+                os.replace(tmp, xlsx_path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        return xlsx_path
@@ -0,0 +1,260 @@
+import os
+import sys
+import time
+import uuid
+import shutil
+import argparse
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from units import to_canonical
+from list_updates import reported_doc
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow is optional; saving a list then only skips the export
+    pa = pq = ds = None
+
+# ----------------------------
+# 1. Flattened schema
+# ----------------------------
+# One row per item with its list's fields repeated. Files are partitioned by day
+# (processing/lists_parquet/date=YYYY-MM-DD/part-*.parquet) and every save appends
+# a new small part; compact() merges a day's parts into one file. A patched list is
+# appended again with its new version, and readers keep each list's newest version.
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join('processing', 'lists_parquet'))
+# The store is written only on the instance holding the reporting lease. Unless EXPORT_DIR is
+# storage every instance mounts (and that outlives restarts), exports are read from MongoDB.
+EXPORT_SHARED = os.getenv('EXPORT_SHARED', 'false').lower() in ('1', 'true', 'yes')
+
+LIST_FIELDS = ['billNumber', 'customerName', 'favoriteShop', 'created_at']
+ITEM_FIELDS = ['itemName', 'brand', 'quantity', 'unit', 'priority', 'details', 'description']
+
+SCHEMA = pa.schema(
+    [(field, pa.string()) for field in LIST_FIELDS]
+    + [('item_index', pa.int32())]
+    + [(field, pa.string()) for field in ITEM_FIELDS]
+    + [('canonicalQuantity', pa.float64()), ('canonicalUnit', pa.string())]
+    + [('listId', pa.string()), ('version', pa.int32())]
+) if pa is not None else None
+
+_write_lock = threading.Lock()
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def flatten_list(shopping_list: dict) -> list:
+    """Rows for one saved list; a list without (well-formed) items still gets one row"""
+    base = {field: _text(shopping_list.get(field)) for field in LIST_FIELDS}
+    # Parts written before lists carried these read back as nulls
+    list_id = shopping_list.get('_id')
+    base['listId'] = str(list_id) if list_id is not None else None
+    base['version'] = shopping_list.get('version', 0)
+    items = [(index, item) for index, item in enumerate(shopping_list.get('items') or [])
+             if isinstance(item, dict)]
+    rows = []
+    for index, item in items or [(0, {})]:
+        row = dict(base, item_index=index)
+        for field in ITEM_FIELDS:
+            row[field] = _text(item.get(field))
+        quantity, unit = to_canonical(item.get('quantity'), item.get('unit'))
+        row['canonicalQuantity'] = quantity
+        row['canonicalUnit'] = unit
+        rows.append(row)
+    return rows
+
+
+def _day(shopping_list):
+    return _text(shopping_list.get('created_at'))[:10] or time.strftime('%Y-%m-%d')
+
+
+# ----------------------------
+# 2. Write path
+# ----------------------------
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError('pyarrow is not installed; run pip install pyarrow')
+
+
+def append_lists(lists, export_dir: str = None) -> int:
+    """Append saved lists as new part files, one per day touched; returns rows written"""
+    _require_pyarrow()
+    export_dir = export_dir or EXPORT_DIR
+    by_day = defaultdict(list)
+    for shopping_list in lists:
+        by_day[_day(shopping_list)].extend(flatten_list(shopping_list))
+
+    written = 0
+    for day, rows in by_day.items():
+        partition = os.path.join(export_dir, f'date={day}')
+        os.makedirs(partition, exist_ok=True)
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        path = os.path.join(partition, f'part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet')
+        # Write next to the target and rename so readers never pick up a partial file;
+        # the lock keeps the new part out of a compaction that is swapping files
+        pq.write_table(table, path + '.tmp')
+        with _write_lock:
+            os.replace(path + '.tmp', path)
+        written += len(rows)
+    return written
+
+
+def compact(day: str, export_dir: str = None) -> int:
+    """Merge a day's part files into one; returns the number of parts merged"""
+    _require_pyarrow()
+    partition = os.path.join(export_dir or EXPORT_DIR, f'date={day}')
+    if not os.path.isdir(partition):
+        return 0
+    with _write_lock:
+        parts = sorted(f for f in os.listdir(partition) if f.endswith('.parquet'))
+        if len(parts) <= 1:
+            return 0
+        table = pa.concat_tables(pq.read_table(os.path.join(partition, p), schema=SCHEMA) for p in parts)
+        path = os.path.join(partition, f'compacted-{int(time.time() * 1000)}.parquet')
+        pq.write_table(table, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        for part in parts:
+            os.remove(os.path.join(partition, part))
+    return len(parts)
+
+
+def rebuild_from_db(db, export_dir: str = None, batch_size: int = 5000) -> int:
+    """Re-export every list in db.lists, replacing the store
+
+    The new store is written to a sibling directory and swapped in, so the old rows are
+    never appended to and readers see either store whole. Parts the reporting worker
+    appends while it runs are dropped with the old store; run it with the worker stopped.
+    """
+    _require_pyarrow()
+    export_dir = os.path.abspath(export_dir or EXPORT_DIR)
+    building = f'{export_dir}.rebuild-{uuid.uuid4().hex[:8]}'
+    try:
+        written = 0
+        batch = []
+        for shopping_list in db.lists.find().batch_size(batch_size):
+            # Patches still pending are appended by the reporting worker on top of this
+            batch.append(reported_doc(shopping_list))
+            if len(batch) >= batch_size:
+                written += append_lists(batch, building)
+                batch = []
+        if batch:
+            written += append_lists(batch, building)
+        for day in days(building):
+            compact(day, building)
+        os.makedirs(building, exist_ok=True)
+
+        retired = f'{export_dir}.old-{uuid.uuid4().hex[:8]}'
+        with _write_lock:
+            if os.path.isdir(export_dir):
+                os.replace(export_dir, retired)
+            os.replace(building, export_dir)
+        shutil.rmtree(retired, ignore_errors=True)
+    finally:
+        shutil.rmtree(building, ignore_errors=True)
+    return written
+
+
+# ----------------------------
+# 3. Read path
+# ----------------------------
+def days(export_dir: str = None) -> list:
+    export_dir = export_dir or EXPORT_DIR
+    if not os.path.isdir(export_dir):
+        return []
+    return sorted(name[5:] for name in os.listdir(export_dir) if name.startswith('date='))
+
+
+def read_items(start: str = '', end: str = '', shop: str = '', export_dir: str = None) -> pd.DataFrame:
+    """Item rows for days in [start, end]; only matching partitions are opened"""
+    _require_pyarrow()
+    export_dir = export_dir or EXPORT_DIR
+    selected = [d for d in days(export_dir) if (not start or d >= start) and (not end or d <= end)]
+    if not selected:
+        return pd.DataFrame(columns=SCHEMA.names)
+
+    paths = []
+    for day in selected:
+        partition = os.path.join(export_dir, f'date={day}')
+        paths.extend(os.path.join(partition, f) for f in sorted(os.listdir(partition)) if f.endswith('.parquet'))
+    if not paths:
+        return pd.DataFrame(columns=SCHEMA.names)
+    df = ds.dataset(paths, schema=SCHEMA, format='parquet').to_table().to_pandas()
+    # Earlier versions of patched lists; the shop is matched after this, as a patch can change it
+    newest = df.groupby('listId')['version'].transform('max')
+    df = df[df['listId'].isna() | (df['version'] == newest)]
+    if shop:
+        df = df[df['favoriteShop'] == shop]
+    return df.reset_index(drop=True)
+
+
+def read_items_from_db(db, start: str = '', end: str = '', shop: str = '') -> pd.DataFrame:
+    """The rows read_items returns, flattened from db.lists instead of the Parquet store"""
+    query = {}
+    if start or end:
+        query['created_at'] = {}
+    if start:
+        query['created_at']['$gte'] = start
+    if end:
+        # created_at is 'YYYY-MM-DD HH:MM:SS', so the end day runs up to the next one
+        next_day = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1)
+        query['created_at']['$lt'] = next_day.strftime('%Y-%m-%d')
+    if shop:
+        query['favoriteShop'] = shop
+    fields = {'pending_changes': 0, 'reported_version': 0}
+    rows = [row for shopping_list in db.lists.find(query, fields).sort('created_at', 1)
+            for row in flatten_list(shopping_list)]
+    return pd.DataFrame(rows, columns=SCHEMA.names if SCHEMA is not None else None)
+
+
+def export_excel(output_file, start: str = '', end: str = '', shop: str = '', export_dir: str = None,
+                 db=None) -> int:
+    """Write an Excel workbook from the Parquet store, or from db.lists when db is given; returns the row count"""
+    df = read_items_from_db(db, start, end, shop) if db is not None else read_items(start, end, shop, export_dir)
+    df.to_excel(output_file, index=False)
+    return len(df)
+
+
+# ----------------------------
+# 4. CLI
+# ----------------------------
+def main(argv=None):
+    cli = argparse.ArgumentParser(description='Parquet export of saved shopping lists')
+    cli.add_argument('--dir', default=EXPORT_DIR, help='export directory')
+    commands = cli.add_subparsers(dest='command', required=True)
+
+    excel = commands.add_parser('excel', help='write an Excel file from the Parquet store')
+    excel.add_argument('output')
+    excel.add_argument('--from', dest='start', default='')
+    excel.add_argument('--to', dest='end', default='')
+    excel.add_argument('--shop', default='')
+
+    compact_cmd = commands.add_parser('compact', help='merge part files (all days by default)')
+    compact_cmd.add_argument('days', nargs='*')
+
+    commands.add_parser('rebuild', help='export every list from MongoDB (MONGODB_URI)')
+
+    args = cli.parse_args(argv)
+    if args.command == 'excel':
+        rows = export_excel(args.output, args.start, args.end, args.shop, args.dir)
+        print(f"✅ Wrote {rows} rows to {args.output}")
+    elif args.command == 'compact':
+        for day in args.days or days(args.dir):
+            merged = compact(day, args.dir)
+            if merged:
+                print(f"✅ {day}: merged {merged} parts")
+    elif args.command == 'rebuild':
+        from pymongo import MongoClient
+        from storage import MONGODB_DATABASE
+        db = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017'))[MONGODB_DATABASE]
+        print(f"✅ Exported {rebuild_from_db(db, args.dir)} rows")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import re
+import threading
+from collections import deque, namedtuple
+
+from catalog import load_catalog
+
+# ----------------------------
+# 1. Word-level Aho–Corasick automaton
+# ----------------------------
+# Patterns and text are both read as lower-cased word sequences, so a match can
+# only start and end on a word boundary ("amul" never fires inside "camulet")
+# and one pass over the utterance finds every entry of every length.
+WORD_PATTERN = re.compile(r"[^\W_]+|&")
+
+Match = namedtuple('Match', ['start', 'end', 'kind', 'name'])
+
+
+def words_of(text):
+    # "&" reads as "and", so "Head & Shoulders" matches "Head and Shoulders"
+    return [('and' if m.group(0) == '&' else m.group(0).lower(), m.start(), m.end())
+            for m in WORD_PATTERN.finditer(text)]
+
+
+class Gazetteer:
+    """Finds catalog brands and products anywhere in an utterance in time linear in its length"""
+
+    def __init__(self, entries=()):
+        self.goto = [{}]          # state -> {word: next state}
+        self.fail = [0]
+        self.outputs = [[]]       # state -> [(length in words, kind, name)] of patterns ending here
+        self.dict_link = [0]      # nearest fail-chain state with outputs (0 = none)
+        self.size = 0
+        for name, kind in entries:
+            self.add(name, kind)
+        self.build()
+
+    def add(self, name, kind):
+        words = [w for w, _, _ in words_of(name)]
+        if not words:
+            return
+        state = 0
+        for word in words:
+            following = self.goto[state].get(word)
+            if following is None:
+                following = len(self.goto)
+                self.goto[state][word] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.dict_link.append(0)
+            state = following
+        entry = (len(words), kind, ' '.join(name.split()))
+        if entry not in self.outputs[state]:
+            self.outputs[state].append(entry)
+            self.size += 1
+
+    def build(self):
+        """Breadth-first fail links; called once after all add()s"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[following] = target if target != following else 0
+                target = self.fail[following]
+                self.dict_link[following] = target if self.outputs[target] else self.dict_link[target]
+
+    def scan(self, text):
+        """Every (start, end, kind, name) occurrence, overlaps included"""
+        words = words_of(text)
+        goto, fail, outputs, dict_link = self.goto, self.fail, self.outputs, self.dict_link
+        found = []
+        state = 0
+        for index, (word, _, end) in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            hit = state if outputs[state] else dict_link[state]
+            while hit:
+                for length, kind, name in outputs[hit]:
+                    found.append(Match(words[index - length + 1][1], end, kind, name))
+                hit = dict_link[hit]
+        return found
+
+    def find(self, text, kind=None):
+        """Leftmost-longest, non-overlapping matches (per kind), in text order"""
+        chosen = []
+        taken = {}
+        for match in sorted(self.scan(text), key=lambda m: (m.start, m.start - m.end)):
+            if kind is not None and match.kind != kind:
+                continue
+            if match.start >= taken.get(match.kind, 0):
+                chosen.append(match)
+                taken[match.kind] = match.end
+        return chosen
+
+
+# ----------------------------
+# 2. Shared catalog gazetteer
+# ----------------------------
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Brands and products from catalog.py, built once per process"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                catalog = load_catalog()
+                _gazetteer = Gazetteer(
+                    [(name, 'brand') for name in catalog['brand']]
+                    + [(name, 'product') for name in catalog['product']]
+                )
+    return _gazetteer
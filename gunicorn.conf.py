@@ -0,0 +1,74 @@
+"""
+Gunicorn settings for server:app, loaded automatically from the working directory.
+
+GUNICORN_PROFILE picks the worker model:
+  gthread (default)  threads per worker, good for the I/O-bound LLM calls
+  gevent             greenlets, most concurrent LLM calls per worker
+                     (needs gevent: pip install -r requirements-gevent.txt)
+  sync               one request per worker, for CPU-bound local parsing only
+WEB_CONCURRENCY, GUNICORN_THREADS and GUNICORN_CONNECTIONS override the sizes.
+Measured throughput per profile: python benchmarks/bench_gunicorn_profiles.py
+"""
+import os
+import multiprocessing
+
+profile = os.getenv('GUNICORN_PROFILE', 'gthread')
+cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '3000')}"
+
+# Import the app (and the spaCy model, regexes, dictionaries) once in the master
+preload_app = True
+
+if profile == 'gevent':
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        # Refuse here rather than let every worker die at boot
+        raise RuntimeError('GUNICORN_PROFILE=gevent needs gevent: pip install -r requirements-gevent.txt') from None
+    worker_class = 'gevent'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpus))
+    worker_connections = int(os.getenv('GUNICORN_CONNECTIONS', 200))
+elif profile == 'sync':
+    worker_class = 'sync'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpus * 2 + 1))
+else:
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpus))
+    threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+# LLM calls can take tens of seconds; the Azure client itself times out at 60s
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 90))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth, staggered to avoid restarts in lockstep
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # RATE_LIMIT_BACKEND=socket: the master holds the buckets, so they are shared by every
+    # worker and survive worker recycling
+    if os.getenv('RATE_LIMIT_BACKEND') == 'socket':
+        from rate_limit import BucketServer, RATE_LIMIT_SOCKET
+        BucketServer(RATE_LIMIT_SOCKET).start()
+        server.log.info(f"Rate limit buckets served on {RATE_LIMIT_SOCKET}")
+
+
+def post_worker_init(worker):
+    # Sockets and connection pools opened in the master must not be shared. This runs
+    # after the worker is set up, so under gevent the new clients use patched sockets.
+    from app import reinit_after_fork
+    reinit_after_fork()
+    worker.log.info(f"Worker {worker.pid}: MongoDB and Azure OpenAI clients re-created")
+
+
+def worker_exit(server, worker):
+    # A max_requests recycle or restart: hand unfinished Excel jobs to the other workers,
+    # which continue them after their last saved chunk
+    from app import excel_jobs
+    excel_jobs.release()
@@ -0,0 +1,165 @@
+import os
+import time
+import shutil
+import threading
+
+# ----------------------------
+# 1. Settings
+# ----------------------------
+# Probes run on background threads and cache their last result; /health/* only
+# reads that cache, so load balancer polling never reaches the database or the LLM.
+HEALTH_INTERVAL = float(os.getenv('HEALTH_INTERVAL', 10))
+HEALTH_LLM_INTERVAL = float(os.getenv('HEALTH_LLM_INTERVAL', 60))
+# models: list deployments (no tokens); chat: 1-token completion; off: skip the LLM probe
+HEALTH_LLM_PROBE = os.getenv('HEALTH_LLM_PROBE', 'models')
+HEALTH_MIN_FREE_MB = float(os.getenv('HEALTH_MIN_FREE_MB', 500))
+HEALTH_DISK_PATH = os.getenv('HEALTH_DISK_PATH', 'processing')
+# How long a starting worker waits for the first result of its critical probes
+HEALTH_STARTUP_TIMEOUT = float(os.getenv('HEALTH_STARTUP_TIMEOUT', 5))
+
+
+class ProbeFailed(Exception):
+    pass
+
+
+# ----------------------------
+# 2. Probes
+# ----------------------------
+class Probe:
+    """One dependency check, re-run every `interval` seconds on its own thread"""
+
+    def __init__(self, name, check, interval=HEALTH_INTERVAL, critical=True):
+        self.name = name
+        self.check = check              # raises on failure; may return details for the report
+        self.interval = interval
+        self.critical = critical        # a failing critical probe makes the worker not ready
+        self.result = None
+
+    def run_once(self):
+        start = time.perf_counter()
+        try:
+            details = self.check()
+            ok, error = True, None
+        except Exception as e:
+            details, ok, error = None, False, f'{type(e).__name__}: {e}'
+        failures = 0 if ok else (self.result or {}).get('consecutive_failures', 0) + 1
+        result = {
+            'ok': ok,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+            'checked_at': time.time(),
+            'consecutive_failures': failures,
+        }
+        if details:
+            result['details'] = details
+        if error:
+            result['error'] = error
+            if failures == 1:
+                print(f"❌ Health probe {self.name} failed: {error}")
+        elif self.result and not self.result['ok']:
+            print(f"✅ Health probe {self.name} recovered")
+        # Swapped whole, so readers never see a half-written result
+        self.result = result
+        return result
+
+    def status(self, now):
+        if self.result is None:
+            return {'ok': False, 'starting': True, 'error': 'not checked yet', 'critical': self.critical}
+        status = dict(self.result, critical=self.critical, age_s=round(now - self.result['checked_at'], 1))
+        # A probe stuck in a hung call stops refreshing; treat its old answer as a failure
+        if status['ok'] and status['age_s'] > 3 * self.interval + 5:
+            status.update(ok=False, error='stale: probe has not completed recently')
+        return status
+
+
+def storage_probe(get_storage):
+    def check():
+        get_storage().ping()
+    return check
+
+
+def llm_probe(get_client, deployment, mode=HEALTH_LLM_PROBE):
+    def check():
+        client = get_client()
+        if mode == 'chat':
+            client.chat.completions.create(
+                model=deployment, messages=[{'role': 'user', 'content': 'ping'}], max_tokens=1)
+        else:
+            client.models.list()
+    return check
+
+
+def disk_probe(path=HEALTH_DISK_PATH, min_free_mb=HEALTH_MIN_FREE_MB):
+    def check():
+        os.makedirs(path, exist_ok=True)
+        free_mb = shutil.disk_usage(path).free / (1024 * 1024)
+        if free_mb < min_free_mb:
+            raise ProbeFailed(f'{free_mb:.0f} MB free in {path}, need {min_free_mb:.0f} MB')
+        if not os.access(path, os.W_OK):
+            raise ProbeFailed(f'{path} is not writable')
+        return {'free_mb': round(free_mb)}
+    return check
+
+
+# ----------------------------
+# 3. Monitor
+# ----------------------------
+class HealthMonitor:
+    def __init__(self, probes):
+        self.probes = {probe.name: probe for probe in probes}
+        self.started_at = time.time()
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _loop(self, probe, checked, stop):
+        while not stop.is_set():
+            probe.run_once()
+            checked.set()
+            stop.wait(probe.interval)
+
+    def ensure_started(self, timeout=HEALTH_STARTUP_TIMEOUT):
+        """Start the probe threads in this process (again after a fork); cheap to call per request
+
+        The first call waits up to `timeout` seconds for each critical probe's first
+        result, so a fresh worker answers readiness from a real check.
+        """
+        if self._pid == os.getpid():
+            return self
+        with self._lock:
+            if self._pid != os.getpid():
+                self._stop = stop = threading.Event()
+                first_checks = []
+                for probe in self.probes.values():
+                    probe.result = None
+                    checked = threading.Event()
+                    if probe.critical:
+                        first_checks.append(checked)
+                    threading.Thread(target=self._loop, args=(probe, checked, stop), name=f'health-{probe.name}',
+                                     daemon=True).start()
+                deadline = time.time() + timeout
+                for checked in first_checks:
+                    checked.wait(max(0.0, deadline - time.time()))
+                self._pid = os.getpid()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def liveness(self):
+        return {'status': 'alive', 'pid': os.getpid(), 'uptime_s': round(time.time() - self.started_at, 1)}
+
+    def readiness(self):
+        """(ready, report) from the cached probe results"""
+        now = time.time()
+        checks = {name: probe.status(now) for name, probe in self.probes.items()}
+        # A probe still running its first check (slower than the startup wait) does not fail readiness
+        ready = all(check['ok'] or check.get('starting') for check in checks.values() if check['critical'])
+        if not ready:
+            status = 'unavailable'
+        elif any(check.get('starting') for check in checks.values()):
+            status = 'starting'
+        elif any(not check['ok'] for check in checks.values()):
+            status = 'degraded'
+        else:
+            status = 'ok'
+        return ready, {'status': status, 'pid': os.getpid(), 'checks': checks}
@@ -0,0 +1,60 @@
+import os
+
+from list_updates import prepare_new_list
+
+# ----------------------------
+# 1. Idempotency keys
+# ----------------------------
+# Clients queue lists while offline and retry uploads; each list carries a key
+# chosen once on the device, and a unique index in the store (storage.py) makes
+# a retried insert a no-op.
+SYNC_MAX_LISTS = int(os.getenv('SYNC_MAX_LISTS', 100))
+MAX_KEY_LENGTH = 128
+
+
+def _valid_key(key):
+    return isinstance(key, str) and 0 < len(key) <= MAX_KEY_LENGTH
+
+
+def _summary(doc, status):
+    return {
+        'idempotencyKey': doc.get('idempotencyKey'),
+        'id': str(doc['_id']),
+        'billNumber': doc.get('billNumber'),
+        'version': doc.get('version', 0),
+        'itemIds': [item.get('itemId') for item in doc.get('items') or [] if isinstance(item, dict)],
+        'status': status,
+    }
+
+
+# ----------------------------
+# 2. Batched, deduplicated inserts
+# ----------------------------
+def save_lists(storage, entries, created_at):
+    """Insert queued lists once each; returns one summary per entry, in order
+
+    status is 'created' for new lists and 'duplicate' when the key was already
+    stored (an earlier attempt got through). Raises ValueError for bad input.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('lists must be a non-empty array')
+    if len(entries) > SYNC_MAX_LISTS:
+        raise ValueError(f'at most {SYNC_MAX_LISTS} lists per request')
+    for entry in entries:
+        if not isinstance(entry, dict) or not _valid_key(entry.get('idempotencyKey')):
+            raise ValueError(f'every list needs an idempotencyKey of 1-{MAX_KEY_LENGTH} characters')
+
+    docs = []
+    for entry in entries:
+        doc = {key: value for key, value in entry.items() if key not in ('_id', 'version')}
+        doc['created_at'] = created_at
+        docs.append(prepare_new_list(doc))
+
+    # One batch; a duplicate key does not stop the rest of it
+    duplicates = storage.insert_new_lists(docs)
+    stored = storage.lists_by_key([docs[index]['idempotencyKey'] for index in duplicates]) if duplicates else {}
+    return [
+        _summary(stored[doc['idempotencyKey']], 'duplicate') if index in duplicates
+        else _summary(doc, 'created')
+        for index, doc in enumerate(docs)
+    ]
@@ -0,0 +1,204 @@
+import uuid
+from datetime import datetime
+
+import pytz
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# ----------------------------
+# 1. Item ids and versions
+# ----------------------------
+# Saved lists carry a version (1 on insert) and every item an itemId, so a client
+# can send just the changed items and the server can refuse edits made against
+# a list someone else changed in the meantime.
+ITEM_FIELDS = ('itemName', 'quantity', 'unit', 'brand', 'priority', 'description', 'details')
+LIST_FIELDS = ('customerName', 'favoriteShop')
+IST = pytz.timezone('Asia/Kolkata')
+# What the reports, rollups and export read from a list; a patch keeps both sides of the change
+REPORTED_FIELDS = ('billNumber', 'customerName', 'favoriteShop', 'created_at', 'items', 'version')
+
+
+class ListNotFound(KeyError):
+    pass
+
+
+class VersionConflict(Exception):
+    def __init__(self, current):
+        super().__init__(f'List was changed by someone else (now at version {current})')
+        self.current = current
+
+
+def new_item_id():
+    return uuid.uuid4().hex[:12]
+
+
+def prepare_new_list(data):
+    """Stamp a list about to be inserted: version 1 and an itemId on every item"""
+    data['version'] = 1
+    for item in data.get('items') or []:
+        if isinstance(item, dict):
+            item.setdefault('itemId', new_item_id())
+    return data
+
+
+def _clean_item(item):
+    if not isinstance(item, dict):
+        raise ValueError('items must be objects')
+    cleaned = {field: str(item[field]) for field in ITEM_FIELDS if item.get(field) is not None}
+    cleaned['itemId'] = new_item_id()
+    return cleaned
+
+
+def _clean_fields(fields, allowed):
+    if not isinstance(fields, dict):
+        raise ValueError('fields must be an object')
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ValueError(f"cannot change {', '.join(sorted(unknown))}")
+    return {field: str(value) for field, value in fields.items()}
+
+
+# ----------------------------
+# 2. Patches
+# ----------------------------
+def parse_patch(patch):
+    """Validate a PATCH body:
+
+    {"version": 3,
+     "set": {"favoriteShop": "..."},
+     "add": [{item}, ...],
+     "remove": ["<itemId>" or index, ...],
+     "update": [{"itemId": "..." or "index": 2, "fields": {"quantity": "2"}}, ...]}
+    """
+    if not isinstance(patch, dict):
+        raise ValueError('patch must be a JSON object')
+    version = patch.get('version')
+    if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+        raise ValueError('version (the version the change was made against) is required')
+    parsed = {
+        'version': version,
+        'set': _clean_fields(patch.get('set') or {}, LIST_FIELDS),
+        'add': [_clean_item(item) for item in patch.get('add') or []],
+        'remove': list(patch.get('remove') or []),
+        'update': [],
+    }
+    for change in patch.get('update') or []:
+        if not isinstance(change, dict) or not ('itemId' in change or 'index' in change):
+            raise ValueError('each update needs an itemId (or index) and fields')
+        parsed['update'].append((change.get('itemId', change.get('index')),
+                                 _clean_fields(change.get('fields') or {}, ITEM_FIELDS)))
+    if not any(parsed[key] for key in ('set', 'add', 'remove', 'update')):
+        raise ValueError('patch has no changes')
+    return parsed
+
+
+def _position(items, ref):
+    """Index of an item by itemId, or by index for lists saved before items had ids"""
+    if isinstance(ref, int) and not isinstance(ref, bool):
+        if 0 <= ref < len(items):
+            return ref
+    else:
+        for index, item in enumerate(items):
+            if isinstance(item, dict) and item.get('itemId') == ref:
+                return index
+    raise ValueError(f'no item {ref!r} in this list')
+
+
+def _rebuilt_items(items, added, removed, changed):
+    new_items = [dict(item) for item in items]
+    for index, fields in changed:
+        new_items[index].update(fields)
+    return [item for index, item in enumerate(new_items) if index not in removed] + added
+
+
+def build_update(items, parsed):
+    """MongoDB update document for a patch against `items` as read at parsed['version']
+
+    The update is only applied if the version is unchanged, so positions resolved
+    here are still valid when it lands. Patches touching items in one way use
+    $set on items.N.field, $push or $pull; mixed ones set the rebuilt array.
+    """
+    now = datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S')
+    update = {'$set': dict(parsed['set'], updated_at=now), '$inc': {'version': 1}}
+    removed = {_position(items, ref) for ref in parsed['remove']}
+    changed = [(_position(items, ref), fields) for ref, fields in parsed['update']]
+    kinds = [bool(parsed['add']), bool(removed), bool(changed)]
+
+    if sum(kinds) > 1 or (removed and any(not isinstance(items[i].get('itemId'), str) for i in removed)):
+        update['$set']['items'] = _rebuilt_items(items, parsed['add'], removed, changed)
+    elif parsed['add']:
+        update['$push'] = {'items': {'$each': parsed['add']}}
+    elif removed:
+        update['$pull'] = {'items': {'itemId': {'$in': [items[i]['itemId'] for i in removed]}}}
+    else:
+        for index, fields in changed:
+            for field, value in fields.items():
+                update['$set'][f'items.{index}.{field}'] = value
+    return update
+
+
+def patched_list(doc, parsed):
+    """The same patch applied in Python, for stores without update operators; returns the new document"""
+    items = doc.get('items') or []
+    removed = {_position(items, ref) for ref in parsed['remove']}
+    changed = [(_position(items, ref), fields) for ref, fields in parsed['update']]
+    patched = dict(doc, **parsed['set'])
+    patched['items'] = _rebuilt_items(items, parsed['add'], removed, changed)
+    patched['updated_at'] = datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S')
+    patched['version'] = parsed['version'] + 1
+    return patched
+
+
+def _snapshot(doc):
+    return {field: doc[field] for field in REPORTED_FIELDS if field in doc}
+
+
+def reported_doc(doc):
+    """The list as the reports count it: before the patches the reporting worker has not applied yet
+
+    Lists without reported_version were counted before reported_version existed, at the
+    version the first pending patch was made against.
+    """
+    reported = doc.get('reported_version')
+    for change in doc.get('pending_changes') or []:
+        if reported is None or change['to_version'] > reported:
+            return dict(change['before'], _id=doc['_id'])
+    return doc
+
+
+def _version_filter(version):
+    # Lists saved before versioning have no version field and count as version 0
+    return {'version': version} if version else {'version': {'$in': [0, None]}}
+
+
+def apply_patch(lists, list_id, patch):
+    """Apply a patch atomically; returns {'version': new version, 'added': [itemIds]}
+
+    The same update pushes the list before and after the patch onto pending_changes,
+    where the reporting worker picks it up to correct the reports, rollups and export.
+    """
+    try:
+        object_id = ObjectId(list_id)
+    except (InvalidId, TypeError):
+        raise ListNotFound(list_id)
+    parsed = parse_patch(patch)
+
+    current = lists.find_one({'_id': object_id}, {'pending_changes': 0})
+    if current is None:
+        raise ListNotFound(list_id)
+    if current.get('version', 0) != parsed['version']:
+        raise VersionConflict(current.get('version', 0))
+
+    update = build_update(current.get('items') or [], parsed)
+    update.setdefault('$push', {})['pending_changes'] = {
+        'from_version': parsed['version'], 'to_version': parsed['version'] + 1,
+        'before': _snapshot(current), 'after': _snapshot(patched_list(current, parsed)),
+    }
+    result = lists.update_one(dict({'_id': object_id}, **_version_filter(parsed['version'])), update)
+    if result.matched_count == 0:
+        # Lost the race between the read and the write
+        latest = lists.find_one({'_id': object_id}, {'version': 1})
+        if latest is None:
+            raise ListNotFound(list_id)
+        raise VersionConflict(latest.get('version', 0))
+    return {'version': parsed['version'] + 1, 'added': [item['itemId'] for item in parsed['add']]}
@@ -0,0 +1,254 @@
+import re
+import json
+import math
+import threading
+from collections import Counter
+
+from units import parse_quantity
+
+# ----------------------------
+# 1. Repairs for common LLM JSON defects
+# ----------------------------
+FENCE_PATTERN = re.compile(r'```(?:json|JSON)?\s*(.*?)```', re.DOTALL)
+TRAILING_COMMA = re.compile(r',\s*([}\]])')
+UNQUOTED_KEY = re.compile(r'([{,]\s*)([A-Za-z_][A-Za-z0-9_]*)\s*:')
+SINGLE_QUOTED = re.compile(r"'((?:[^'\\]|\\.)*)'")
+PYTHON_LITERALS = re.compile(r'\b(True|False|None)\b')
+SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+class DecodeError(ValueError):
+    pass
+
+
+class DecodeStats:
+    """Counts how often each repair was needed, per process (shared by its threads, not by other workers)"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, repairs):
+        with self._lock:
+            self.counts['decoded'] += 1
+            if repairs:
+                self.counts['repaired'] += 1
+            self.counts.update(repairs)
+
+    def failed(self):
+        with self._lock:
+            self.counts['failed'] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+decode_stats = DecodeStats()
+
+
+def _extract_block(text):
+    """Slice from the first '{' or '[' to its matching bracket, ignoring prose around it"""
+    start = min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+    if start < 0:
+        return None, False
+    stack = []
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]' and stack:
+            stack.pop()
+            if not stack:
+                return text[start:i + 1], False
+    # Truncated output (max_tokens hit): close whatever is still open
+    tail = text[start:].rstrip().rstrip(',')
+    if in_string:
+        tail += '"'
+    return tail + ''.join(reversed(stack)), True
+
+
+def loads_tolerant(raw: str):
+    """json.loads with repairs; returns (value, list of repairs applied)"""
+    repairs = []
+    text = (raw or '').strip()
+    try:
+        return json.loads(text), repairs
+    except ValueError:
+        pass
+
+    fenced = FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+        repairs.append('fence')
+
+    block, truncated = _extract_block(text)
+    if block is None:
+        raise DecodeError('no JSON object in output')
+    if block != text:
+        repairs.append('truncated' if truncated else 'surrounding_text')
+    text = block
+
+    candidates = [
+        ('smart_quotes', lambda t: t.translate(SMART_QUOTES)),
+        ('trailing_comma', lambda t: TRAILING_COMMA.sub(r'\1', t)),
+        ('python_literal', lambda t: PYTHON_LITERALS.sub(lambda m: _LITERALS[m.group(1)], t)),
+        ('single_quotes', lambda t: SINGLE_QUOTED.sub(lambda m: json.dumps(m.group(1)), t) if '"' not in t else t),
+        ('unquoted_key', lambda t: UNQUOTED_KEY.sub(r'\1"\2":', t)),
+    ]
+    for name, repair in [(None, None)] + candidates:
+        if repair is not None:
+            fixed = repair(text)
+            if fixed == text:
+                continue
+            text = fixed
+            repairs.append(name)
+        try:
+            return json.loads(text), repairs
+        except ValueError:
+            continue
+    raise DecodeError('could not repair JSON output')
+
+
+# ----------------------------
+# 2. Compiled item schema
+# ----------------------------
+def _as_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(v) for v in value if v is not None)
+    return str(value).strip()
+
+
+def _as_quantity(value):
+    """Numeric quantity as a plain string ('2', '0.5'); None when not numeric"""
+    if value is None or value == '':
+        return ''
+    number = parse_quantity(value)
+    # "NaN", "Infinity" and 1e999 parse as floats but are no quantity
+    if number is None or not math.isfinite(number):
+        return None
+    return str(int(number)) if number == int(number) else str(number)
+
+
+PRIORITY_ALIASES = {'URGENT': 'HIGH', 'IMPORTANT': 'HIGH', 'NORMAL': 'MEDIUM', 'REGULAR': 'MEDIUM'}
+
+
+def _as_priority(value):
+    priority = _as_text(value).upper()
+    if not priority:
+        return 'MEDIUM'
+    priority = PRIORITY_ALIASES.get(priority, priority)
+    return priority if priority in ('HIGH', 'MEDIUM', 'LOW') else None
+
+
+class ItemSchema:
+    """Field coercers compiled once; validate() fixes types and reports what it changed
+
+    Keys outside the schema are dropped and reported as unknown_<key>.
+    """
+
+    def __init__(self, fields):
+        # field -> (coerce, default); coerce returns None when the value is unusable
+        self.fields = fields
+        self.aliases = {key.lower(): key for key in fields}
+        self.aliases.update({'item': 'itemName', 'item_name': 'itemName', 'name': 'itemName', 'qty': 'quantity'})
+
+    def validate(self, obj):
+        if not isinstance(obj, dict):
+            raise DecodeError('item is not an object')
+        coerced = []
+        # Accept case/alias variations of field names ("ItemName", "qty")
+        normalized = {}
+        for key, value in obj.items():
+            normalized[self.aliases.get(str(key).lower(), key)] = value
+
+        result = {}
+        for field, (coerce, default) in self.fields.items():
+            if field not in normalized:
+                result[field] = default
+                continue
+            value = normalized[field]
+            clean = coerce(value)
+            if clean is None:
+                clean = default
+                coerced.append(f'invalid_{field}')
+            elif clean != value:
+                coerced.append(f'coerced_{field}')
+            result[field] = clean
+        coerced.extend(f'unknown_{key}' for key in normalized if key not in self.fields)
+        return result, coerced
+
+
+ITEM_SCHEMA = ItemSchema({
+    'itemName': (_as_text, ''),
+    'quantity': (_as_quantity, ''),
+    'unit': (_as_text, ''),
+    'brand': (_as_text, ''),
+    'priority': (_as_priority, 'MEDIUM'),
+    'details': (_as_text, ''),
+})
+# List entries also name the words of the transcript they came from
+LIST_ITEM_SCHEMA = ItemSchema(dict(ITEM_SCHEMA.fields, source=(_as_text, '')))
+# Coercions that only normalize formatting are not worth counting as repairs
+_QUIET = {'coerced_unit', 'coerced_brand', 'coerced_details', 'coerced_itemName'}
+
+
+# ----------------------------
+# 3. Entry points
+# ----------------------------
+def decode_item(raw: str, schema: ItemSchema = ITEM_SCHEMA) -> dict:
+    """Decode one item from LLM output; raises DecodeError if nothing usable is there"""
+    try:
+        value, repairs = loads_tolerant(raw)
+        if isinstance(value, list) and value:
+            value = value[0]
+            repairs.append('unwrapped_list')
+        if isinstance(value, dict) and isinstance(value.get('items'), list) and value['items']:
+            value = value['items'][0]
+            repairs.append('unwrapped_items')
+        item, coerced = schema.validate(value)
+    except DecodeError:
+        decode_stats.failed()
+        raise
+    decode_stats.add(repairs + [c for c in coerced if c not in _QUIET])
+    return item
+
+
+def decode_items(raw: str, schema: ItemSchema = LIST_ITEM_SCHEMA) -> list:
+    """Decode an items array; entries that fail validation come back as None"""
+    try:
+        value, repairs = loads_tolerant(raw)
+    except DecodeError:
+        decode_stats.failed()
+        raise
+    if isinstance(value, dict):
+        value = value.get('items', [value] if 'itemName' in value else None)
+    if not isinstance(value, list):
+        decode_stats.failed()
+        raise DecodeError('response has no items array')
+
+    items = []
+    for entry in value:
+        try:
+            item, coerced = schema.validate(entry)
+            repairs.extend(c for c in coerced if c not in _QUIET)
+            items.append(item)
+        except DecodeError:
+            repairs.append('invalid_item')
+            items.append(None)
+    decode_stats.add(repairs)
+    return items
@@ -0,0 +1,190 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ----------------------------
+# 1. Request classes and context
+# ----------------------------
+# Interactive /api/analyze calls always go before bulk (process_excel) work.
+# Inside a class, HIGH priority items go first, and clients take turns so one
+# large upload cannot starve everybody else.
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+CLASS_RANK = {INTERACTIVE: 0, BULK: 1}
+ITEM_RANK = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
+
+_request = ContextVar('llm_request', default=(INTERACTIVE, ''))
+
+
+@contextmanager
+def request_context(request_class=INTERACTIVE, client=''):
+    """Tag LLM calls made inside the block with their request class and client"""
+    token = _request.set((request_class, client))
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def current_request():
+    return _request.get()
+
+
+class QueueFull(Exception):
+    """The call was shed; callers answer from a local parser instead"""
+
+
+# ----------------------------
+# 2. Scheduler
+# ----------------------------
+class _Ticket:
+    __slots__ = ('level', 'client', 'granted', 'state')
+
+    def __init__(self, level, client):
+        self.level = level
+        self.client = client
+        self.granted = threading.Event()
+        self.state = 'queued'
+
+
+class ClassStats:
+    __slots__ = ('calls', 'shed', 'queued', 'wait_ms', 'max_wait_ms', 'model_ms', 'max_model_ms')
+
+    def __init__(self):
+        self.calls = 0
+        self.shed = 0
+        self.queued = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.model_ms = 0.0
+        self.max_model_ms = 0.0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'shed': self.shed,
+            'queued': self.queued,
+            'avg_wait_ms': round(self.wait_ms / self.calls, 2) if self.calls else 0.0,
+            'max_wait_ms': round(self.max_wait_ms, 2),
+            'avg_model_ms': round(self.model_ms / self.calls, 2) if self.calls else 0.0,
+            'max_model_ms': round(self.max_model_ms, 2),
+        }
+
+
+class LLMScheduler:
+    """Admits at most max_concurrent LLM calls; the rest wait in priority order or are shed"""
+
+    def __init__(self, max_concurrent=8, max_queue=None, max_wait=None):
+        self.max_concurrent = max_concurrent
+        # Per request class; a full queue sheds new calls instead of growing the backlog
+        self.max_queue = max_queue or {INTERACTIVE: 32, BULK: 256}
+        # Seconds a call may wait before it is shed (None waits for as long as it takes)
+        self.max_wait = max_wait or {INTERACTIVE: 10.0, BULK: None}
+        self.stats = {name: ClassStats() for name in CLASS_RANK}
+        self._running = 0
+        # (class rank, item rank) -> client -> deque of tickets; clients rotate round-robin
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def run(self, call, request_class=None, client=None, item_priority='MEDIUM'):
+        """Run call() when a slot is free; raises QueueFull if it was shed"""
+        context_class, context_client = current_request()
+        request_class = request_class or context_class
+        client = context_client if client is None else client
+        stats = self.stats[request_class]
+
+        queued_at = time.perf_counter()
+        ticket = self._enqueue(request_class, client, item_priority)
+        if not ticket.granted.wait(self.max_wait.get(request_class)):
+            with self._lock:
+                if ticket.state == 'queued':
+                    self._remove(ticket)
+                    stats.queued -= 1
+                    stats.shed += 1
+                    raise QueueFull(f'{request_class} LLM call waited too long')
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            model_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                stats.calls += 1
+                stats.wait_ms += wait_ms
+                stats.max_wait_ms = max(stats.max_wait_ms, wait_ms)
+                stats.model_ms += model_ms
+                stats.max_model_ms = max(stats.max_model_ms, model_ms)
+                self._running -= 1
+                self._dispatch()
+
+    def _enqueue(self, request_class, client, item_priority):
+        level = (CLASS_RANK[request_class], ITEM_RANK.get(str(item_priority).upper(), 1))
+        ticket = _Ticket(level, client)
+        stats = self.stats[request_class]
+        with self._lock:
+            if self._running < self.max_concurrent and not self._levels:
+                self._running += 1
+                ticket.state = 'granted'
+                ticket.granted.set()
+                return ticket
+            if stats.queued >= self.max_queue[request_class]:
+                stats.shed += 1
+                raise QueueFull(f'{request_class} LLM queue is full')
+            clients = self._levels.setdefault(level, OrderedDict())
+            clients.setdefault(client, deque()).append(ticket)
+            stats.queued += 1
+        return ticket
+
+    def _remove(self, ticket):
+        clients = self._levels[ticket.level]
+        tickets = clients[ticket.client]
+        tickets.remove(ticket)
+        if not tickets:
+            del clients[ticket.client]
+        if not clients:
+            del self._levels[ticket.level]
+
+    def _dispatch(self):
+        """Grant free slots to the highest level, taking one ticket per client in turn"""
+        while self._running < self.max_concurrent and self._levels:
+            level = min(self._levels)
+            clients = self._levels[level]
+            client, tickets = clients.popitem(last=False)
+            ticket = tickets.popleft()
+            if tickets:
+                clients[client] = tickets
+            if not clients:
+                del self._levels[level]
+            ticket.state = 'granted'
+            self.stats[_class_name(level[0])].queued -= 1
+            self._running += 1
+            ticket.granted.set()
+
+    def report(self):
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'running': self._running,
+                'classes': {name: stats.as_dict() for name, stats in self.stats.items()},
+            }
+
+
+def _class_name(rank):
+    return next(name for name, value in CLASS_RANK.items() if value == rank)
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrent=int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+    max_queue={
+        INTERACTIVE: int(os.getenv('LLM_MAX_QUEUE_INTERACTIVE', 32)),
+        BULK: int(os.getenv('LLM_MAX_QUEUE_BULK', 256)),
+    },
+    max_wait={
+        INTERACTIVE: float(os.getenv('LLM_MAX_WAIT_INTERACTIVE', 10)),
+        BULK: None,
+    },
+)
@@ -0,0 +1,108 @@
+import os
+import threading
+
+from regex_parser import RegexItemParser
+from normalize import normalize_text
+from units import add_canonical, UNIT_ALIASES
+from shopping_item import ShoppingItem
+
+try:
+    import spacy
+except ImportError:  # spaCy is optional, the regex extractors still work without it
+    spacy = None
+
+# ----------------------------
+# 1. Shared spaCy pipeline
+# ----------------------------
+# Only the components needed for POS tags and ORG/PRODUCT entities are kept
+# (tok2vec, tagger, attribute_ruler, ner); nothing reads dependencies or sentences.
+# The pipeline is loaded once per process; under gunicorn --preload it is
+# loaded in the master and shared copy-on-write with the workers.
+SPACY_MODEL = os.getenv('SPACY_MODEL', 'en_core_web_sm')
+SPACY_DISABLE = ['parser', 'lemmatizer', 'textcat', 'senter']
+PIPE_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', 64))
+
+ITEM_POS = {'NOUN', 'PROPN', 'ADJ'}
+BRAND_LABELS = {'ORG', 'PRODUCT'}
+_SKIP_WORDS = {'priority', 'brand', 'need', 'needed', 'want', 'please', 'buy', 'get'} | set(UNIT_ALIASES)
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """Load the spaCy pipeline once; returns None if spaCy or the model is missing"""
+    global _nlp
+    if _nlp is None and spacy is not None:
+        with _nlp_lock:
+            if _nlp is None:
+                try:
+                    _nlp = spacy.load(SPACY_MODEL, disable=SPACY_DISABLE)
+                    print(f"✅ spaCy pipeline loaded: {_nlp.pipe_names}")
+                except OSError as e:
+                    print(f"❌ Could not load spaCy model {SPACY_MODEL}: {e}")
+                    _nlp = False
+    return _nlp or None
+
+
+# ----------------------------
+# 2. Local NLP parser
+# ----------------------------
+class LocalNLPParser(RegexItemParser):
+    """LLM-free parser: regex extractors for structure, spaCy for item name and brand"""
+
+    def __init__(self, nlp=None):
+        self._nlp = nlp
+
+    @property
+    def nlp(self):
+        # Loaded on first parse, not when the engine is built; server.warm_up() parses once before forking
+        return self._nlp if self._nlp is not None else get_nlp()
+
+    def analyze(self, text: str) -> ShoppingItem:
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(self, texts):
+        """Parse many utterances, running spaCy once over the whole batch with nlp.pipe"""
+        spoken = [normalize_text(text) for text in texts]
+        extracted = [self.extract_fields(text) for text in spoken]
+        if self.nlp is None:
+            docs = [None] * len(texts)
+        else:
+            docs = self.nlp.pipe(spoken, batch_size=PIPE_BATCH_SIZE)
+
+        results = []
+        for original, text, (result, spans), doc in zip(texts, spoken, extracted, docs):
+            result['description'] = original
+            if doc is not None:
+                if not result['brand']:
+                    result['brand'] = self._brand_from_entities(doc, spans)
+                    if result['brand']:
+                        start = text.find(result['brand'])
+                        spans.append((start, start + len(result['brand'])))
+                result['itemName'] = self._item_name_from_doc(doc, spans)
+            if not result['itemName']:
+                result['itemName'] = self.item_name_from_remainder(text, spans) or text
+            results.append(add_canonical(ShoppingItem.from_dict(result)))
+        return results
+
+    @staticmethod
+    def _inside(index, spans):
+        return any(start <= index < end for start, end in spans)
+
+    def _brand_from_entities(self, doc, spans):
+        for ent in doc.ents:
+            if ent.label_ in BRAND_LABELS and not self._inside(ent.start_char, spans):
+                return ent.text
+        return ''
+
+    def _item_name_from_doc(self, doc, spans):
+        words = [
+            token.text for token in doc
+            if token.pos_ in ITEM_POS
+            and not token.is_stop
+            and not token.like_num
+            and token.lower_ not in _SKIP_WORDS
+            and not self._inside(token.idx, spans)
+        ]
+        return ' '.join(words)
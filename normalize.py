@@ -0,0 +1,239 @@
+import os
+import re
+
+from units import UNIT_ALIASES
+from gazetteer import get_gazetteer
+
+# ----------------------------
+# 1. Vocabulary
+# ----------------------------
+# Web Speech transcribes spoken quantities as words ("two and a half kilo",
+# "aadha kilo", "ek dozen ande"); the regex extractors only read digits and
+# English unit names, so the local parsers read a rewritten copy; the LLM and
+# the stored description keep what was said.
+NORMALIZE_TEXT = os.getenv('NORMALIZE_TEXT', '1') not in ('0', 'false', 'off')
+
+ONES = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13,
+    'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19,
+}
+TENS = {
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50,
+    'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90,
+}
+HINDI_NUMBERS = {
+    'ek': 1, 'do': 2, 'teen': 3, 'char': 4, 'chaar': 4, 'paanch': 5, 'panch': 5, 'chhe': 6,
+    'chhah': 6, 'che': 6, 'saat': 7, 'aath': 8, 'nau': 9, 'das': 10, 'gyarah': 11, 'barah': 12,
+    'baarah': 12, 'pandrah': 15, 'bees': 20, 'pachas': 50, 'pachaas': 50, 'sau': 100,
+}
+# Words that are numbers on their own
+FRACTIONS = {
+    'half': 0.5, 'quarter': 0.25, 'aadha': 0.5, 'adha': 0.5, 'aadhi': 0.5, 'adhi': 0.5,
+    'aadhe': 0.5, 'paav': 0.25, 'pav': 0.25, 'pau': 0.25, 'dedh': 1.5, 'derh': 1.5,
+    'dhai': 2.5, 'dhaai': 2.5, 'adhai': 2.5, 'dhaee': 2.5,
+}
+# Hindi modifiers of the number that follows: saadhe teen = 3.5, sawa do = 2.25, paune do = 1.75
+MODIFIERS = {
+    'saadhe': 0.5, 'sadhe': 0.5, 'sade': 0.5,
+    'sawa': 0.25, 'sava': 0.25, 'savva': 0.25,
+    'paune': -0.25, 'pone': -0.25,
+}
+# Also ordinary words ("do", "teen", "quarter"...); on their own these are only read in front of a
+# unit or a Hinglish item word, not in front of any gazetteer item ("quarter chicken", "do apples")
+AMBIGUOUS = {'a', 'an', 'do', 'teen', 'char', 'che', 'das', 'nau', 'sau', 'bees', 'pav', 'pau', 'quarter', 'half'}
+
+HINDI_UNITS = {
+    'darjan': 'dozen', 'dajan': 'dozen', 'kilu': 'kilo', 'litar': 'litre', 'leetar': 'litre',
+    'graam': 'gram', 'paket': 'packet', 'packat': 'packet', 'dabba': 'box', 'dabbe': 'box',
+    'peti': 'box', 'botal': 'bottle', 'bottal': 'bottle',
+}
+ITEM_ALIASES = {
+    'anda': 'eggs', 'ande': 'eggs', 'andey': 'eggs', 'andon': 'eggs',
+    'doodh': 'milk', 'dudh': 'milk', 'chawal': 'rice', 'chaawal': 'rice', 'chaval': 'rice',
+    'cheeni': 'sugar', 'chini': 'sugar', 'shakkar': 'sugar', 'aata': 'atta', 'namak': 'salt',
+    'tel': 'oil', 'pyaaz': 'onions', 'pyaz': 'onions', 'kanda': 'onions', 'aloo': 'potatoes',
+    'aalu': 'potatoes', 'tamatar': 'tomatoes', 'dahi': 'curd', 'makhan': 'butter',
+    'chai': 'tea', 'sabzi': 'vegetables', 'sabji': 'vegetables', 'haldi': 'turmeric',
+    'adrak': 'ginger', 'lehsun': 'garlic', 'lahsun': 'garlic', 'dhaniya': 'coriander',
+    'nimbu': 'lemons', 'kela': 'bananas', 'kele': 'bananas', 'seb': 'apples',
+    'gobhi': 'cauliflower', 'bhindi': 'okra', 'gud': 'jaggery', 'mirchi': 'chillies',
+    'mirch': 'chillies', 'paani': 'water',
+}
+PHRASE_ALIASES = {
+    ('chai', 'patti'): 'tea', ('chai', 'pati'): 'tea', ('hari', 'mirch'): 'green chillies',
+    ('lal', 'mirch'): 'red chillies', ('sarson', 'tel'): 'mustard oil',
+}
+_PHRASE_STARTS = {first for first, _ in PHRASE_ALIASES}
+# Hinglish glue words; "jaldi" keeps its meaning for the priority extractor
+FILLER_WORDS = {'aur': 'and', 'chahiye': '', 'chaiye': '', 'lana': '', 'lena': '', 'lao': '', 'jaldi': 'urgent'}
+
+_WORD_PATTERN = re.compile(r"\d+(?:\.\d+)?(?:/\d+)?|[A-Za-z]+(?:'[A-Za-z]+)?")
+
+
+def is_unit(word):
+    return word in UNIT_ALIASES or word in HINDI_UNITS
+
+
+def _is_number_word(word):
+    return word[:1].isdigit() or word in ONES or word in TENS or word in HINDI_NUMBERS
+
+
+def _format(value):
+    return f'{value:.3f}'.rstrip('0').rstrip('.')
+
+
+# ----------------------------
+# 2. Spoken quantities
+# ----------------------------
+class _Tokens:
+    """Lower-cased words of an utterance with their spans; gaps tell words apart from punctuation"""
+
+    def __init__(self, text):
+        self.text = text
+        self.matches = list(_WORD_PATTERN.finditer(text))
+        self.words = [m.group(0).lower() for m in self.matches]
+
+    def get(self, i):
+        # A word only continues a phrase if nothing but whitespace separates it from the previous one
+        if i >= len(self.words) or (i > 0 and self.text[self.matches[i - 1].end():self.matches[i].start()].strip()):
+            return ''
+        return self.words[i]
+
+
+def _integer(tokens, i, first=False):
+    """Integer spelled with English or Hindi words (or digits) at i; returns (value, next index)"""
+    word = tokens.words[i] if first else tokens.get(i)
+    if not word:
+        return None, i
+    if word.replace('.', '', 1).isdigit():
+        return float(word), i + 1
+    if word in HINDI_NUMBERS:
+        return HINDI_NUMBERS[word], i + 1
+
+    value, j = None, i
+    if word in TENS:
+        value, j = TENS[word], i + 1
+        if tokens.get(j) in ONES and 0 < ONES[tokens.get(j)] < 10:
+            value, j = value + ONES[tokens.get(j)], j + 1
+    elif word in ONES:
+        value, j = ONES[word], i + 1
+    if value is not None and tokens.get(j) in ('hundred', 'thousand'):
+        value *= 100 if tokens.get(j) == 'hundred' else 1000
+        j += 1
+        k = j + 1 if tokens.get(j) == 'and' else j
+        rest, after = _integer(tokens, k)
+        if rest is not None and rest < value and tokens.get(k) and not tokens.get(k)[0].isdigit():
+            value, j = value + rest, after
+    return value, j
+
+
+def _quantity(tokens, i):
+    """Spoken quantity starting at word i; returns (value, next index) or (None, i)"""
+    word = tokens.words[i]
+    if word in MODIFIERS:
+        value, j = _integer(tokens, i + 1)
+        if value is not None:
+            return value + MODIFIERS[word], j
+        if is_unit(tokens.get(i + 1)):
+            return 1 + MODIFIERS[word], i + 1
+        return None, i
+
+    if word in ('a', 'an'):
+        following = tokens.get(i + 1)
+        if following in ('half', 'quarter'):
+            word, i = following, i + 1
+        elif is_unit(following):
+            return 1, i + 1
+        else:
+            return None, i
+
+    if word in FRACTIONS:
+        j = i + 1
+        if word in ('half', 'quarter'):
+            # "half a kilo", "a quarter of a kilo"
+            if tokens.get(j) == 'of':
+                j += 1
+            if tokens.get(j) in ('a', 'an'):
+                j += 1
+        return FRACTIONS[word], j
+
+    value, j = _integer(tokens, i, first=True)
+    if value is None:
+        return None, i
+    # "two and a half", "2 and half", "one and a quarter", "three and three quarters"
+    if tokens.get(j) == 'and':
+        k = j + 1 + (tokens.get(j + 1) in ('a', 'an'))
+        if tokens.get(k) in ('half', 'quarter'):
+            return value + FRACTIONS[tokens.get(k)], k + 1
+        if tokens.get(k) == 'three' and tokens.get(k + 1) in ('quarter', 'quarters'):
+            return value + 0.75, k + 2
+    # "three quarter kilo"
+    if tokens.get(j) in ('quarter', 'quarters') and value < 4:
+        return value * 0.25, j + 1
+    return value, j
+
+
+# ----------------------------
+# 3. Normalization pass
+# ----------------------------
+def normalize_text(text: str) -> str:
+    """Rewrite spoken numbers, fractions and Hinglish unit/item words to the canonical form
+
+    "two and a half kilo chawal" -> "2.5 kilo rice", "ek dozen ande" -> "1 dozen eggs".
+    A number word is only rewritten right before a unit or an item (a unit or Hinglish
+    item for AMBIGUOUS words), and not when it follows another number ("2 five star chocolates", "Fifty Fifty biscuits", "one more").
+    Text that has nothing to rewrite is returned unchanged, and the pass is idempotent.
+    """
+    if not NORMALIZE_TEXT or not text:
+        return text
+    tokens = _Tokens(text)
+    words = tokens.words
+    out = []
+    last = 0
+    previous_is_number = False
+    item_starts = None
+    i = 0
+    while i < len(words):
+        start = tokens.matches[i].start()
+        value, j = _quantity(tokens, i)
+        replacement = None
+        if value is not None:
+            following = tokens.get(j)
+            spelled = j - i > 1 or not words[i][0].isdigit()
+            anchored = is_unit(following) or following in ITEM_ALIASES or following in _PHRASE_STARTS
+            ambiguous = j - i == 1 and words[i] in AMBIGUOUS
+            if spelled and not anchored and not ambiguous and following:
+                if item_starts is None:
+                    item_starts = {match.start for match in get_gazetteer().scan(text)}
+                anchored = tokens.matches[j].start() in item_starts
+            after_number = i > 0 and bool(tokens.get(i)) and _is_number_word(words[i - 1])
+            if spelled and anchored and not after_number:
+                replacement = _format(value)
+            else:
+                j = i + 1
+        else:
+            j = i + 1
+            pair = (words[i], tokens.get(i + 1))
+            if pair in PHRASE_ALIASES:
+                replacement, j = PHRASE_ALIASES[pair], i + 2
+            elif words[i] in HINDI_UNITS:
+                replacement = HINDI_UNITS[words[i]]
+            elif words[i] in ITEM_ALIASES:
+                replacement = ITEM_ALIASES[words[i]]
+            elif words[i] in FILLER_WORDS:
+                replacement = FILLER_WORDS[words[i]]
+            if (replacement or words[i]) == 'dozen' and not previous_is_number:
+                # "dozen ande" means one dozen
+                replacement = '1 dozen'
+
+        if replacement is not None:
+            out.append(text[last:start])
+            out.append(replacement)
+            last = tokens.matches[j - 1].end()
+        previous_is_number = (replacement if replacement is not None else words[i])[:1].isdigit()
+        i = j
+    if last == 0:
+        return text
+    out.append(text[last:])
+    return ' '.join(''.join(out).split())
@@ -0,0 +1,220 @@
+import io
+import os
+import sys
+import time
+import hmac
+import uuid
+import random
+import pstats
+import cProfile
+import threading
+import functools
+import tracemalloc
+from collections import Counter, OrderedDict
+
+from flask import request
+
+# ----------------------------
+# 1. Settings
+# ----------------------------
+# Everything is off unless configured; with no settings profiled() returns the
+# view unchanged and tracemalloc is never started.
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')          # X-Profile: <token> profiles that request
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join('processing', 'profiles'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 50))
+# Stack sampling interval for the collapsed (flamegraph) output
+SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 1)) / 1000
+TRACEMALLOC_FRAMES = int(os.getenv('TRACEMALLOC_FRAMES', 0))
+
+ENABLED = bool(PROFILE_TOKEN or PROFILE_SAMPLE_RATE)
+
+
+# ----------------------------
+# 2. Per-request profiles
+# ----------------------------
+class StackSampler:
+    """Samples one thread's Python stack on a timer; output is collapsed stacks for flamegraph.pl"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Most recent profiles of this worker, also written to PROFILE_DIR"""
+
+    def __init__(self, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, name, elapsed_ms, profile, sampler):
+        profile_id = f'{name}-{int(time.time())}-{uuid.uuid4().hex[:6]}'
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profile_id)
+        profile.dump_stats(base + '.prof')
+        with open(base + '.folded', 'w') as f:
+            f.write(sampler.collapsed())
+
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(15)
+        entry = {
+            'id': profile_id,
+            'name': name,
+            'pid': os.getpid(),
+            'path': request.path,
+            'elapsed_ms': round(elapsed_ms, 2),
+            'samples': sum(sampler.stacks.values()),
+            'created_at': time.time(),
+            'top': summary.getvalue(),
+        }
+        with self._lock:
+            self.entries[profile_id] = entry
+            while len(self.entries) > self.keep:
+                old_id, _ = self.entries.popitem(last=False)
+                for suffix in ('.prof', '.folded'):
+                    try:
+                        os.remove(os.path.join(self.directory, old_id + suffix))
+                    except OSError:
+                        pass
+        return profile_id
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in e.items() if k != 'top'} for e in reversed(self.entries.values())]
+
+    def get(self, profile_id):
+        with self._lock:
+            return self.entries.get(profile_id)
+
+    def file(self, profile_id, kind):
+        if kind not in ('prof', 'folded') or self.get(profile_id) is None:
+            return None
+        return os.path.join(self.directory, f'{profile_id}.{kind}')
+
+
+profiles = ProfileStore()
+
+
+def _token_matches(header):
+    # Constant-time compare of bytes, so timing leaks nothing and non-ASCII headers cannot raise
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(
+        request.headers.get(header, '').encode('utf-8'), PROFILE_TOKEN.encode('utf-8'))
+
+
+def authorized():
+    """Debug endpoints need X-Profile-Token; without a configured token they stay closed"""
+    return _token_matches('X-Profile-Token')
+
+
+def _wanted():
+    if _token_matches('X-Profile'):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def profiled(name):
+    """Profile a view with cProfile + stack sampling when asked to; no-op unless configured"""
+    def decorator(view):
+        if not ENABLED:
+            return view
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not _wanted():
+                return view(*args, **kwargs)
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            with StackSampler(threading.get_ident()) as sampler:
+                profile.enable()
+                try:
+                    response = view(*args, **kwargs)
+                finally:
+                    profile.disable()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            try:
+                profile_id = profiles.add(name, elapsed_ms, profile, sampler)
+            except Exception as e:
+                print(f"❌ Could not store profile for {name}: {e}")
+                return response
+            print(f"🔬 Profiled {name} in {elapsed_ms:.1f} ms → {profile_id}")
+            # Views return a Response or a (Response, status) tuple
+            target = response[0] if isinstance(response, tuple) else response
+            if hasattr(target, 'headers'):
+                target.headers['X-Profile-Id'] = profile_id
+            return response
+        return wrapper
+    return decorator
+
+
+# ----------------------------
+# 3. Memory snapshots
+# ----------------------------
+_last_snapshot = None
+_snapshot_lock = threading.Lock()
+MEMORY_TOP_MAX = 200   # most allocation sites one /api/debug/memory answer lists
+
+
+def start_tracemalloc():
+    """Start allocation tracing when TRACEMALLOC_FRAMES is set; forked workers keep tracing"""
+    if TRACEMALLOC_FRAMES and not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        print(f"✅ tracemalloc started ({TRACEMALLOC_FRAMES} frames)")
+
+
+def memory_report(limit=20, key_type='lineno', compare=False):
+    """Top allocation sites of this worker; compare=True diffs against the previous call"""
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ])
+    with _snapshot_lock:
+        previous, _last_snapshot = _last_snapshot, snapshot
+
+    if compare and previous is not None:
+        stats = snapshot.compare_to(previous, key_type)[:limit]
+        top = [{'site': str(s.traceback), 'size_kb': round(s.size / 1024, 1),
+                'size_diff_kb': round(s.size_diff / 1024, 1), 'count': s.count,
+                'count_diff': s.count_diff} for s in stats]
+    else:
+        stats = snapshot.statistics(key_type)[:limit]
+        top = [{'site': str(s.traceback), 'size_kb': round(s.size / 1024, 1), 'count': s.count}
+               for s in stats]
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'pid': os.getpid(),
+        'traced_kb': round(current / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'compared': bool(compare and previous is not None),
+        'top': top,
+    }
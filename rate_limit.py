@@ -0,0 +1,317 @@
+import os
+import json
+import math
+import time
+import socket
+import threading
+import socketserver
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+# ----------------------------
+# 1. Token bucket stores
+# ----------------------------
+# A bucket holds up to `capacity` tokens and refills at `rate` tokens per second.
+# take() spends `cost` tokens if available and otherwise says how long to wait;
+# a negative cost puts tokens back (never above capacity). With a `reserve`, the
+# spend must also leave that many tokens in the bucket for other callers.
+
+
+def _refill(tokens, updated, capacity, rate, now):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """Buckets in this process only; exact for a single worker
+
+    At most max_keys buckets are kept. Over that, buckets that have refilled are
+    dropped (a full bucket is the same as none), then the least recently used.
+    """
+
+    def __init__(self, max_keys=100000):
+        self._buckets = {}      # key -> (tokens, updated, time it is full again); oldest use first
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def take(self, key, capacity, rate, cost, now=None, reserve=0):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens = _refill(tokens, updated, capacity, rate, now)
+            allowed = tokens - reserve >= cost
+            if allowed:
+                tokens = min(capacity, tokens - cost)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+            return (True, 0.0) if allowed else (False, (cost + reserve - tokens) / rate)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _evict(self, now):
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        # Still over: forget the least recently used down to 90%, so this is not rerun per call
+        if len(self._buckets) > self.max_keys:
+            for key in list(self._buckets)[:len(self._buckets) - int(self.max_keys * 0.9)]:
+                del self._buckets[key]
+
+
+class MongoBucketStore:
+    """Buckets shared by every worker/instance, updated with compare-and-set"""
+
+    def __init__(self, collection, max_attempts=5):
+        self.collection = collection
+        self.max_attempts = max_attempts
+        # Idle buckets are full again after capacity/rate seconds; let Mongo drop them
+        self.collection.create_index([('expires', ASCENDING)], expireAfterSeconds=0)
+
+    def take(self, key, capacity, rate, cost, now=None, reserve=0):
+        for _ in range(self.max_attempts):
+            now = time.time() if now is None else now
+            doc = self.collection.find_one({'_id': key})
+            if doc is None:
+                tokens, updated = capacity, now
+            else:
+                tokens = _refill(doc['tokens'], doc['updated'], capacity, rate, now)
+                updated = doc['updated']
+
+            allowed = tokens - reserve >= cost
+            remaining = min(capacity, tokens - cost) if allowed else tokens
+            new_doc = {
+                'tokens': remaining,
+                'updated': now,
+                'expires': _expiry(now, capacity - remaining, rate),
+            }
+            try:
+                if doc is None:
+                    self.collection.insert_one(dict(new_doc, _id=key))
+                    written = True
+                else:
+                    # Only write if nobody else spent from this bucket since we read it
+                    written = self.collection.update_one(
+                        {'_id': key, 'updated': updated}, {'$set': new_doc}
+                    ).matched_count == 1
+            except DuplicateKeyError:
+                written = False
+            if written:
+                return (True, 0.0) if allowed else (False, (cost + reserve - tokens) / rate)
+            now = None
+        # Heavy contention on one key: refuse rather than over-admit
+        return False, 1.0
+
+
+class _BucketRequestHandler(socketserver.StreamRequestHandler):
+    # One JSON line per take(): [key, capacity, rate, cost, now, reserve] -> [allowed, retry_after]
+    def handle(self):
+        for line in self.rfile:
+            key, capacity, rate, cost, now, reserve = json.loads(line)
+            allowed, retry_after = self.server.store.take(key, capacity, rate, cost, now=now, reserve=reserve)
+            self.wfile.write(json.dumps([allowed, retry_after]).encode() + b'\n')
+
+
+class _BucketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class BucketServer:
+    """Serves one MemoryBucketStore to every worker on this host over a unix socket
+
+    Run it in a process that outlives the workers (the gunicorn master, see
+    gunicorn.conf.py); the workers reach it through SocketBucketStore.
+    """
+
+    def __init__(self, path, store=None):
+        self.path = path
+        self.store = store if store is not None else MemoryBucketStore()
+        self._server = None
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)   # left over from a previous run
+        self._server = _BucketServer(self.path, _BucketRequestHandler)
+        self._server.store = self.store
+        threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.1},
+                         name='rate-limit-server', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class SocketBucketStore:
+    """Buckets held by a BucketServer on this host, shared by all of its workers
+
+    Each thread keeps its own connection. When the server cannot be reached the
+    buckets fall back to this process only, as with MemoryBucketStore.
+    """
+
+    def __init__(self, path, timeout=0.5):
+        self.path = path
+        self.timeout = timeout
+        self.fallback = MemoryBucketStore()
+        self._local = threading.local()
+        self._warned = False
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            connection = self._local.connection = (sock, sock.makefile('rb'))
+        return connection
+
+    def _drop_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+
+    def take(self, key, capacity, rate, cost, now=None, reserve=0):
+        request = json.dumps([key, capacity, rate, cost, now, reserve]).encode() + b'\n'
+        try:
+            sock, reader = self._connection()
+            sock.sendall(request)
+            line = reader.readline()
+            if not line:
+                raise ConnectionError('rate limit server closed the connection')
+            allowed, retry_after = json.loads(line)
+            self._warned = False
+            return allowed, retry_after
+        except (OSError, ValueError) as e:
+            self._drop_connection()
+            if not self._warned:
+                self._warned = True
+                print(f"⚠️ Rate limit server at {self.path} unavailable ({e}); limiting per worker")
+            return self.fallback.take(key, capacity, rate, cost, now=now, reserve=reserve)
+
+
+def _expiry(now, deficit, rate):
+    return datetime.fromtimestamp(now + deficit / rate + 60, tz=timezone.utc)
+
+
+# ----------------------------
+# 2. Limiter
+# ----------------------------
+class RateLimited(Exception):
+    def __init__(self, budget, retry_after):
+        super().__init__(f'Rate limit exceeded for {budget}')
+        self.budget = budget
+        self.retry_after = retry_after
+
+
+# Unix socket of the BucketServer that RATE_LIMIT_BACKEND=socket workers share
+RATE_LIMIT_SOCKET = os.getenv('RATE_LIMIT_SOCKET', '/tmp/grocery-rate-limits.sock')
+
+
+def parse_budget(spec: str):
+    """'30/60' -> (capacity 30, refill 0.5 tokens/s); empty, '0' or a count of 0 disables the budget
+
+    Raises ValueError for a spec that is not '<count>/<seconds>' with seconds > 0.
+    """
+    if not spec or spec.strip() in ('0', 'off'):
+        return None
+    count, _, seconds = spec.partition('/')
+    try:
+        count, seconds = float(count), float(seconds or 60)
+    except ValueError:
+        raise ValueError(f"Rate limit {spec!r} is not '<count>/<seconds>'") from None
+    if not (math.isfinite(count) and math.isfinite(seconds)) or count < 0 or seconds <= 0:
+        raise ValueError(f"Rate limit {spec!r} needs a count >= 0 and seconds > 0")
+    if count == 0:
+        return None
+    return count, count / seconds
+
+
+class RateLimiter:
+    """Named budgets on top of a bucket store"""
+
+    def __init__(self, store, budgets):
+        self.store = store
+        # budget name -> (capacity, refill per second) or None when disabled
+        self.budgets = budgets
+        self.rejected = {name: 0 for name in budgets}
+
+    def hit(self, budget, key, cost=1, reserve=0.0):
+        """Spend from a budget; raises RateLimited with the seconds to wait
+
+        reserve is the fraction of the budget's capacity the spend must leave untouched,
+        so lower-priority callers (bulk jobs) cannot drain it for everyone else.
+        """
+        limits = self.budgets.get(budget)
+        if limits is None:
+            return
+        capacity, rate = limits
+        reserve = capacity * reserve
+        # A single request larger than what it may spend could never pass; cap it
+        allowed, retry_after = self.store.take(f'{budget}:{key}', capacity, rate,
+                                               min(cost, capacity - reserve), reserve=reserve)
+        if not allowed:
+            self.rejected[budget] = self.rejected.get(budget, 0) + 1
+            raise RateLimited(budget, retry_after)
+
+    def refund(self, budget, key, cost=1):
+        """Give back tokens spent by hit() for a request that was refused later"""
+        limits = self.budgets.get(budget)
+        if limits is not None:
+            capacity, rate = limits
+            self.store.take(f'{budget}:{key}', capacity, rate, -min(cost, capacity))
+
+    def allows(self, budget, key, cost=1):
+        try:
+            self.hit(budget, key, cost)
+            return True
+        except RateLimited:
+            return False
+
+
+def retry_after_header(seconds):
+    return str(max(1, math.ceil(seconds)))
+
+
+def estimate_tokens(text: str, prompt: str = '', completion: int = 150) -> int:
+    """Rough tokens for one chat call (~4 characters per token) used to pace the TPM budget"""
+    return (len(prompt) + len(text)) // 4 + completion
+
+
+def create_limiter(db=None):
+    """Build the limiter from RATE_LIMIT_* settings
+
+    RATE_LIMIT_BACKEND   memory (default, per worker), socket (shared by the workers on this
+                         host through RATE_LIMIT_SOCKET) or mongo (shared by all workers)
+    RATE_LIMIT_MAX_KEYS  clients a memory store tracks before it evicts idle ones
+    RATE_LIMIT_LLM       per-client requests that may reach the LLM, e.g. '30/60'
+    RATE_LIMIT_LOCAL     per-client regex/local-only parses, e.g. '300/60'
+    RATE_LIMIT_JOBS      per-client bulk Excel uploads, e.g. '10/3600'
+    LLM_TOKENS_PER_MINUTE  global token budget of the Azure deployment
+    """
+    backend = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'mongo' and db is not None:
+        store = MongoBucketStore(db['rate_limits'])
+    elif backend == 'socket':
+        store = SocketBucketStore(RATE_LIMIT_SOCKET)
+    else:
+        store = MemoryBucketStore(int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000)))
+
+    tpm = int(os.getenv('LLM_TOKENS_PER_MINUTE', 0))
+    budgets = {
+        'llm': parse_budget(os.getenv('RATE_LIMIT_LLM', '30/60')),
+        'local': parse_budget(os.getenv('RATE_LIMIT_LOCAL', '300/60')),
+        'jobs': parse_budget(os.getenv('RATE_LIMIT_JOBS', '10/3600')),
+        'llm_tokens': (float(tpm), tpm / 60.0) if tpm else None,
+    }
+    return RateLimiter(store, budgets)
@@ -0,0 +1,168 @@
+import re
+
+from units import UNIT_ALIASES, standardize_unit, add_canonical
+from shopping_item import ShoppingItem
+from gazetteer import get_gazetteer
+from normalize import normalize_text
+
+# ----------------------------
+# 1. Compiled patterns (shared by every parser instance and worker)
+# ----------------------------
+# Longest aliases first so 'kgs' wins over 'kg' and 'litres' over 'l'
+_UNIT_ALTERNATION = '|'.join(sorted((re.escape(a) for a in UNIT_ALIASES), key=len, reverse=True))
+
+# A whole number ('1,000' with thousands separators), never the tail of a longer one
+_NUMBER = r'(?<![\d.,])(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
+QUANTITY_UNIT_PATTERN = re.compile(
+    rf'({_NUMBER}(?:\s+\d+/\d+|/\d+)?)\s*({_UNIT_ALTERNATION})s?\b',
+    re.IGNORECASE
+)
+BARE_QUANTITY_PATTERN = re.compile(rf'({_NUMBER})\b')
+
+# Brand after "from" (or "brand:") until the next keyword or end
+BRAND_PATTERN = re.compile(
+    r'(?:\bfrom|\bbrand:?)\s+([A-Za-z][A-Za-z&\'\s]*?)(?=\s*(?:,|\.|\bwith\b|\band\b|$))',
+    re.IGNORECASE
+)
+PRIORITY_PATTERN = re.compile(
+    r'(?:(?:with|and|,)\s+)?\b(high|medium|low|urgent|normal)\s+priority\b',
+    re.IGNORECASE
+)
+DETAILS_PATTERN = re.compile(
+    r'\b(?:with|and)\s+(?!(?:high|medium|low|urgent|normal)\s+priority)(.+?)\s*\.?$',
+    re.IGNORECASE
+)
+
+# "low fat paneer" and "high protein oats" describe the product, not the priority
+_PRODUCT_QUALITY = (r'(?![\s-]+(?:fat|sugar|salt|sodium|calorie|calories|cal|carb|carbs|cholesterol|lactose'
+                    r'|protein|fibre|fiber)\b)')
+PRIORITY_KEYWORDS = {
+    'HIGH': re.compile(rf'\b(high{_PRODUCT_QUALITY}|urgent|important|asap|critical|immediately)\b', re.IGNORECASE),
+    'LOW': re.compile(rf'\b(low{_PRODUCT_QUALITY}|not urgent|relaxed|later|whenever|can wait)\b', re.IGNORECASE),
+    'MEDIUM': re.compile(r'\b(medium|normal|regular|average)\b', re.IGNORECASE),
+}
+PRIORITY_ALIASES = {'URGENT': 'HIGH', 'NORMAL': 'MEDIUM'}
+
+CONNECTING_WORDS = re.compile(r'\b(of|from|with|and|the|a|an|some|please|buy|get)\b', re.IGNORECASE)
+# Request and urgency words that are never part of an item name ("need 5 packets of maggi urgent").
+# Priority words that also describe products ("low fat", "regular") are not listed.
+ITEM_STOPWORDS = {
+    'i', 'we', 'me', 'us', 'need', 'needs', 'needed', 'want', 'wanted', 'bring', 'order', 'add',
+    'also', 'more', 'pls', 'plz', 'urgent', 'urgently', 'asap', 'important', 'critical',
+    'immediately', 'later', 'whenever', 'not', 'can', 'wait',
+}
+STOPWORD_PATTERN = re.compile(rf"\b(?:{'|'.join(sorted(ITEM_STOPWORDS))})\b", re.IGNORECASE)
+
+
+# ----------------------------
+# 2. Regex-only parser
+# ----------------------------
+class RegexItemParser:
+    """Local, network-free parser returning the same schema as analyser.ShoppingItemParser"""
+
+    def extract_quantity_and_unit(self, text):
+        match = QUANTITY_UNIT_PATTERN.search(text)
+        if match:
+            return {
+                'quantity': match.group(1),
+                'unit': standardize_unit(match.group(2)),
+                'span': match.span()
+            }
+        match = BARE_QUANTITY_PATTERN.search(text)
+        if match:
+            return {'quantity': match.group(1), 'unit': '', 'span': match.span()}
+        return None
+
+    def extract_brand(self, text):
+        match = BRAND_PATTERN.search(text)
+        if match:
+            return {'brand': match.group(1).strip(), 'span': match.span()}
+        # No "from <brand>": a catalog brand anywhere in the text ("amul milk 1 litre")
+        for found in get_gazetteer().find(text, kind='brand'):
+            return {'brand': found.name, 'span': (found.start, found.end)}
+        return None
+
+    @staticmethod
+    def catalog_item_name(text):
+        """Catalog product named in the text, else a brand used as the item ("2 packets maggi")"""
+        matches = get_gazetteer().find(text)
+        for kind in ('product', 'brand'):
+            for found in matches:
+                if found.kind == kind:
+                    return found.name
+        return ''
+
+    def determine_priority(self, text):
+        match = PRIORITY_PATTERN.search(text)
+        if match:
+            word = match.group(1).upper()
+            return {'priority': PRIORITY_ALIASES.get(word, word), 'span': match.span()}
+        for level, pattern in PRIORITY_KEYWORDS.items():
+            if pattern.search(text):
+                return {'priority': level, 'span': None}
+        return {'priority': 'MEDIUM', 'span': None}
+
+    def extract_details(self, text):
+        match = DETAILS_PATTERN.search(text)
+        if match:
+            return {'details': match.group(1).strip().rstrip('.'), 'span': match.span()}
+        return None
+
+    def extract_fields(self, text):
+        """Run every extractor; returns (result dict, character spans already consumed)"""
+        spans = []
+        result = {
+            'itemName': '',
+            'quantity': '',
+            'unit': '',
+            'brand': '',
+            'priority': 'MEDIUM',
+            'details': '',
+            'description': text
+        }
+
+        quantity_unit = self.extract_quantity_and_unit(text)
+        if quantity_unit:
+            result['quantity'] = quantity_unit['quantity']
+            result['unit'] = quantity_unit['unit']
+            spans.append(quantity_unit['span'])
+
+        priority = self.determine_priority(text)
+        result['priority'] = priority['priority']
+        if priority['span']:
+            spans.append(priority['span'])
+
+        # Priority phrases would otherwise be read as details/brand terminators
+        without_priority = text
+        if priority['span']:
+            start, end = priority['span']
+            without_priority = text[:start] + ' ' * (end - start) + text[end:]
+
+        brand = self.extract_brand(without_priority)
+        if brand:
+            result['brand'] = brand['brand']
+            spans.append(brand['span'])
+
+        details = self.extract_details(without_priority)
+        if details:
+            result['details'] = details['details']
+            spans.append(details['span'])
+
+        return result, spans
+
+    def item_name_from_remainder(self, text, spans):
+        """Whatever is left once quantity, brand, priority and details are cut out"""
+        chars = list(text)
+        for start, end in spans:
+            chars[start:end] = ' ' * (end - start)
+        remainder = STOPWORD_PATTERN.sub(' ', CONNECTING_WORDS.sub(' ', ''.join(chars)))
+        return ' '.join(re.sub(r'[^\w\s\'-]', ' ', remainder).split())
+
+    def analyze(self, text: str) -> ShoppingItem:
+        # Extractors read "2.5 kilo rice"; the description keeps what was said
+        spoken = normalize_text(text)
+        result, spans = self.extract_fields(spoken)
+        result['itemName'] = (self.item_name_from_remainder(spoken, spans)
+                              or self.catalog_item_name(spoken) or spoken)
+        result['description'] = text
+        return add_canonical(ShoppingItem.from_dict(result))
@@ -0,0 +1,407 @@
+import os
+import sys
+import time
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne, ASCENDING, ReturnDocument
+from pymongo.errors import PyMongoError, DuplicateKeyError, OperationFailure
+
+import analytics
+import export_store
+
+# ----------------------------
+# 1. Materialized daily shop reports
+# ----------------------------
+# One document per (day, shop), kept current by the reporting worker below so
+# reports are a single find() and the save and patch paths only write the list.
+REPORT_COLLECTION = 'daily_shop_reports'
+STATE_COLLECTION = 'reporting_state'
+IST = analytics.IST
+
+
+def ensure_indexes(db):
+    # The polling fallback walks db.lists in (created_at, _id) order
+    db.lists.create_index([('created_at', ASCENDING), ('_id', ASCENDING)])
+    db[REPORT_COLLECTION].create_index([('day', ASCENDING), ('shop', ASCENDING)], unique=True)
+    # Only patched lists have pending_changes, so the index stays small
+    db.lists.create_index([('pending_changes.to_version', ASCENDING)], sparse=True)
+
+
+def report_operations(lists, retired=()):
+    """$inc upserts folding a batch of new lists into the daily shop reports
+
+    retired are earlier versions of patched lists, taken out again.
+    """
+    totals = {}
+    for shopping_list, sign in [(doc, -1) for doc in retired] + [(doc, 1) for doc in lists]:
+        day = str(shopping_list.get('created_at', ''))[:10]
+        shop = ' '.join(str(shopping_list.get('favoriteShop') or '').split()) or '(none)'
+        key = (day, shop)
+        inc = totals.setdefault(key, {'lists': 0, 'items': 0})
+        inc['lists'] += sign
+        for item in shopping_list.get('items') or []:
+            if not isinstance(item, dict) or not str(item.get('itemName') or '').strip():
+                continue
+            inc['items'] += sign
+            field = f"priority.{analytics.normalize_priority(item.get('priority'))}"
+            inc[field] = inc.get(field, 0) + sign
+    return [
+        UpdateOne({'day': day, 'shop': shop}, {'$inc': inc}, upsert=True)
+        for (day, shop), inc in totals.items()
+    ]
+
+
+def update_reports(db, lists, retired=()):
+    operations = report_operations(lists, retired)
+    if operations:
+        db[REPORT_COLLECTION].bulk_write(operations, ordered=False)
+
+
+def update_rollups(db, lists, retired=()):
+    # One write for the batch: a failure leaves no list half counted for the replay to add again
+    analytics.record_lists(db, lists, retired)
+
+
+def update_export(db, lists, retired=()):
+    # Rows carry the list's id and version; readers keep the newest version of each list
+    export_store.append_lists(lists)
+
+
+# Everything derived from saved lists; each handler gets every new list once, and every
+# patched list once more as retired=[version counted so far] plus lists=[patched version]
+DEFAULT_HANDLERS = [update_reports, update_rollups, update_export]
+
+
+class HandlerFailed(Exception):
+    """A handler raised; the batch is retried and the handlers that finished it skip it"""
+
+
+def daily_reports(db, day, shop=''):
+    # Shops whose lists were all patched away keep a row of zeros
+    query = {'day': day, 'lists': {'$gt': 0}}
+    if shop:
+        query['shop'] = shop
+    return list(db[REPORT_COLLECTION].find(query, {'_id': 0}).sort('shop', ASCENDING))
+
+
+# ----------------------------
+# 2. Reporting worker
+# ----------------------------
+class ReportingWorker:
+    """Tails inserts into db.lists and feeds them to the report handlers
+
+    Uses a change stream when the server supports one (replica sets, Atlas) and
+    otherwise polls on the (created_at, _id) index. A lease in reporting_state
+    makes sure only one process in the deployment does the work; the checkpoint
+    stored next to it lets a restarted worker resume where the last one stopped.
+    Each handler also records the _ids of the last batch it applied, so a batch
+    that is replayed (after a handler failure or a crash) is not counted twice.
+
+    Every list it processes gets reported_version, the version the handlers counted.
+    Patches to a list push its old and new snapshots onto pending_changes, and
+    process_changes() hands them to the handlers once the list is reported.
+    """
+
+    def __init__(self, db, handlers=None, name='lists', poll_interval=2.0, batch_size=500,
+                 lease_seconds=30, settle_seconds=2):
+        self.db = db
+        self.handlers = handlers if handlers is not None else DEFAULT_HANDLERS
+        self.name = name
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        # created_at is stamped before insert; give slower concurrent saves time to land
+        self.settle_seconds = settle_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{id(self)}'
+        self.mode = 'idle'
+        self.processed = 0
+        self.changes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -- lease and checkpoint --
+    @property
+    def state(self):
+        return self.db[STATE_COLLECTION]
+
+    def acquire_lease(self):
+        now = time.time()
+        try:
+            doc = self.state.find_one_and_update(
+                {'_id': self.name, '$or': [
+                    {'owner': self.owner}, {'lease_until': {'$lt': now}}, {'lease_until': {'$exists': False}}
+                ]},
+                {'$set': {'owner': self.owner, 'lease_until': now + self.lease_seconds, 'mode': self.mode}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another process holds a live lease
+            return False
+        return doc is not None and doc.get('owner') == self.owner
+
+    def checkpoint(self):
+        doc = self.state.find_one({'_id': self.name}) or {}
+        return doc.get('last_created_at', ''), doc.get('last_id')
+
+    def _save_checkpoint(self, last_doc, resume_token=None):
+        update = {'last_created_at': last_doc.get('created_at', ''), 'last_id': last_doc['_id'],
+                  'processed_at': time.time()}
+        if resume_token is not None:
+            update['resume_token'] = resume_token
+        self.state.update_one({'_id': self.name, 'owner': self.owner}, {'$set': update})
+
+    def handler_checkpoints(self):
+        """_ids of the last batch each handler finished, to skip them when the batch is replayed"""
+        marks = (self.state.find_one({'_id': self.name}, {'handlers': 1}) or {}).get('handlers') or {}
+        return {name: set(mark.get('ids') or ()) for name, mark in marks.items()}
+
+    def _save_handler_checkpoint(self, handler, docs):
+        last_doc = max(docs, key=self._position)
+        mark = {'last_created_at': last_doc.get('created_at', ''), 'last_id': last_doc['_id'],
+                'ids': [doc['_id'] for doc in docs]}
+        self.state.update_one({'_id': self.name, 'owner': self.owner}, {'$set': {f'handlers.{handler.__name__}': mark}})
+
+    @staticmethod
+    def _position(doc):
+        return doc.get('created_at', ''), doc['_id']
+
+    def process(self, docs, resume_token=None):
+        """Run the handlers over a batch and advance the checkpoint
+
+        Raises HandlerFailed, without moving the checkpoint, if any handler failed.
+        A replay starts with the batch that failed, so a handler that finished it
+        skips those _ids; docs need not be in (created_at, _id) order.
+        """
+        if not docs:
+            return 0
+        marks = self.handler_checkpoints()
+        failed = []
+        for handler in self.handlers:
+            done = marks.get(handler.__name__, set())
+            pending = [doc for doc in docs if doc['_id'] not in done]
+            if not pending:
+                continue
+            try:
+                handler(self.db, pending)
+            except Exception as e:
+                print(f"❌ Reporting handler {handler.__name__} failed: {e}")
+                failed.append(handler.__name__)
+                continue
+            # Covers the skipped docs too, in case a retry batches them with new ones
+            self._save_handler_checkpoint(handler, docs)
+        if failed:
+            raise HandlerFailed(f"{', '.join(failed)} failed; batch will be retried")
+        # Patches made after the version counted here are left for process_changes
+        self.db.lists.bulk_write([
+            UpdateOne({'_id': doc['_id']}, {'$max': {'reported_version': doc.get('version', 0)}})
+            for doc in docs
+        ], ordered=False)
+        self._save_checkpoint(max(docs, key=self._position), resume_token)
+        self.processed += len(docs)
+        return len(docs)
+
+    # -- patches --
+    def _reported_changes(self):
+        """Lists with pending patches that were already reported, with the version the reports count"""
+        last_created_at, last_id = self.checkpoint()
+        docs = self.db.lists.find(
+            {'pending_changes.to_version': {'$exists': True}},
+            {'pending_changes': 1, 'reported_version': 1, 'created_at': 1}
+        ).sort('_id', ASCENDING).limit(self.batch_size)
+        changed = []
+        for doc in docs:
+            reported = doc.get('reported_version')
+            if reported is None:
+                # Not reported yet (the insert path will count it as it is by then), or
+                # reported before reported_version existed, as first saved
+                if last_id is None or self._position(doc) > (last_created_at, last_id):
+                    continue
+                reported = doc['pending_changes'][0]['from_version']
+            changed.append((doc, reported))
+        return changed
+
+    def process_changes(self):
+        """Take patched lists out of the reports at their counted version and add them back as patched
+
+        Raises HandlerFailed if any handler failed; as in process(), a handler that
+        finished a change records the versions it reached and skips it on the retry.
+        """
+        changed = self._reported_changes()
+        if not changed:
+            return 0
+        marks = (self.state.find_one({'_id': self.name}, {'changes': 1}) or {}).get('changes') or {}
+        latest = {doc['_id']: doc['pending_changes'][-1]['to_version'] for doc, _ in changed}
+        failed = []
+        for handler in self.handlers:
+            done = (marks.get(handler.__name__) or {}).get('versions') or {}
+            retired, lists = [], []
+            for doc, reported in changed:
+                reached = max(reported, done.get(str(doc['_id']), reported))
+                pending = [change for change in doc['pending_changes'] if change['to_version'] > reached]
+                if pending:
+                    retired.append(dict(pending[0]['before'], _id=doc['_id']))
+                    lists.append(dict(pending[-1]['after'], _id=doc['_id']))
+            if not lists:
+                continue
+            try:
+                handler(self.db, lists, retired=retired)
+            except Exception as e:
+                print(f"❌ Reporting handler {handler.__name__} failed on patched lists: {e}")
+                failed.append(handler.__name__)
+                continue
+            versions = {str(list_id): version for list_id, version in latest.items()}
+            self.state.update_one({'_id': self.name, 'owner': self.owner},
+                                  {'$set': {f'changes.{handler.__name__}': {'versions': versions}}})
+        if failed:
+            raise HandlerFailed(f"{', '.join(failed)} failed on patched lists; they will be retried")
+        # A patch landing meanwhile has a higher to_version and stays queued
+        self.db.lists.bulk_write([
+            UpdateOne({'_id': list_id}, {'$max': {'reported_version': version},
+                                         '$pull': {'pending_changes': {'to_version': {'$lte': version}}}})
+            for list_id, version in latest.items()
+        ], ordered=False)
+        self.changes += len(changed)
+        return len(changed)
+
+    # -- polling --
+    def poll_once(self, seen=None):
+        """Process the next batch of lists after the checkpoint; returns how many
+
+        The _ids processed are added to seen when it is given.
+        """
+        last_created_at, last_id = self.checkpoint()
+        settled = (datetime.now(IST) - timedelta(seconds=self.settle_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+        query = {'created_at': {'$lte': settled}}
+        if last_id is not None:
+            query['$or'] = [
+                {'created_at': {'$gt': last_created_at}},
+                {'created_at': last_created_at, '_id': {'$gt': last_id}},
+            ]
+        docs = list(
+            self.db.lists.find(query)
+            .sort([('created_at', ASCENDING), ('_id', ASCENDING)])
+            .limit(self.batch_size)
+        )
+        processed = self.process(docs)
+        if seen is not None:
+            seen.update(doc['_id'] for doc in docs)
+        return processed
+
+    def _poll_loop(self):
+        self.mode = 'poll'
+        while not self._stop.is_set():
+            if not self.acquire_lease():
+                return
+            try:
+                if self.poll_once() == self.batch_size:
+                    continue
+                self.process_changes()
+            except HandlerFailed:
+                pass  # the checkpoint did not move; the next poll reads the same batch
+            self._stop.wait(self.poll_interval)
+
+    # -- change stream --
+    def _watch_loop(self):
+        """Consume the change stream; raises if the server has none"""
+        pipeline = [{'$match': {'operationType': 'insert'}}]
+        resume_token = (self.state.find_one({'_id': self.name}) or {}).get('resume_token')
+        with self.db.lists.watch(pipeline, resume_after=resume_token, max_await_time_ms=1000) as stream:
+            self.mode = 'change_stream'
+            # Lists the catch-up below already processed; the stream may deliver them again
+            seen = set()
+            if resume_token is None:
+                # Stream is open, so nothing inserted from now on is lost; catch up on the backlog
+                self.settle_seconds, settle = 0, self.settle_seconds
+                while self.poll_once(seen) == self.batch_size:
+                    pass
+                self.settle_seconds = settle
+            last_lease = last_changes = time.time()
+            batch = []
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                # Events come in commit order, not created_at order (two workers can stamp
+                # and insert out of order), so they are deduplicated by _id, never by position
+                if change is not None and change['fullDocument']['_id'] not in seen:
+                    batch.append(change['fullDocument'])
+                if batch and (change is None or len(batch) >= self.batch_size):
+                    self.process(batch, stream.resume_token)
+                    batch = []
+                if change is None and time.time() - last_changes > self.poll_interval:
+                    # Patches are updates, which the stream does not follow
+                    self.process_changes()
+                    last_changes = time.time()
+                if time.time() - last_lease > self.lease_seconds / 3:
+                    if not self.acquire_lease():
+                        return
+                    last_lease = time.time()
+            if batch:
+                self.process(batch, stream.resume_token)
+
+    # -- lifecycle --
+    def run(self):
+        while not self._stop.is_set():
+            if not self.acquire_lease():
+                self.mode = 'standby'
+                self._stop.wait(self.lease_seconds / 2)
+                continue
+            try:
+                if not hasattr(type(self.db.lists), 'watch'):
+                    raise NotImplementedError('collection has no watch()')
+                self._watch_loop()
+            except HandlerFailed:
+                # Reopening the stream from the saved resume token replays the batch
+                self._stop.wait(self.poll_interval)
+            except (OperationFailure, NotImplementedError) as e:
+                # Standalone servers and mongomock have no change streams
+                print(f"⚠️ Change streams unavailable ({e}); polling db.lists instead")
+                self._poll_loop()
+            except PyMongoError as e:
+                print(f"❌ Reporting worker error: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='reporting-worker', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        status = worker_status(self.db, self.name)
+        status.update(this_process={'mode': self.mode, 'processed': self.processed, 'changes': self.changes})
+        return status
+
+
+def worker_status(db, name='lists'):
+    """Lease holder and checkpoint of the reporting worker, JSON-ready"""
+    doc = db[STATE_COLLECTION].find_one({'_id': name}, {'resume_token': 0}) or {}
+    return {
+        'owner': doc.get('owner'),
+        'mode': doc.get('mode'),
+        'lease_until': doc.get('lease_until'),
+        'last_created_at': doc.get('last_created_at'),
+        'last_id': str(doc['last_id']) if doc.get('last_id') is not None else None,
+        'processed_at': doc.get('processed_at'),
+    }
+
+
+if __name__ == '__main__':
+    # Standalone worker: python reporting.py (with REPORTING_WORKER=off on the web servers)
+    from pymongo import MongoClient
+    from dotenv import load_dotenv
+    from storage import MONGODB_DATABASE
+    load_dotenv()
+    db = MongoClient(os.getenv('MONGODB_URI'))[MONGODB_DATABASE]
+    ensure_indexes(db)
+    worker = ReportingWorker(db)
+    print("✅ Reporting worker started")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,40 @@
+"""
+Production entry point: gunicorn server:app (settings in gunicorn.conf.py).
+
+Importing this module builds the Flask app and warms everything that is
+expensive to create and safe to share, so that with preload_app the master
+does it once and forked workers inherit it copy-on-write.
+"""
+import gc
+import os
+
+from app import app, engine_router
+
+
+def warm_up():
+    """Load compiled regexes, unit tables and the spaCy pipeline before forking"""
+    for name in os.getenv('PRELOAD_ENGINES', 'regex,local').split(','):
+        name = name.strip()
+        if name:
+            try:
+                engine_router.registry.get(name).analyze('1 kg rice from Amul with high priority')
+                print(f"✅ Preloaded parser engine: {name}")
+            except Exception as e:
+                print(f"❌ Could not preload parser engine {name}: {e}")
+
+    # Move everything allocated so far out of the collector's reach, so gc passes in
+    # the workers do not touch (and un-share) the inherited pages
+    gc.collect()
+    gc.freeze()
+
+
+warm_up()
+
+
+if __name__ == '__main__':
+    # Development only; production runs under gunicorn
+    from app import start_reporting_worker, health_monitor, excel_jobs
+    start_reporting_worker()
+    health_monitor.ensure_started()
+    excel_jobs.start()
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 3000)))
@@ -0,0 +1,177 @@
+import json
+from operator import attrgetter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is used instead
+    orjson = None
+
+# ----------------------------
+# 1. Record
+# ----------------------------
+FIELDS = ('itemName', 'quantity', 'unit', 'brand', 'priority', 'details', 'description',
+          'canonicalQuantity', 'canonicalUnit')
+_FIELD_SET = frozenset(FIELDS)
+_DEFAULTS = {field: '' for field in FIELDS}
+_DEFAULTS.update(priority='MEDIUM', canonicalQuantity=None)
+_DEFAULT_PAIRS = tuple(_DEFAULTS.items())
+_values = attrgetter(*FIELDS)
+
+
+class ShoppingItem:
+    """Parser result shared by every engine
+
+    Fixed fields live in __slots__; anything else a parser attaches (utterance,
+    source, ...) goes to `extra`. Item access (item['unit'], .get, .items) is kept
+    so code written against the old result dicts keeps working.
+    """
+    __slots__ = FIELDS + ('extra',)
+
+    itemName: str
+    quantity: str
+    unit: str
+    brand: str
+    priority: str
+    details: str
+    description: str
+    canonicalQuantity: Optional[float]
+    canonicalUnit: str
+
+    def __init__(self, itemName='', quantity='', unit='', brand='', priority='MEDIUM', details='',
+                 description='', canonicalQuantity=None, canonicalUnit='', extra=None):
+        self.itemName = itemName
+        self.quantity = quantity
+        self.unit = unit
+        self.brand = brand
+        self.priority = priority
+        self.details = details
+        self.description = description
+        self.canonicalQuantity = canonicalQuantity
+        self.canonicalUnit = canonicalUnit
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        item = cls(*[data.get(field, default) for field, default in _DEFAULT_PAIRS])
+        extra_keys = data.keys() - _FIELD_SET
+        if extra_keys:
+            item.extra = {key: data[key] for key in extra_keys}
+        return item
+
+    def to_dict(self) -> dict:
+        result = dict(zip(FIELDS, _values(self)))
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    # -- dict compatibility --
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in _FIELD_SET or bool(self.extra and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        """Remove an extra key; fixed fields are reset to their default"""
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            setattr(self, key, _DEFAULTS[key])
+            return value
+        if self.extra and key in self.extra:
+            return self.extra.pop(key)
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def keys(self):
+        return list(FIELDS) + list(self.extra or ())
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(FIELDS) + len(self.extra or ())
+
+    def __eq__(self, other):
+        if isinstance(other, (ShoppingItem, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f'ShoppingItem({self.to_dict()!r})'
+
+
+# ----------------------------
+# 2. JSON
+# ----------------------------
+def _default(obj):
+    if isinstance(obj, ShoppingItem):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(obj) -> bytes:
+    """Serialize items (or structures holding them) to UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(raw):
+    """Decode JSON produced by dumps(); item objects come back as ShoppingItem"""
+    value = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if isinstance(value, list):
+        return [ShoppingItem.from_dict(v) for v in value]
+    if isinstance(value, dict) and isinstance(value.get('items'), list):
+        value['items'] = [ShoppingItem.from_dict(v) for v in value['items']]
+        return value
+    return ShoppingItem.from_dict(value)
+
+
+# ----------------------------
+# 3. Bulk output
+# ----------------------------
+def items_frame(items, columns=FIELDS) -> pd.DataFrame:
+    """Build a DataFrame column by column with typed columns, instead of from row dicts"""
+    items = [item if isinstance(item, ShoppingItem) else ShoppingItem.from_dict(item) for item in items]
+    data = {}
+    for column in columns:
+        if column == 'canonicalQuantity':
+            values = [np.nan if v is None else v for v in map(attrgetter(column), items)]
+            data[column] = np.array(values, dtype=float)
+        elif column in _FIELD_SET:
+            data[column] = np.array(list(map(attrgetter(column), items)), dtype=object)
+        else:
+            data[column] = np.array([item.get(column) for item in items], dtype=object)
+    # The arrays are freshly built, no need for pandas to copy them again
+    return pd.DataFrame(data, columns=list(columns), copy=False)
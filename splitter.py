@@ -0,0 +1,131 @@
+import os
+import re
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+
+from units import UNIT_ALIASES
+from normalize import ONES, TENS, HINDI_NUMBERS, FRACTIONS, MODIFIERS, HINDI_UNITS, ITEM_ALIASES
+from gazetteer import get_gazetteer, words_of
+
+# ----------------------------
+# 1. Clause boundaries
+# ----------------------------
+# A separator only starts a new item when what follows is one: a quantity of a
+# unit ("2 kg sugar", "ek dozen ande") or nothing but catalog items ("tea, sugar
+# and milk"). So "pasta with high priority and make sure it is whole wheat" and
+# "rice and a lot of love" stay one item.
+NUMBER_WORDS = (
+    'a|an|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|'
+    'half|quarter|couple|few|some|dozen'
+)
+_UNIT_WORDS = '|'.join(sorted((re.escape(a) for a in UNIT_ALIASES), key=len, reverse=True))
+_QUANTITY_WORDS = sorted(set(NUMBER_WORDS.split('|')) | set(ONES) | set(TENS) | set(HINDI_NUMBERS)
+                         | set(FRACTIONS) | set(MODIFIERS))
+_SPOKEN_UNITS = '|'.join(sorted(set(UNIT_ALIASES) | set(HINDI_UNITS), key=len, reverse=True))
+QUANTITY_START = re.compile(
+    rf'(?:\d+(?:[.,/]\d+)?\s*|(?:(?:{"|".join(_QUANTITY_WORDS)})\s+){{1,3}})(?:of\s+)?(?:{_SPOKEN_UNITS})\b',
+    re.IGNORECASE
+)
+# A bare count ("3 eggs", "two maggi") still needs catalog items after it, so "3 kids" is not one
+LEADING_QUANTITY = re.compile(rf'^(?:(?:\d+(?:[.,/]\d+)?|{"|".join(_QUANTITY_WORDS)}|of)\s+)+', re.IGNORECASE)
+_ITEM_GLUE = {'of', 'from', 'the', 'and'}
+
+SEPARATOR_PATTERN = re.compile(
+    r'(\s*(?:[,;]\s+(?:and\s+|aur\s+|then\s+|also\s+|plus\s+)?|\s+(?:and|aur|then|also|plus)\s+))',
+    re.IGNORECASE
+)
+# "a dozen eggs" / "an kg" style article quantities the regex extractors cannot read
+ARTICLE_QUANTITY = re.compile(rf'^(?:a|an|one)\s+(?=(?:{_UNIT_WORDS})\b)', re.IGNORECASE)
+
+# Context stated once for the whole utterance
+SHARED_PRIORITY = re.compile(
+    r'[,\s]*(?:(?:all|everything)\s+)?(?:with\s+|and\s+)?(high|medium|low|urgent|normal)\s+priority(?:\s+for\s+(?:all|everything))?\s*\.?\s*$',
+    re.IGNORECASE
+)
+SHARED_BRAND = re.compile(
+    r'[,\s]*(?:all|everything|both)\s+from\s+([A-Za-z][A-Za-z&\'\s]*?)\s*\.?\s*$',
+    re.IGNORECASE
+)
+
+SPLIT_WORKERS = int(os.getenv('SPLIT_WORKERS', 8))
+_pool = ThreadPoolExecutor(max_workers=SPLIT_WORKERS, thread_name_prefix='item-split')
+
+
+def _is_item(clause):
+    """A quantity of a unit, or only catalog items (and Hinglish item words) after any count"""
+    if QUANTITY_START.match(clause):
+        return True
+    rest = LEADING_QUANTITY.sub('', clause)
+    matches = get_gazetteer().scan(rest)
+    named = False
+    for word, start, end in words_of(rest):
+        if word in ITEM_ALIASES or any(m.start <= start and end <= m.end for m in matches):
+            named = True
+        elif word not in _ITEM_GLUE:
+            return False
+    return named
+
+
+def _ends_with_number(clause):
+    # "two and a half kilo": the separator is inside a number
+    words = clause.split()
+    return bool(words) and (words[-1][0].isdigit() or words[-1].lower() in _QUANTITY_WORDS)
+
+
+def split_utterance(text: str):
+    """Split one utterance into item clauses; returns (clauses, shared context)"""
+    context = {}
+    remaining = text.strip()
+
+    # Trailing context can appear in either order, peel both off
+    for _ in range(2):
+        match = SHARED_PRIORITY.search(remaining)
+        if match and 'priority' not in context:
+            word = match.group(1).upper()
+            context['priority'] = {'URGENT': 'HIGH', 'NORMAL': 'MEDIUM'}.get(word, word)
+            remaining = remaining[:match.start()]
+            continue
+        match = SHARED_BRAND.search(remaining)
+        if match and 'brand' not in context:
+            context['brand'] = match.group(1).strip()
+            remaining = remaining[:match.start()]
+
+    parts = SEPARATOR_PATTERN.split(remaining)
+    clauses = [parts[0]]
+    for separator, clause in zip(parts[1::2], parts[2::2]):
+        if _is_item(clause.strip(' ,;.')) and not _ends_with_number(clauses[-1]):
+            clauses.append(clause)
+        else:
+            clauses[-1] += separator + clause
+    clauses = [c.strip(' ,;.') for c in clauses]
+    clauses = [ARTICLE_QUANTITY.sub('1 ', c) for c in clauses if c]
+    if len(clauses) <= 1:
+        # Nothing to split, parse the original text untouched
+        return [text], {}
+    return clauses, context
+
+
+# ----------------------------
+# 2. Parallel clause parsing
+# ----------------------------
+def analyze_multi(engine, text: str):
+    """Parse every item in an utterance; clauses are parsed concurrently"""
+    clauses, context = split_utterance(text)
+    if len(clauses) == 1:
+        results = [engine.analyze(clauses[0])]
+    elif hasattr(engine, 'parser') and hasattr(engine.parser, 'analyze_batch'):
+        # Local engines batch better than they parallelize
+        results = engine.analyze_batch(clauses)
+    else:
+        # Carry the request context (client, request class) into the pool threads
+        request = copy_context()
+        results = list(_pool.map(lambda clause: request.copy().run(engine.analyze, clause), clauses))
+
+    for result in results:
+        if context.get('brand') and not result.get('brand'):
+            result['brand'] = context['brand']
+        # A clause-level priority keyword wins over the shared one
+        if context.get('priority') and result.get('priority', 'MEDIUM') == 'MEDIUM':
+            result['priority'] = context['priority']
+        result['utterance'] = text
+    return results
@@ -1,4 +1,4 @@
-import React, { useState, useRef } from 'react';
+import React, { useState, useRef, useEffect } from 'react';
 import { useForm, useFieldArray } from 'react-hook-form';
 import jsPDF from 'jspdf';
 import VoiceInput from './VoiceInput';
@@ -29,6 +29,86 @@ interface FormInputs {
   }>;
 }
 
+// Lists waiting to reach the server; kept across reloads so nothing is lost offline
+const OUTBOX_KEY = 'pendingLists';
+// Lists the server refused (400); set aside so they do not block the rest of the outbox
+const REJECTED_KEY = 'rejectedLists';
+// Most lists the server takes per /api/sync request (SYNC_MAX_LISTS)
+const SYNC_MAX_LISTS = 100;
+
+type QueuedList = FormInputs & { billNumber: string; idempotencyKey: string };
+
+const readQueue = (key: string): QueuedList[] => {
+  try {
+    return JSON.parse(localStorage.getItem(key) || '[]');
+  } catch {
+    return [];
+  }
+};
+
+const readOutbox = () => readQueue(OUTBOX_KEY);
+
+const writeOutbox = (lists: QueuedList[]) => {
+  localStorage.setItem(OUTBOX_KEY, JSON.stringify(lists));
+};
+
+// Drop uploaded lists from the outbox and move refused ones aside
+const settleOutbox = (stored: Set<string>, rejected: QueuedList[]) => {
+  const refused = new Set(rejected.map(list => list.idempotencyKey));
+  // Lists queued while a request was in flight stay in the outbox
+  writeOutbox(readOutbox().filter(list => !stored.has(list.idempotencyKey) && !refused.has(list.idempotencyKey)));
+  if (rejected.length > 0) {
+    console.warn('The server refused queued lists; kept under', REJECTED_KEY, rejected);
+    localStorage.setItem(REJECTED_KEY, JSON.stringify([...readQueue(REJECTED_KEY), ...rejected]));
+  }
+};
+
+const postLists = (lists: QueuedList[]) =>
+  fetch('/api/sync', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ lists }),
+  });
+
+const storedKeys = async (response: Response): Promise<string[]> => {
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  const data = await response.json();
+  return data.results.map((result: { idempotencyKey: string }) => result.idempotencyKey);
+};
+
+const newIdempotencyKey = () =>
+  typeof crypto !== 'undefined' && 'randomUUID' in crypto
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+// Uploads the queued lists, SYNC_MAX_LISTS per request; the server skips keys it already stored
+const flushOutbox = async (): Promise<Set<string>> => {
+  const pending = readOutbox();
+  const stored = new Set<string>();
+  for (let start = 0; start < pending.length; start += SYNC_MAX_LISTS) {
+    const chunk = pending.slice(start, start + SYNC_MAX_LISTS);
+    const response = await postLists(chunk);
+    const rejected: QueuedList[] = [];
+    if (response.status === 400 || response.status === 413) {
+      // One bad list fails the whole request; send them one by one to find it
+      for (const list of chunk) {
+        const single = await postLists([list]);
+        if (single.status === 400 || single.status === 413) {
+          rejected.push(list);
+        } else {
+          (await storedKeys(single)).forEach(key => stored.add(key));
+        }
+      }
+    } else {
+      (await storedKeys(response)).forEach(key => stored.add(key));
+    }
+    settleOutbox(stored, rejected);
+  }
+  return stored;
+};
+
 const emptyItem: ItemInput = {
   itemName: '',
   brand: '',
@@ -41,6 +121,7 @@ const emptyItem: ItemInput = {
 
 const App: React.FC = () => {
   const [showThankYou, setShowThankYou] = useState(false);
+  const [suggestions, setSuggestions] = useState<{ item: string[]; brand: string[] }>({ item: [], brand: [] });
   const lastSpokenText = useRef('');
   
   const { register, control, handleSubmit, reset, setValue, getValues } = useForm<FormInputs>({
@@ -57,6 +138,31 @@ const App: React.FC = () => {
     name: "items"
   });
 
+  useEffect(() => {
+    const upload = () => {
+      flushOutbox().catch(error => console.warn('Queued lists not uploaded yet:', error));
+    };
+    upload();
+    window.addEventListener('online', upload);
+    return () => window.removeEventListener('online', upload);
+  }, []);
+
+  const fetchSuggestions = async (field: 'item' | 'brand', prefix: string) => {
+    if (!prefix.trim()) return;
+    try {
+      const params = new URLSearchParams({ q: prefix, field, limit: '8' });
+      const response = await fetch(`/api/suggest?${params}`);
+      if (!response.ok) return;
+      const data = await response.json();
+      setSuggestions(current => ({
+        ...current,
+        [field]: data.suggestions.map((suggestion: { text: string }) => suggestion.text)
+      }));
+    } catch (error) {
+      console.error('Error fetching suggestions:', error);
+    }
+  };
+
   const analyzeDescription = async (index: number) => {
     const description = getValues(`items.${index}.description`);
     if (!description) {
@@ -111,6 +217,49 @@ const App: React.FC = () => {
     }
   };
 
+  // Send every description in one request; the server extracts all items with a single LLM call
+  const analyzeAll = async () => {
+    const descriptions = getValues('items')
+      .map(item => item.description)
+      .filter(description => description && description.trim());
+    if (descriptions.length === 0) {
+      alert('Please fill in at least one description first');
+      return;
+    }
+
+    try {
+      const response = await fetch(`${window.location.origin}/api/analyze`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ text: descriptions.join('\n'), mode: 'list' }),
+      });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const result = await response.json();
+      const priorities = ['HIGH', 'MEDIUM', 'LOW'];
+      const items: ItemInput[] = result.items.map((item: any) => ({
+        itemName: item.itemName || '',
+        brand: item.brand || '',
+        quantity: item.quantity ? String(item.quantity) : '',
+        unit: item.unit || '',
+        priority: priorities.includes((item.priority || '').toUpperCase()) ? item.priority.toUpperCase() : '',
+        description: item.description || '',
+        details: item.details || ''
+      }));
+      if (items.length > 0) {
+        reset({ ...getValues(), items });
+      }
+    } catch (error) {
+      console.error('Error analyzing list:', error);
+      alert('Failed to analyze the list. Please try again.');
+    }
+  };
+
   const generatePDF = () => {
     const doc = new jsPDF();
     const pageWidth = doc.internal.pageSize.width;
@@ -267,34 +416,53 @@ const App: React.FC = () => {
     doc.save(`${billNumber}.pdf`);
   };
 
+  const downloadPDF = async (billNumber: string) => {
+    try {
+      const response = await fetch(`/api/lists/${encodeURIComponent(billNumber)}/pdf`);
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      const blob = await response.blob();
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `${billNumber}.pdf`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Server PDF failed, rendering locally:', error);
+      generatePDF();
+    }
+  };
+
   const onSubmit = async (data: FormInputs) => {
     try {
       // Generate bill number
       const currentDate = new Date();
       const billNumber = `BILL-${currentDate.getFullYear()}-${String(currentDate.getMonth() + 1).padStart(2, '0')}-${String(currentDate.getDate()).padStart(2, '0')}-${Math.floor(Math.random() * 10000)}`;
       
-      // Add bill number to the data
-      const dataWithBillNumber = {
+      // Queue first, so a failed or interrupted upload is retried instead of lost or duplicated
+      const queued: QueuedList = {
         ...data,
-        billNumber
+        billNumber,
+        idempotencyKey: newIdempotencyKey()
       };
+      writeOutbox([...readOutbox(), queued]);
 
-      const response = await fetch('/api', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(dataWithBillNumber),
-      });
+      let stored = new Set<string>();
+      try {
+        stored = await flushOutbox();
+      } catch (error) {
+        console.warn('Upload failed, list kept for later:', error);
+      }
 
-      if (response.ok) {
-        generatePDF();  // Generate PDF after successful submission
-        setShowThankYou(true);
+      if (stored.has(queued.idempotencyKey)) {
+        await downloadPDF(billNumber);  // Server-rendered PDF, jsPDF only as fallback
       } else {
-        const errorData = await response.json();
-        console.error('Submission failed:', errorData);
-        alert('Failed to submit the form. Please try again.');
+        generatePDF();
+        alert('You appear to be offline. The list is saved on this device and will be uploaded automatically.');
       }
+      setShowThankYou(true);
     } catch (error) {
       console.error('Error:', error);
       alert('An error occurred while submitting the form. Please try again.');
@@ -387,17 +555,25 @@ const App: React.FC = () => {
 
               <div className="form-row">
                 <input
-                  {...register(`items.${index}.itemName`)}
+                  {...register(`items.${index}.itemName`, {
+                    onChange: (e) => fetchSuggestions('item', e.target.value)
+                  })}
                   placeholder="Item Name"
                   className="item-name-input"
+                  list="item-suggestions"
+                  autoComplete="off"
                 />
               </div>
 
               <div className="form-row">
                 <input
-                  {...register(`items.${index}.brand`)}
+                  {...register(`items.${index}.brand`, {
+                    onChange: (e) => fetchSuggestions('brand', e.target.value)
+                  })}
                   placeholder="Brand"
                   className="brand-input"
+                  list="brand-suggestions"
+                  autoComplete="off"
                 />
               </div>
 
@@ -458,10 +634,25 @@ const App: React.FC = () => {
           + Add Item
         </button>
 
+        <button
+          type="button"
+          className="analyze-button"
+          onClick={analyzeAll}
+        >
+          Analyze All Items
+        </button>
+
         <button type="submit" className="submit-button">
           Submit Shopping List
         </button>
       </form>
+
+      <datalist id="item-suggestions">
+        {suggestions.item.map(name => <option key={name} value={name} />)}
+      </datalist>
+      <datalist id="brand-suggestions">
+        {suggestions.brand.map(name => <option key={name} value={name} />)}
+      </datalist>
     </div>
   );
 };
@@ -146,6 +146,13 @@ class GroceryDictionary {
 
     // Save to localStorage
     this.saveCorrections();
+
+    // Also count it on the server; losing one while offline is harmless
+    fetch('/api/corrections', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ original: lowerOriginal, corrected })
+    }).catch(() => {});
   }
 
   private saveCorrections() {
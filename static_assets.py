@@ -0,0 +1,184 @@
+import os
+import re
+import sys
+import gzip
+import hashlib
+import mimetypes
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# ----------------------------
+# 1. Configuration
+# ----------------------------
+# Vite emits content-hashed names such as index-BjqSSsyA.js, which never change
+# contents and can be cached forever. Everything else must be revalidated.
+HASHED_ASSET_PATTERN = re.compile(r'-[A-Za-z0-9_]{8}\.[a-z0-9]+$')
+COMPRESSIBLE_EXTENSIONS = {'.js', '.css', '.html', '.svg', '.json', '.txt', '.map', '.xml'}
+MIN_COMPRESS_BYTES = 512
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+# ----------------------------
+# 2. Build-time precompression
+# ----------------------------
+def precompress(root: str) -> int:
+    """Write .gz (and .br when brotli is installed) next to every compressible file"""
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in COMPRESSIBLE_EXTENSIONS or os.path.getsize(path) < MIN_COMPRESS_BYTES:
+                continue
+
+            with open(path, 'rb') as f:
+                raw = f.read()
+
+            variants = {'.gz': gzip.compress(raw, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(raw, quality=11)
+
+            for suffix, data in variants.items():
+                # Only keep a variant if it actually saves bytes
+                if len(data) < len(raw):
+                    with open(path + suffix, 'wb') as f:
+                        f.write(data)
+                    written += 1
+    return written
+
+
+# ----------------------------
+# 3. Runtime serving
+# ----------------------------
+class StaticAsset:
+    __slots__ = ('path', 'mimetype', 'etag', 'cache_control', 'variants')
+
+    def __init__(self, path, mimetype, etag, cache_control, variants):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+        # encoding ('identity', 'gzip', 'br') -> file path on disk
+        self.variants = variants
+
+
+class StaticAssetServer:
+    """Serves a built frontend from an index computed once at startup"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.assets = {}
+        self.index_html = None
+        self.index_etag = None
+        self._bodies = {}
+        self.reload()
+
+    def reload(self):
+        """Rebuild the file index and the in-memory index.html"""
+        assets = {}
+        if os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if name.endswith(('.gz', '.br')):
+                        continue
+                    full_path = os.path.join(dirpath, name)
+                    rel_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                    assets[rel_path] = self._describe(full_path, rel_path)
+        self.assets = assets
+        self._bodies = {}
+
+        index_path = os.path.join(self.root, 'index.html')
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                self.index_html = f.read()
+            self.index_etag = hashlib.md5(self.index_html).hexdigest()
+        else:
+            self.index_html = None
+            self.index_etag = None
+
+    def _describe(self, full_path, rel_path):
+        stat = os.stat(full_path)
+        # Size + mtime is enough to detect a rebuild without hashing every file
+        etag = '%x-%x' % (int(stat.st_mtime), stat.st_size)
+        mimetype = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        if mimetype.startswith('text/') or mimetype in ('application/javascript', 'image/svg+xml'):
+            mimetype += '; charset=utf-8'
+        cache_control = (IMMUTABLE_CACHE_CONTROL if HASHED_ASSET_PATTERN.search(rel_path)
+                         else REVALIDATE_CACHE_CONTROL)
+
+        variants = {'identity': full_path}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(full_path + suffix):
+                variants[encoding] = full_path + suffix
+        return StaticAsset(full_path, mimetype, etag, cache_control, variants)
+
+    def serve_index(self, request):
+        if self.index_html is None:
+            return None
+        if request.if_none_match.contains(self.index_etag):
+            return self._not_modified(self.index_etag, REVALIDATE_CACHE_CONTROL)
+        response = Response(self.index_html, mimetype='text/html')
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        response.set_etag(self.index_etag)
+        return response
+
+    def serve(self, path, request):
+        """Return a Response for path, or None if it is not part of the build"""
+        asset = self.assets.get(path)
+        if asset is None:
+            return None
+
+        encoding = 'identity'
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and candidate in request.accept_encodings:
+                encoding = candidate
+                break
+
+        # Each encoding is a different representation, so it gets its own ETag
+        etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+        if request.if_none_match.contains(etag):
+            return self._not_modified(etag, asset.cache_control)
+
+        body = self._bodies.get(asset.variants[encoding])
+        if body is None:
+            with open(asset.variants[encoding], 'rb') as f:
+                body = f.read()
+            # Hashed assets never change for the lifetime of a build, keep them in memory
+            if asset.cache_control == IMMUTABLE_CACHE_CONTROL:
+                self._bodies[asset.variants[encoding]] = body
+
+        response = Response(body)
+        response.headers['Content-Type'] = asset.mimetype
+        response.headers['Cache-Control'] = asset.cache_control
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _not_modified(etag, cache_control):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+
+if __name__ == '__main__':
+    # Build step: python static_assets.py dist
+    target = sys.argv[1] if len(sys.argv) > 1 else 'dist'
+    count = precompress(target)
+    print(f"✅ Wrote {count} precompressed files under {target}"
+          + ("" if brotli else " (brotli not installed, gzip only)"))
@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from list_updates import ListNotFound, VersionConflict, apply_patch, parse_patch, patched_list
+
+# ----------------------------
+# 1. Settings
+# ----------------------------
+# STORAGE_BACKEND=mongo (default) keeps everything in MongoDB. sqlite stores
+# saved lists, the parse cache and corrections in one local file, for shops
+# that run the whole app on a single box without a MongoDB.
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mongo')
+# The database app.py, the reporting worker and the backfill CLIs all use
+MONGODB_DATABASE = 'grocery_db'
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/grocery.db')
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 5))
+PARSE_CACHE_TTL = float(os.getenv('PARSE_CACHE_TTL', 86400))     # seconds; 0 turns the cache off
+DUPLICATE_KEY = 11000
+
+
+def _day_range(day):
+    """created_at strings ('YYYY-MM-DD HH:MM:SS') of one day fall in [day, next day)"""
+    next_day = datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)
+    return day, next_day.strftime('%Y-%m-%d')
+
+
+# ----------------------------
+# 2. MongoDB
+# ----------------------------
+class MongoStore:
+    """Lists in db.lists, parse results in db.parse_cache, corrections in db.corrections"""
+
+    backend = 'mongodb'
+
+    def __init__(self, db):
+        self.db = db
+        self.lists = db.lists
+
+    def ensure_indexes(self):
+        # Sparse: lists saved without an idempotency key (older clients) are not constrained
+        self.lists.create_index([('idempotencyKey', ASCENDING)], unique=True, sparse=True)
+        self.lists.create_index([('billNumber', ASCENDING)])
+        self.db.parse_cache.create_index([('expires_at', ASCENDING)], expireAfterSeconds=0)
+        self.db.corrections.create_index([('original', ASCENDING), ('corrected', ASCENDING)], unique=True)
+
+    def ping(self):
+        self.db.command('ping')
+
+    # Lists
+    def insert_list(self, doc):
+        """Insert one list; sets and returns doc['_id']"""
+        return self.lists.insert_one(doc).inserted_id
+
+    def insert_new_lists(self, docs):
+        """Insert a batch; returns the indexes skipped because their idempotencyKey was stored"""
+        duplicates = set()
+        try:
+            # Unordered: one duplicate does not stop the rest of the batch
+            self.lists.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') != DUPLICATE_KEY:
+                    raise
+                duplicates.add(error['index'])
+        return duplicates
+
+    def lists_by_key(self, keys):
+        return {doc['idempotencyKey']: doc for doc in self.lists.find({'idempotencyKey': {'$in': list(keys)}})}
+
+    def get_list(self, list_id):
+        try:
+            return self.lists.find_one({'_id': ObjectId(list_id)}, {'pending_changes': 0, 'reported_version': 0})
+        except (InvalidId, TypeError):
+            return None
+
+    def patch_list(self, list_id, patch):
+        return apply_patch(self.lists, list_id, patch)
+
+    def list_by_bill(self, bill_number):
+        return self.lists.find_one({'billNumber': bill_number}, {'_id': 0})
+
+    def lists_for_day(self, day):
+        start, end = _day_range(day)
+        return self.lists.find({'created_at': {'$gte': start, '$lt': end}}, {'_id': 0})
+
+    def name_counts(self, field, limit):
+        """[(name, times saved)] for an item field ('itemName' or 'brand'), most saved first"""
+        pipeline = [
+            {'$unwind': '$items'},
+            {'$match': {f'items.{field}': {'$nin': ['', None]}}},
+            {'$group': {'_id': f'$items.{field}', 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1}},
+            {'$limit': limit},
+        ]
+        return [(row['_id'], row['count']) for row in self.lists.aggregate(pipeline) if isinstance(row['_id'], str)]
+
+    # Parse cache
+    def cached_parse(self, key):
+        doc = self.db.parse_cache.find_one({'_id': key})
+        # The TTL monitor only runs once a minute, so check the expiry here too
+        if doc is None or doc['expires_at'].replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc):
+            return None
+        return doc['value']
+
+    def cache_parse(self, key, value, ttl=PARSE_CACHE_TTL):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        self.db.parse_cache.replace_one({'_id': key}, {'value': value, 'expires_at': expires_at}, upsert=True)
+
+    # Corrections
+    def record_correction(self, original, corrected):
+        self.db.corrections.update_one(
+            {'original': original, 'corrected': corrected},
+            {'$inc': {'frequency': 1}, '$set': {'updated_at': datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+    def corrections(self, limit=100):
+        cursor = self.db.corrections.find({}, {'_id': 0, 'updated_at': 0}).sort('frequency', DESCENDING)
+        return list(cursor.limit(limit))
+
+
+# ----------------------------
+# 3. SQLite
+# ----------------------------
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS lists (
+    id TEXT PRIMARY KEY,
+    bill_number TEXT,
+    created_at TEXT,
+    idempotency_key TEXT UNIQUE,
+    version INTEGER NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lists_bill_number ON lists (bill_number);
+CREATE INDEX IF NOT EXISTS lists_created_at ON lists (created_at);
+CREATE TABLE IF NOT EXISTS parse_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS corrections (
+    original TEXT NOT NULL,
+    corrected TEXT NOT NULL,
+    frequency INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (original, corrected)
+);
+'''
+
+INSERT_LIST = ('INSERT OR IGNORE INTO lists (id, bill_number, created_at, idempotency_key, version, doc) '
+               'VALUES (?, ?, ?, ?, ?, ?)')
+NAME_COUNTS = '''
+SELECT json_extract(item.value, '$.{field}') AS name, COUNT(*) AS count
+FROM lists, json_each(lists.doc, '$.items') AS item
+WHERE name IS NOT NULL AND name != '' AND item.type = 'object'
+GROUP BY name ORDER BY count DESC LIMIT ?
+'''
+
+
+class SQLiteStore:
+    """The same operations on one SQLite file in WAL mode
+
+    Readers never block the writer and vice versa; with synchronous=NORMAL a commit
+    only appends to the WAL (no fsync), so a single-row write takes microseconds.
+    Each thread (and each forked worker) gets its own connection, and sqlite3
+    keeps the prepared statements of every fixed SQL string below per connection.
+    Batches run in one BEGIN IMMEDIATE transaction.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None,
+                                   check_same_thread=False, cached_statements=64)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so a read-then-write cannot deadlock
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def ensure_indexes(self):
+        self._conn().executescript(SCHEMA)
+
+    def ping(self):
+        self._conn().execute('SELECT 1').fetchone()
+
+    @staticmethod
+    def _row(doc):
+        body = {key: value for key, value in doc.items() if key not in ('_id', 'version')}
+        return (doc['_id'], doc.get('billNumber'), doc.get('created_at'), doc.get('idempotencyKey'),
+                doc.get('version', 0), json.dumps(body, default=str, ensure_ascii=False))
+
+    @staticmethod
+    def _doc(row, with_id=True):
+        doc = json.loads(row['doc'])
+        doc['version'] = row['version']
+        if with_id:
+            doc['_id'] = row['id']
+        return doc
+
+    # Lists
+    def insert_list(self, doc):
+        """Insert one list; sets and returns doc['_id'] (an ObjectId string, like MongoDB's ids)"""
+        doc['_id'] = str(ObjectId())
+        if self._conn().execute(INSERT_LIST, self._row(doc)).rowcount == 0:
+            # The same exception MongoStore gets from its unique index
+            raise DuplicateKeyError(f"idempotencyKey {doc.get('idempotencyKey')!r} is already stored", DUPLICATE_KEY)
+        return doc['_id']
+
+    def insert_new_lists(self, docs):
+        """Insert a batch in one transaction; returns the indexes skipped as duplicates"""
+        for doc in docs:
+            doc['_id'] = str(ObjectId())
+        with self._transaction() as conn:
+            conn.executemany(INSERT_LIST, [self._row(doc) for doc in docs])
+            keys = [doc['idempotencyKey'] for doc in docs if doc.get('idempotencyKey')]
+            stored = dict(conn.execute(
+                f"SELECT idempotency_key, id FROM lists WHERE idempotency_key IN ({','.join('?' * len(keys))})",
+                keys).fetchall()) if keys else {}
+        # OR IGNORE skipped a row when the key now belongs to another id
+        return {index for index, doc in enumerate(docs)
+                if doc.get('idempotencyKey') and stored.get(doc['idempotencyKey']) != doc['_id']}
+
+    def lists_by_key(self, keys):
+        keys = list(keys)
+        rows = self._conn().execute(
+            f"SELECT * FROM lists WHERE idempotency_key IN ({','.join('?' * len(keys))})", keys)
+        return {row['idempotency_key']: self._doc(row) for row in rows}
+
+    def get_list(self, list_id):
+        row = self._conn().execute('SELECT * FROM lists WHERE id = ?', (list_id,)).fetchone()
+        return self._doc(row) if row else None
+
+    def patch_list(self, list_id, patch):
+        """Apply a patch atomically; returns {'version': new version, 'added': [itemIds]}"""
+        parsed = parse_patch(patch)
+        with self._transaction() as conn:
+            row = conn.execute('SELECT * FROM lists WHERE id = ?', (list_id,)).fetchone()
+            if row is None:
+                raise ListNotFound(list_id)
+            if row['version'] != parsed['version']:
+                raise VersionConflict(row['version'])
+            doc = patched_list(self._doc(row), parsed)
+            conn.execute('UPDATE lists SET version = ?, doc = ? WHERE id = ?', self._row(doc)[4:] + (list_id,))
+        return {'version': doc['version'], 'added': [item['itemId'] for item in parsed['add']]}
+
+    def list_by_bill(self, bill_number):
+        row = self._conn().execute('SELECT * FROM lists WHERE bill_number = ? LIMIT 1', (bill_number,)).fetchone()
+        return self._doc(row, with_id=False) if row else None
+
+    def lists_for_day(self, day):
+        rows = self._conn().execute(
+            'SELECT * FROM lists WHERE created_at >= ? AND created_at < ? ORDER BY created_at', _day_range(day))
+        return (self._doc(row, with_id=False) for row in rows)
+
+    def name_counts(self, field, limit):
+        if field not in ('itemName', 'brand'):
+            raise ValueError(f'unknown item field {field!r}')
+        rows = self._conn().execute(NAME_COUNTS.format(field=field), (limit,))
+        return [(row['name'], row['count']) for row in rows if isinstance(row['name'], str)]
+
+    # Parse cache
+    def cached_parse(self, key):
+        row = self._conn().execute('SELECT value FROM parse_cache WHERE key = ? AND expires_at > ?',
+                                   (key, time.time())).fetchone()
+        return json.loads(row['value']) if row else None
+
+    def cache_parse(self, key, value, ttl=PARSE_CACHE_TTL):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO parse_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                         (key, json.dumps(value, ensure_ascii=False), now + ttl))
+            # No TTL monitor here; expired rows go on the next write to the cache
+            conn.execute('DELETE FROM parse_cache WHERE expires_at <= ?', (now,))
+
+    # Corrections
+    def record_correction(self, original, corrected):
+        self._conn().execute(
+            'INSERT INTO corrections (original, corrected, frequency, updated_at) VALUES (?, ?, 1, ?) '
+            'ON CONFLICT (original, corrected) DO UPDATE SET frequency = frequency + 1, updated_at = excluded.updated_at',
+            (original, corrected, time.time()))
+
+    def corrections(self, limit=100):
+        rows = self._conn().execute(
+            'SELECT original, corrected, frequency FROM corrections ORDER BY frequency DESC LIMIT ?', (limit,))
+        return [dict(row) for row in rows]
+
+
+def create_storage(db=None, backend=STORAGE_BACKEND):
+    """Build the store from STORAGE_BACKEND (mongo, sqlite); callers run ensure_indexes() once at startup"""
+    if backend == 'sqlite':
+        return SQLiteStore()
+    if backend == 'mongo':
+        return MongoStore(db)
+    raise ValueError(f'STORAGE_BACKEND must be mongo or sqlite, not {backend!r}')
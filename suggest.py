@@ -0,0 +1,253 @@
+import os
+import time
+import threading
+from bisect import insort
+
+from catalog import load_catalog
+
+# ----------------------------
+# 1. Settings
+# ----------------------------
+SUGGEST_TOP = int(os.getenv('SUGGEST_TOP', 10))                     # completions kept per trie node
+SUGGEST_REFRESH_SECONDS = float(os.getenv('SUGGEST_REFRESH_SECONDS', 300))
+SUGGEST_HISTORY_LIMIT = int(os.getenv('SUGGEST_HISTORY_LIMIT', 50000))  # distinct saved names read per field
+CATALOG_WEIGHT = 1                                                   # a catalog entry counts as one save
+
+FIELDS = {'item': 'itemName', 'brand': 'brand'}
+
+
+def _key(text) -> str:
+    return ' '.join(str(text or '').lower().split())
+
+
+# ----------------------------
+# 2. Compressed trie
+# ----------------------------
+class _Node:
+    __slots__ = ('edges', 'top')
+
+    def __init__(self, top=()):
+        self.edges = {}        # first char -> (edge label, child); replaced, never mutated
+        self.top = list(top)   # best (-weight, term) completions below this node
+
+
+class RadixTrie:
+    """Prefix trie with path compression; every node caches its top-k completions
+
+    Lookups walk at most len(prefix) characters and return the cached list, so they
+    cost the same for 100 or 100k terms. Weights only grow (saves add to them), so
+    the per-node lists stay exact under incremental inserts.
+    """
+
+    def __init__(self, top=SUGGEST_TOP):
+        self.root = _Node()
+        self.k = top
+        self.weights = {}
+        self.display = {}
+
+    def __len__(self):
+        return len(self.weights)
+
+    def add(self, text, weight=1):
+        """Add weight to a term; it is found by its start and by the start of each later word"""
+        term = self._record(text, weight)
+        if term:
+            for path in self._paths(term):
+                self._insert(path, term, self.weights[term])
+
+    @classmethod
+    def build(cls, weighted_names, top=SUGGEST_TOP):
+        """Bulk load [(name, weight), ...]; ranks every node once instead of per insert"""
+        trie = cls(top)
+        for name, weight in weighted_names:
+            trie._record(name, weight)
+        ends = {}
+        for term in trie.weights:
+            for path in trie._paths(term):
+                ends.setdefault(trie._insert(path, term, None), []).append(term)
+
+        # Children before parents, so each node merges its children's finished lists
+        order, stack = [], [trie.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for _, child in node.edges.values())
+        weights = trie.weights
+        for node in reversed(order):
+            candidates = set(ends.get(node, ()))
+            for _, child in node.edges.values():
+                candidates.update(term for _, term in child.top)
+            node.top = sorted((-weights[term], term) for term in candidates)[:trie.k]
+        return trie
+
+    def _record(self, text, weight):
+        term = _key(text)
+        if term:
+            self.display.setdefault(term, ' '.join(str(text).split()))
+            self.weights[term] = self.weights.get(term, 0) + weight
+        return term
+
+    @staticmethod
+    def _paths(term):
+        words = term.split(' ')
+        return [' '.join(words[index:]) for index in range(len(words))]
+
+    def _insert(self, path, term, weight):
+        """Walk/extend the path for one term; weight=None skips ranking (bulk build). Returns the end node"""
+        node = self.root
+        self._offer(node, term, weight)
+        while path:
+            edge = node.edges.get(path[0])
+            if edge is None:
+                child = _Node()
+                self._offer(child, term, weight)
+                node.edges[path[0]] = (path, child)
+                return child
+            label, child = edge
+            if path.startswith(label):
+                common = len(label)
+            else:
+                common = 1
+                while common < len(path) and label[common] == path[common]:
+                    common += 1
+            if common < len(label):
+                # Split the edge; the new middle node covers exactly the old child's terms.
+                # It is complete before one dict assignment publishes it, so a lock-free
+                # reader sees either the old edge or the new one, never a mix.
+                middle = _Node(child.top)
+                middle.edges[label[common]] = (label[common:], child)
+                node.edges[path[0]] = (label[:common], middle)
+                child = middle
+            node = child
+            path = path[common:]
+            self._offer(node, term, weight)
+        return node
+
+    def _offer(self, node, term, weight):
+        if weight is None:
+            return
+        entry = (-weight, term)
+        top = node.top
+        # Weights only grow, so a term ranking below a full list cannot already be in it
+        if len(top) >= self.k and entry > top[-1]:
+            return
+        top = [e for e in top if e[1] != term]
+        insort(top, entry)
+        # Replaced, not mutated, so lock-free readers always see a whole list
+        node.top = top[:self.k]
+
+    def complete(self, prefix, limit=SUGGEST_TOP):
+        """[(display, weight), ...] best first, for terms containing a word starting with prefix"""
+        node, path = self.root, _key(prefix)
+        while path:
+            edge = node.edges.get(path[0])
+            if edge is None:
+                return []
+            label, child = edge
+            if path.startswith(label):
+                path = path[len(label):]
+            elif label.startswith(path):
+                path = ''
+            else:
+                return []
+            node = child
+        return [(self.display[term], -weight) for weight, term in node.top[:limit]]
+
+
+# ----------------------------
+# 3. Suggestion index
+# ----------------------------
+class Suggester:
+    """Item and brand typeahead: catalog plus saved-list history, refreshed in the background"""
+
+    def __init__(self, storage, catalog=None, refresh_seconds=SUGGEST_REFRESH_SECONDS):
+        self.storage = storage
+        self.catalog = catalog
+        self.refresh_seconds = refresh_seconds
+        self.tries = None
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+        # Reentrant: _current() holds it around the first build, and build() takes it too
+        self._build_lock = threading.RLock()
+        self._refreshing = False
+        # Lists saved while a build reads the store, replayed into the new tries before the swap
+        self._pending = None
+
+    def build(self):
+        """Rebuild both tries from the catalog and the saved lists, then swap them in
+
+        Lists added while the store is read are replayed into the new tries, so none is
+        lost; one saved just before the read may be counted twice until the next build.
+        """
+        with self._build_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                tries = self._read_tries()
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                for shopping_list in self._pending:
+                    self._add(tries, shopping_list)
+                self._pending = None
+                self.tries = tries
+                self.built_at = time.time()
+        return tries
+
+    def _read_tries(self):
+        start = time.perf_counter()
+        catalog = self.catalog or load_catalog()
+        tries = {}
+        for field, item_key in FIELDS.items():
+            names = [(name, CATALOG_WEIGHT) for name in catalog['product' if field == 'item' else 'brand']]
+            try:
+                names.extend(self.storage.name_counts(item_key, SUGGEST_HISTORY_LIMIT))
+            except Exception as e:
+                print(f"⚠️ Suggestions built without saved-list history for {field}: {e}")
+            tries[field] = RadixTrie.build(names)
+        print(f"✅ Suggestion tries built: {len(tries['item'])} items, {len(tries['brand'])} brands "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return tries
+
+    def _refresh(self):
+        try:
+            self.build()
+        except Exception as e:
+            print(f"❌ Suggestion refresh failed: {e}")
+        finally:
+            self._refreshing = False
+
+    def _current(self):
+        if self.tries is None:
+            with self._build_lock:
+                if self.tries is None:
+                    self.build()
+        elif time.time() - self.built_at > self.refresh_seconds and not self._refreshing:
+            # Saves in other workers reach this one through the periodic rebuild
+            self._refreshing = True
+            threading.Thread(target=self._refresh, name='suggest-refresh', daemon=True).start()
+        return self.tries
+
+    def suggest(self, field, prefix, limit=SUGGEST_TOP):
+        if field not in FIELDS:
+            raise ValueError(f"field must be one of {', '.join(FIELDS)}")
+        return [{'text': text, 'count': count}
+                for text, count in self._current()[field].complete(prefix, limit)]
+
+    def add_list(self, shopping_list):
+        """Fold a just-saved list into the tries of this worker"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(shopping_list)
+            if self.tries is not None:
+                self._add(self.tries, shopping_list)
+
+    @staticmethod
+    def _add(tries, shopping_list):
+        for item in shopping_list.get('items') or []:
+            for field, item_key in FIELDS.items():
+                name = item.get(item_key) if isinstance(item, dict) else None
+                if isinstance(name, str) and name.strip():
+                    tries[field].add(name)
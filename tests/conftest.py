@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# analyser.py builds its Azure OpenAI client at import; the tests never let it reach the network
+os.environ.setdefault('AZURE_OPENAI_ENDPOINT', 'http://azure-openai.invalid')
+os.environ.setdefault('AZURE_OPENAI_API_KEY', 'test-key')
+os.environ.setdefault('AZURE_OPENAI_DEPLOYMENT_NAME', 'test-deployment')
+# app.py runs on a scratch SQLite store, so no MongoDB is needed
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='grocery-tests-'), 'grocery.db'))
+os.environ.setdefault('MONGODB_URI', 'mongodb://localhost:1/?serverSelectionTimeoutMS=50')
+os.environ.setdefault('HEALTH_LLM_PROBE', 'off')
+os.environ.setdefault('REPORTING_WORKER', 'off')
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
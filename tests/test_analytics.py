@@ -0,0 +1,64 @@
+import mongomock
+import pytest
+
+import analytics
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    analytics.ensure_indexes(db)
+    return db
+
+
+def _list(day, shop, *items):
+    return {'created_at': f'{day} 10:00:00', 'favoriteShop': shop, 'items': list(items)}
+
+
+def test_repeated_items_in_a_list_collapse_into_one_update():
+    operations = analytics.rollup_operations(_list(
+        '2026-09-01', ' Corner  Shop ',
+        {'itemName': 'Rice', 'quantity': '2', 'unit': 'kg'},
+        {'itemName': 'rice', 'quantity': '500', 'unit': 'g', 'priority': 'bogus'},
+        {'itemName': '', 'quantity': '1'},
+    ))
+    assert len(operations) == 1
+    assert operations[0]._filter == {'day': '2026-09-01', 'shop': 'corner shop', 'itemName': 'rice',
+                                     'priority': 'MEDIUM', 'unit': 'g'}
+    assert operations[0]._doc == {'$inc': {'count': 2, 'quantity': 2500.0}}
+
+
+def test_top_items_reads_the_window_shop_and_priority(db):
+    analytics.record_list(db, _list('2026-09-01', 'corner', {'itemName': 'rice', 'quantity': '1', 'unit': 'kg'},
+                                    {'itemName': 'tea', 'priority': 'HIGH'}))
+    analytics.record_list(db, _list('2026-09-02', 'corner', {'itemName': 'rice', 'quantity': '1', 'unit': 'kg'}))
+    analytics.record_list(db, _list('2026-09-02', 'mall', {'itemName': 'milk'}))
+    analytics.record_list(db, _list('2026-08-01', 'corner', {'itemName': 'sugar'}))
+
+    rows = analytics.top_items(db, shop='Corner', days=7, end_day='2026-09-02')
+    assert [(row['itemName'], row['count'], row['quantity']) for row in rows] == [('rice', 2, 2000.0), ('tea', 1, 0.0)]
+    assert [row['itemName'] for row in analytics.top_items(db, priority='high', end_day='2026-09-02')] == ['tea']
+    assert [row['itemName'] for row in analytics.top_items(db, days=1, end_day='2026-09-02', limit=1)] == ['rice']
+    with pytest.raises(ValueError):
+        analytics.top_items(db, priority='urgent', end_day='2026-09-02')
+
+
+def test_top_items_endpoint_refuses_unknown_priorities(app_module, client, db, monkeypatch):
+    monkeypatch.setattr(app_module, 'db', db)
+    assert client.get('/api/analytics/top-items?priority=bogus').status_code == 400
+    assert client.get('/api/analytics/top-items?priority=high').status_code == 200
+
+
+def test_rebuild_matches_incremental_rollups(db):
+    lists = [_list('2026-09-01', 'corner', {'itemName': 'rice', 'quantity': '1', 'unit': 'kg'}),
+             _list('2026-09-01', 'corner', {'itemName': 'rice', 'quantity': '2', 'unit': 'kg'})]
+    for shopping_list in lists:
+        analytics.record_list(db, shopping_list)
+    incremental = analytics.top_items(db, end_day='2026-09-01')
+    db.lists.insert_many([dict(shopping_list) for shopping_list in lists])
+    assert analytics.rebuild(db) == 2
+    assert analytics.top_items(db, end_day='2026-09-01') == incremental
+    # Built aside and swapped in: the live collection keeps its unique index, nothing is left over
+    assert db.list_collection_names().count(analytics.ROLLUP_COLLECTION) == 1
+    assert not [name for name in db.list_collection_names() if '_rebuild_' in name]
+    assert any(index.get('unique') for index in db[analytics.ROLLUP_COLLECTION].index_information().values())
@@ -0,0 +1,79 @@
+import pytest
+
+from rate_limit import MemoryBucketStore, RateLimiter
+from shopping_item import ShoppingItem
+
+
+@pytest.fixture
+def limiter(app_module, monkeypatch):
+    limiter = RateLimiter(MemoryBucketStore(), {'llm': (2, 0.001), 'local': (100, 0.001), 'llm_tokens': None})
+    monkeypatch.setattr(app_module, 'rate_limiter', limiter)
+    monkeypatch.setattr(app_module, 'PARSE_CACHE_TTL', 0)
+    return limiter
+
+
+@pytest.fixture
+def llm_calls(app_module, monkeypatch):
+    """The llm engine answers without Azure; returns the texts it was asked"""
+    calls = []
+
+    def analyze(text):
+        calls.append(text)
+        return ShoppingItem(itemName='rice', quantity='1', unit='kg', description=text)
+    monkeypatch.setattr(app_module.engine_router.registry.get('llm'), 'analyze', analyze)
+    return calls
+
+
+def _tokens(limiter, budget, key):
+    return limiter.store._buckets[f'{budget}:{key}'][0]
+
+
+def test_headers_are_ignored_without_a_trusted_proxy(app_module, client, limiter, llm_calls, monkeypatch):
+    monkeypatch.setattr(app_module, 'TRUSTED_PROXIES', [])
+    for forged in ('a', 'b', 'c'):
+        response = client.post('/api/analyze', json={'text': '1 kg rice', 'engine': 'llm'},
+                               headers={'X-Client-Id': forged, 'X-Forwarded-For': forged})
+    assert response.status_code == 429
+    assert len(llm_calls) == 2
+
+
+def test_trusted_proxy_forwards_the_client(app_module, client, limiter, llm_calls, monkeypatch):
+    import ipaddress
+    monkeypatch.setattr(app_module, 'TRUSTED_PROXIES', [ipaddress.ip_network('127.0.0.0/8')])
+    for forwarded in ('198.51.100.1', '198.51.100.2', '198.51.100.3'):
+        response = client.post('/api/analyze', json={'text': '1 kg rice', 'engine': 'llm'},
+                               headers={'X-Forwarded-For': f'203.0.113.9, {forwarded}'})
+        assert response.status_code == 200
+    assert set(key.split(':', 1)[1] for key in limiter.store._buckets) == {'198.51.100.1', '198.51.100.2', '198.51.100.3'}
+
+
+def test_multi_mode_is_charged_per_llm_call(client, limiter, llm_calls):
+    limiter.budgets['llm'] = (3, 0.001)
+    response = client.post('/api/analyze', json={'text': '1 kg rice and 2 kg sugar and 3 kg dal',
+                                                 'engine': 'llm', 'mode': 'multi'})
+    assert response.status_code == 200
+    assert len(llm_calls) == 3
+    response = client.post('/api/analyze', json={'text': '1 kg rice', 'engine': 'llm'})
+    assert response.status_code == 429
+
+
+def test_tiered_escalations_use_the_llm_budget(client, limiter, llm_calls):
+    statuses = [client.post('/api/analyze', json={'text': 'something nice for dinner', 'engine': 'tiered'}).status_code
+                for _ in range(4)]
+    # Every request is answered; only two of them could escalate
+    assert statuses == [200] * 4
+    assert len(llm_calls) == 2
+
+
+def test_llm_token_refunded_when_token_budget_refuses(app_module, client, limiter, llm_calls):
+    limiter.budgets['llm_tokens'] = (1000, 0.001)
+    limiter.hit('llm_tokens', 'global', 1000)
+    response = client.post('/api/analyze', json={'text': '1 kg rice', 'engine': 'llm'})
+    assert response.status_code == 429
+    assert _tokens(limiter, 'llm', '127.0.0.1') == pytest.approx(2, abs=0.01)
+
+
+def test_unknown_engine_is_refused_before_charging(client, limiter):
+    response = client.post('/api/analyze', json={'text': '1 kg rice', 'engine': 'nope'})
+    assert response.status_code == 400
+    assert not limiter.store._buckets
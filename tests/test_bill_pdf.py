@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+from bill_pdf import PDFCache, bill_fingerprint, get_bill_pdf, render_bills_archive, safe_filename
+
+BILL = {'billNumber': 'PDF-1', 'created_at': '2026-09-01 10:00:00', 'customerName': 'A & B <co>',
+        'favoriteShop': 'corner', 'items': [{'itemName': 'rice', 'quantity': '2', 'unit': 'kg',
+                                             'details': 'long grain <basmati>'}]}
+
+
+def test_fingerprint_only_tracks_printed_fields():
+    assert bill_fingerprint(BILL) == bill_fingerprint(dict(BILL, _id='x', version=3))
+    assert bill_fingerprint(BILL) != bill_fingerprint(dict(BILL, customerName='C'))
+
+
+def test_non_dict_items_are_skipped():
+    bill = dict(BILL, items=BILL['items'] + ['sugar', None])
+    assert bill_fingerprint(bill) == bill_fingerprint(BILL)
+    assert get_bill_pdf(bill, PDFCache()).startswith(b'%PDF')
+    assert get_bill_pdf(dict(BILL, items=None), PDFCache()).startswith(b'%PDF')
+
+
+def test_bill_numbers_are_made_safe_for_file_names():
+    assert safe_filename('PDF-1') == 'PDF-1'
+    assert safe_filename('a"; filename=x\r\n/../b') == 'a_filename_x_.._b'
+    assert safe_filename('../..') == 'bill'
+
+
+def test_pdfs_are_rendered_once_per_content():
+    cache = PDFCache()
+    pdf = get_bill_pdf(BILL, cache)
+    assert pdf.startswith(b'%PDF')
+    assert get_bill_pdf(dict(BILL), cache) is pdf
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    cache = PDFCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    cache.get('a')
+    cache.put('c', b'1234')
+    assert cache.get('b') is None and cache.get('a') and cache.get('c')
+    cache.put('huge', b'x' * 11)
+    assert cache.get('huge') is None and cache.stats()['bytes'] == 8
+
+
+def test_archive_holds_one_pdf_per_bill():
+    archive = render_bills_archive([BILL, dict(BILL, billNumber='PDF-2')], PDFCache())
+    with zipfile.ZipFile(io.BytesIO(archive)) as zipped:
+        assert zipped.namelist() == ['PDF-1.pdf', 'PDF-2.pdf']
+
+
+def test_archive_names_repeated_bill_numbers_apart():
+    other = dict(BILL, customerName='C')
+    archive = render_bills_archive([BILL, other, BILL], PDFCache())
+    with zipfile.ZipFile(io.BytesIO(archive)) as zipped:
+        names = zipped.namelist()
+    assert names == ['PDF-1.pdf', f'PDF-1-{bill_fingerprint(other)[:12]}.pdf',
+                     f'PDF-1-{bill_fingerprint(BILL)[:12]}.pdf']
+
+
+def test_pdf_endpoint(client):
+    client.post('/api', json={'billNumber': 'PDF-API-1', 'items': [{'itemName': 'tea'}]})
+    response = client.get('/api/lists/PDF-API-1/pdf')
+    assert response.status_code == 200 and response.data.startswith(b'%PDF')
+    assert client.get('/api/lists/PDF-MISSING/pdf').status_code == 404
+    client.post('/api', json={'billNumber': 'PDF "2"', 'items': [{'itemName': 'tea'}, 'milk']})
+    response = client.get('/api/lists/PDF "2"/pdf')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename="PDF_2.pdf"'
@@ -0,0 +1,130 @@
+import pytest
+
+import local_nlp
+from llm_scheduler import BULK, current_request
+from engines import EngineRouter, ParserAdapter, ParserEngine, TieredEngine, default_registry, parse_split
+from regex_parser import RegexItemParser
+
+
+class FixedEngine(ParserEngine):
+    def __init__(self, name, result):
+        self.name = name
+        self.result = result
+        self.seen = []
+
+    def analyze(self, text):
+        self.seen.append(text)
+        return dict(self.result, description=text)
+
+
+@pytest.mark.parametrize('text, name', [
+    ('need 5 packets of maggi urgent', 'Maggi'),
+    ('I want 2 kg basmati rice asap', 'basmati rice'),
+    ('please bring 1 litre milk', 'milk'),
+])
+def test_regex_item_name_drops_request_and_urgency_words(text, name):
+    assert RegexItemParser().analyze(text)['itemName'] == name
+
+
+def test_regex_reads_thousands_separators():
+    item = RegexItemParser().analyze('buy 1,000 ml oil')
+    assert (item['itemName'], item['quantity'], item['unit'], item['canonicalQuantity']) == ('oil', '1,000', 'ml', 1000.0)
+
+
+@pytest.mark.parametrize('text, priority', [
+    ('2 low fat paneer', 'MEDIUM'),
+    ('1 kg high protein oats', 'MEDIUM'),
+    ('2 low fat paneer, low priority', 'LOW'),
+    ('1 kg sugar, can wait', 'LOW'),
+])
+def test_regex_priority_ignores_product_wording(text, priority):
+    assert RegexItemParser().analyze(text)['priority'] == priority
+
+
+def test_is_confident_rejects_stopword_names():
+    base = {'description': 'need 2 kg urgent', 'quantity': '2', 'unit': 'kg'}
+    assert not TieredEngine.is_confident(dict(base, itemName='need urgent'))
+    assert not TieredEngine.is_confident(dict(base, itemName='the'))
+    assert TieredEngine.is_confident(dict(base, itemName='rice'))
+    assert not TieredEngine.is_confident(dict(base, itemName='rice', unit=''))
+
+
+def test_tiered_escalates_only_unsure_results():
+    slow = FixedEngine('llm', {'itemName': 'rice'})
+    engine = TieredEngine('tiered', ParserAdapter('regex', RegexItemParser()), slow)
+    assert engine.analyze('2 kg basmati rice')['itemName'] == 'basmati rice'
+    engine.analyze('need 2 kg urgent')
+    assert slow.seen == ['need 2 kg urgent']
+    assert (engine.calls, engine.escalations) == (2, 1)
+
+
+def test_refused_escalation_keeps_the_fast_answer():
+    slow = FixedEngine('llm', {'itemName': 'rice'})
+    engine = TieredEngine('tiered', ParserAdapter('regex', RegexItemParser()), slow, escalation_gate=lambda text: False)
+    assert engine.analyze('something nice')['itemName'] == 'something nice'
+    assert slow.seen == [] and engine.refused == 1
+
+
+def test_router_choice_and_unknown_engines():
+    registry = default_registry(llm_parser=object())
+    router = EngineRouter(registry, default='regex', split=parse_split('tiered:100'))
+    assert router.choose('llm') == 'llm'
+    assert router.choose('', 'client-a') == 'tiered'
+    assert 'nope' not in registry
+    with pytest.raises(KeyError):
+        router.analyze('1 kg rice', 'nope')
+    name, result = router.analyze('1 kg rice', 'regex')
+    assert (name, result['itemName']) == ('regex', 'rice')
+    assert router.report()['engines']['regex']['calls'] == 1
+
+
+def test_local_parser_loads_spacy_on_first_parse(monkeypatch):
+    calls = []
+    monkeypatch.setattr(local_nlp, 'get_nlp', lambda: calls.append(1))
+    parser = local_nlp.LocalNLPParser()
+    assert calls == []
+    assert parser.analyze('2 kg rice')['itemName'] == 'rice'
+    assert calls == [1]
+
+
+def test_registry_builds_each_engine_once_on_first_use():
+    built = []
+    registry = default_registry(llm_parser=object())
+    registry.register('counted', lambda: built.append(1) or FixedEngine('counted', {}))
+    assert registry.loaded() == {}
+    assert registry.get('counted') is registry.get('counted')
+    assert built == [1]
+    registry.register_class('json-like', 'json:JSONDecoder', 'decode')
+    assert registry.get('json-like').analyze('{"itemName": "rice", "quantity": 2}')['quantity'] == '2'
+
+
+def test_shadow_engine_measures_agreement():
+    registry = default_registry(llm_parser=object())
+    registry.register('reference', lambda: FixedEngine('reference', {'itemName': 'rice', 'quantity': '1',
+                                                                     'unit': 'kg', 'priority': 'HIGH'}))
+    router = EngineRouter(registry, default='regex', shadow='reference', shadow_rate=1.0)
+    router.analyze('1 kg rice')
+    router._shadow_pool.shutdown(wait=True)
+    stats = router.report()['engines']['regex']
+    assert stats['compared'] == 1
+    assert stats['agreement']['itemName'] == 1.0 and stats['agreement']['priority'] == 0.0
+
+
+def test_shadow_parses_pass_the_gate_and_run_as_bulk_work():
+    classes = []
+
+    class Reference(FixedEngine):
+        def analyze(self, text):
+            classes.append(current_request())
+            return super().analyze(text)
+
+    registry = default_registry(llm_parser=object())
+    registry.register('reference', lambda: Reference('reference', {'itemName': 'rice'}))
+    allowed = iter([True, False])
+    router = EngineRouter(registry, default='regex', shadow='reference', shadow_rate=1.0,
+                          shadow_gate=lambda text: next(allowed))
+    router.analyze('1 kg rice')
+    router.analyze('1 kg rice')
+    router._shadow_pool.shutdown(wait=True)
+    assert classes == [(BULK, 'shadow')]
+    assert router.report()['shadows_refused'] == 1
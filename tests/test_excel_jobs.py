@@ -0,0 +1,220 @@
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import excel_jobs
+from excel_jobs import ExcelJobManager, JobNotReady, cleanup_jobs, read_status
+from rate_limit import MemoryBucketStore, RateLimiter
+from regex_parser import RegexItemParser
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_jobs, 'JOBS_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _job(jobs_dir, job_id, **status):
+    os.makedirs(jobs_dir / job_id)
+    status = dict({'id': job_id, 'state': 'done', 'created_at': time.time()}, **status)
+    (jobs_dir / job_id / 'status.json').write_text(json.dumps(status))
+    return job_id
+
+
+def _wait(job_id):
+    deadline = time.time() + 10
+    while read_status(job_id)['state'] in excel_jobs.ACTIVE_STATES:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    return read_status(job_id)
+
+
+def test_uploaded_rows_are_parsed_in_the_background():
+    manager = ExcelJobManager(RegexItemParser(), workers=1)
+    upload = FileStorage(io.BytesIO(b'text\n2 kg rice\n1 litre milk\n'), filename='list.csv')
+    job_id = manager.submit(upload)['id']
+    status = _wait(job_id)
+    assert (status['state'], status['rows_done'], status['rows_total']) == ('done', 2, 2)
+    with open(manager.result_path(job_id, 'csv')) as f:
+        assert 'rice' in f.read()
+
+
+def test_cleanup_deletes_old_finished_jobs(jobs_dir):
+    old = time.time() - excel_jobs.JOB_RETENTION - 1
+    _job(jobs_dir, 'old', finished_at=old)
+    _job(jobs_dir, 'new', finished_at=time.time())
+    _job(jobs_dir, 'queued', state='queued', created_at=old)
+    assert cleanup_jobs() == 1
+    assert sorted(os.listdir(jobs_dir)) == ['new', 'queued']
+
+
+def _orphan(jobs_dir, job_id, rows, **status):
+    stale = time.time() - excel_jobs.JOB_STALE_AFTER - 1
+    _job(jobs_dir, job_id, state='running', created_at=stale, heartbeat_at=stale, **status)
+    (jobs_dir / job_id / 'input.csv').write_text('text\n' + ''.join(f'{row}\n' for row in rows))
+
+
+def test_orphaned_job_resumes_after_its_last_checkpoint(jobs_dir, monkeypatch):
+    monkeypatch.setattr(excel_jobs, 'CHECKPOINT_ROWS', 1)
+    _orphan(jobs_dir, 'abc', ['2 kg rice', '1 litre milk', '3 kg sugar'])
+    fresh = _job(jobs_dir, 'def', state='running', heartbeat_at=time.time())
+    # The lost worker saved the first row, then appended part of the second
+    saved = excel_jobs.results_frame([RegexItemParser().analyze('2 kg rice')]).to_csv(index=False).encode()
+    (jobs_dir / 'abc' / 'partial.csv').write_bytes(saved + b'half a ro')
+    status = dict(read_status('abc'), rows_saved=1, saved_bytes=len(saved))
+    (jobs_dir / 'abc' / 'status.json').write_text(json.dumps(status))
+
+    seen = []
+    manager = ExcelJobManager(RegexItemParser(), workers=1, throttle=seen.append).start()
+    status = _wait('abc')
+    assert (status['state'], status['rows_done'], status['attempts']) == ('done', 3, 2)
+    assert seen == ['1 litre milk', '3 kg sugar']
+    with open(manager.result_path('abc', 'csv')) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 4 and 'half a ro' not in ''.join(lines)
+    assert read_status(fresh)['state'] == 'running'
+    # Another worker looking at the same job does not run it twice
+    assert ExcelJobManager(RegexItemParser()).resume_orphaned() == []
+
+
+def test_job_losing_its_worker_too_often_fails(jobs_dir):
+    _orphan(jobs_dir, 'abc', ['2 kg rice'], attempts=excel_jobs.JOB_MAX_ATTEMPTS)
+    ExcelJobManager(RegexItemParser(), workers=1).start()
+    assert read_status('abc')['state'] == 'failed'
+
+
+def test_released_jobs_are_resumed_at_once(jobs_dir):
+    gate = threading.Event()
+    manager = ExcelJobManager(RegexItemParser(), workers=1, throttle=lambda text: gate.wait(10))
+    upload = FileStorage(io.BytesIO(b'text\n2 kg rice\n1 litre milk\n'), filename='list.csv')
+    job_id = manager.submit(upload)['id']
+    manager.release()
+    gate.set()
+    status = read_status(job_id)
+    assert (status['state'], status['released'], status['heartbeat_at']) == ('queued', True, 0)
+
+    successor = ExcelJobManager(RegexItemParser(), workers=1).start()
+    status = _wait(job_id)
+    assert (status['state'], status['rows_done'], status['attempts']) == ('done', 2, 1)
+    assert successor.result_path(job_id, 'csv')
+
+
+def test_result_errors():
+    with pytest.raises(ValueError):
+        ExcelJobManager.result_path('abc', 'pdf')
+
+
+def test_concurrent_first_downloads_build_whole_xlsx_files(jobs_dir):
+    manager = ExcelJobManager(RegexItemParser(), workers=1)
+    upload = FileStorage(io.BytesIO(b'text\n' + b'2 kg rice\n' * 200), filename='list.csv')
+    job_id = manager.submit(upload)['id']
+    assert _wait(job_id)['state'] == 'done'
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        paths = list(pool.map(lambda _: manager.result_path(job_id, 'xlsx'), range(4)))
+    assert len(set(paths)) == 1
+    assert len(pd.read_excel(paths[0])) == 200
+    assert not [name for name in os.listdir(jobs_dir / job_id) if name.startswith('result.xlsx.')]
+
+
+def test_result_route_status_codes(jobs_dir, client):
+    _job(jobs_dir, 'running', state='running', heartbeat_at=time.time())
+    assert client.get('/api/jobs/running/result?format=pdf').status_code == 400
+    assert client.get('/api/jobs/running/result?format=csv').status_code == 409
+    assert client.get('/api/jobs/missing/result').status_code == 404
+    with pytest.raises(JobNotReady):
+        ExcelJobManager.result_path('running', 'csv')
+
+
+def test_large_uploads_are_refused(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    response = client.post('/api/jobs/excel', data={'file': (io.BytesIO(b'x' * 4096), 'big.csv')})
+    assert response.status_code == 413
+
+
+def _upload(extension):
+    buffer = io.BytesIO()
+    frame = pd.DataFrame({'text': ['2 kg rice', '1 litre milk']})
+    if extension == '.xlsx':
+        frame.to_excel(buffer, index=False)
+    else:
+        frame.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return FileStorage(buffer, filename='list' + extension)
+
+
+@pytest.mark.parametrize('extension', sorted(excel_jobs.ALLOWED_EXTENSIONS))
+def test_every_accepted_extension_is_parsed(extension):
+    manager = ExcelJobManager(RegexItemParser(), workers=1)
+    status = _wait(manager.submit(_upload(extension))['id'])
+    assert (status['state'], status['rows_done']) == ('done', 2)
+
+
+def test_legacy_xls_uploads_are_refused(client):
+    response = client.post('/api/jobs/excel', data={'file': (io.BytesIO(b'text\n'), 'list.xls')})
+    assert response.status_code == 400
+
+
+def test_rows_wait_for_the_throttle():
+    seen = []
+    manager = ExcelJobManager(RegexItemParser(), workers=1, throttle=seen.append)
+    upload = FileStorage(io.BytesIO(b'text\n2 kg rice\n1 litre milk\n'), filename='list.csv')
+    assert _wait(manager.submit(upload)['id'])['state'] == 'done'
+    assert seen == ['2 kg rice', '1 litre milk']
+
+
+def test_bulk_rows_back_off_until_the_token_budget_refills(app_module, monkeypatch):
+    limiter = RateLimiter(MemoryBucketStore(), {'llm_tokens': (1000.0, 1000.0)})
+    monkeypatch.setattr(app_module, 'rate_limiter', limiter)
+    sleeps = []
+    monkeypatch.setattr(app_module.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(app_module, 'llm_token_cost', lambda text: 600)
+    app_module.wait_for_llm_tokens('2 kg rice')
+    app_module.wait_for_llm_tokens('1 litre milk')
+    assert len(sleeps) >= 1 and limiter.rejected['llm_tokens'] >= 1
+
+
+def test_uploads_are_rate_limited_per_client(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'rate_limiter', RateLimiter(MemoryBucketStore(), {'jobs': (1, 0.001)}))
+    monkeypatch.setattr(app_module.excel_jobs, 'submit', lambda upload: {'id': 'abc'})
+    assert client.post('/api/jobs/excel', data={'file': (io.BytesIO(b'text\n'), 'a.csv')}).status_code == 202
+    response = client.post('/api/jobs/excel', data={'file': (io.BytesIO(b'text\n'), 'a.csv')})
+    assert response.status_code == 429 and response.headers['Retry-After']
+
+
+def test_running_job_leaves_the_interactive_reserve(app_module, client, monkeypatch):
+    limiter = RateLimiter(MemoryBucketStore(), {'llm': (100, 0.001), 'local': (100, 0.001),
+                                                'llm_tokens': (1000.0, 0.001)})
+    monkeypatch.setattr(app_module, 'rate_limiter', limiter)
+    monkeypatch.setattr(app_module, 'PARSE_CACHE_TTL', 0)
+    monkeypatch.setattr(app_module, 'llm_token_cost', lambda text, completion=150: 100)
+    monkeypatch.setattr(app_module.engine_router.registry.get('llm'), 'analyze',
+                        lambda text: RegexItemParser().analyze(text))
+    # The job parks in its first wait for tokens until the test releases it
+    waiting, release = threading.Event(), threading.Event()
+
+    def sleep(seconds):
+        waiting.set()
+        release.wait(10)
+    monkeypatch.setattr(app_module, 'time', SimpleNamespace(sleep=sleep, time=time.time))
+
+    manager = ExcelJobManager(RegexItemParser(), workers=1, throttle=app_module.wait_for_llm_tokens)
+    rows = b''.join(b'%d kg rice\n' % n for n in range(1, 21))
+    job_id = manager.submit(FileStorage(io.BytesIO(b'text\n' + rows), filename='list.csv'))['id']
+    assert waiting.wait(10)
+    assert read_status(job_id)['state'] == 'running'
+    # Bulk rows stopped at 80% of the budget; interactive requests still get the rest
+    statuses = [client.post('/api/analyze', json={'text': '1 kg rice', 'engine': 'llm'}).status_code
+                for _ in range(2)]
+    assert statuses == [200, 200]
+
+    limiter.budgets['llm_tokens'] = None
+    release.set()
+    assert _wait(job_id)['state'] == 'done'
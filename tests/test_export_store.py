@@ -0,0 +1,65 @@
+import os
+
+import mongomock
+import pymongo
+import pytest
+
+import export_store
+from storage import MONGODB_DATABASE
+
+LISTS = [
+    {'billNumber': 'B1', 'favoriteShop': 'Corner', 'created_at': '2026-09-01 10:00:00',
+     'items': [{'itemName': 'rice', 'quantity': '2', 'unit': 'kg'}, {'itemName': 'milk', 'quantity': '500', 'unit': 'ml'}]},
+    {'billNumber': 'B2', 'favoriteShop': 'Market', 'created_at': '2026-09-02 09:00:00',
+     'items': [{'itemName': 'tea', 'quantity': '1', 'unit': 'packet'}]},
+]
+
+
+def test_append_read_and_compact(tmp_path):
+    export_dir = str(tmp_path)
+    assert export_store.append_lists(LISTS, export_dir) == 3
+    assert export_store.append_lists(LISTS[:1], export_dir) == 2
+    assert export_store.days(export_dir) == ['2026-09-01', '2026-09-02']
+
+    before = export_store.read_items('2026-09-01', '2026-09-01', export_dir=export_dir)
+    assert len(before) == 4
+    assert export_store.compact('2026-09-01', export_dir) == 2
+    after = export_store.read_items('2026-09-01', '2026-09-01', export_dir=export_dir)
+    assert sorted(after['itemName']) == sorted(before['itemName'])
+    assert after.loc[after['itemName'] == 'rice', 'canonicalQuantity'].iloc[0] == pytest.approx(2000)
+
+    shop = export_store.read_items(shop='Market', export_dir=export_dir)
+    assert list(shop['billNumber']) == ['B2']
+
+
+def test_rebuild_reads_the_app_database(tmp_path, monkeypatch):
+    client = mongomock.MongoClient()
+    client[MONGODB_DATABASE].lists.insert_many([dict(doc) for doc in LISTS])
+    client['ShoppingV3_Voice_API'].lists.insert_one({'billNumber': 'stale', 'items': []})
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda uri: client)
+
+    export_store.main(['--dir', str(tmp_path), 'rebuild'])
+    rows = export_store.read_items(export_dir=str(tmp_path))
+    assert sorted(set(rows['billNumber'])) == ['B1', 'B2']
+
+
+def test_rebuild_replaces_the_store_instead_of_appending(tmp_path):
+    db = mongomock.MongoClient()[MONGODB_DATABASE]
+    db.lists.insert_many([dict(doc) for doc in LISTS])
+    export_dir = str(tmp_path / 'export')
+    export_store.append_lists(LISTS, export_dir)
+    assert export_store.rebuild_from_db(db, export_dir) == 3
+    assert export_store.rebuild_from_db(db, export_dir) == 3
+    assert len(export_store.read_items(export_dir=export_dir)) == 3
+    assert sorted(os.listdir(tmp_path)) == ['export']
+
+
+def test_db_reader_matches_the_store(tmp_path):
+    db = mongomock.MongoClient()[MONGODB_DATABASE]
+    db.lists.insert_many([dict(doc) for doc in LISTS])
+    export_store.rebuild_from_db(db, str(tmp_path))
+    columns = ['billNumber', 'itemName', 'canonicalQuantity']
+    for start, end, shop in [('', '', ''), ('2026-09-01', '2026-09-01', ''), ('', '2026-09-02', 'Market')]:
+        stored = export_store.read_items(start, end, shop, export_dir=str(tmp_path))[columns]
+        direct = export_store.read_items_from_db(db, start, end, shop)[columns]
+        assert stored.sort_values(columns).values.tolist() == direct.sort_values(columns).values.tolist()
@@ -0,0 +1,25 @@
+from gazetteer import Gazetteer, get_gazetteer
+
+
+def _names(matches):
+    return [(m.kind, m.name) for m in matches]
+
+
+def test_longest_leftmost_word_boundary_matches():
+    gazetteer = Gazetteer([('Tata', 'brand'), ('Tata Tea', 'brand'), ('tea', 'product'),
+                           ('green tea', 'product'), ('Head and Shoulders', 'brand')])
+    text = 'tata tea, green tea and head & shoulders, not tatatea'
+    assert _names(gazetteer.find(text, kind='brand')) == [('brand', 'Tata Tea'), ('brand', 'Head and Shoulders')]
+    assert _names(gazetteer.find(text, kind='product')) == [('product', 'tea'), ('product', 'green tea')]
+    found = gazetteer.find('TATA TEA')[0]
+    assert (found.start, found.end) == (0, 8)
+
+
+def test_scan_reports_overlapping_entries():
+    gazetteer = Gazetteer([('brown', 'product'), ('brown rice', 'product'), ('rice', 'product')])
+    assert sorted(m.name for m in gazetteer.scan('brown rice')) == ['brown', 'brown rice', 'rice']
+
+
+def test_shared_gazetteer_has_the_catalog():
+    assert _names(get_gazetteer().find('2 packets of maggi and amul butter')) == [
+        ('brand', 'Maggi'), ('brand', 'Amul'), ('product', 'butter')]
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import health
+from health import HealthMonitor, Probe, ProbeFailed
+
+
+def _failing():
+    raise ProbeFailed('down')
+
+
+def test_probe_counts_consecutive_failures_and_recovers():
+    state = {'up': False}
+    probe = Probe('db', lambda: None if state['up'] else _failing())
+    assert probe.run_once()['consecutive_failures'] == 1
+    assert probe.run_once()['error'] == 'ProbeFailed: down'
+    assert probe.result['consecutive_failures'] == 2
+    state['up'] = True
+    result = probe.run_once()
+    assert result['ok'] and result['consecutive_failures'] == 0 and 'error' not in result
+
+
+def test_stale_results_count_as_failures():
+    probe = Probe('db', lambda: None, interval=1)
+    probe.run_once()
+    assert probe.status(time.time())['ok']
+    assert not probe.status(time.time() + 60)['ok']
+
+
+def test_readiness_only_depends_on_critical_probes():
+    ok, down = Probe('db', lambda: None), Probe('llm', _failing, critical=False)
+    ok.run_once()
+    down.run_once()
+    ready, report = HealthMonitor([ok, down]).readiness()
+    assert ready and report['status'] == 'degraded'
+    down.critical = True
+    ready, report = HealthMonitor([ok, down]).readiness()
+    assert not ready and report['status'] == 'unavailable'
+
+
+def test_first_critical_checks_run_before_start_returns():
+    ok, down = Probe('db', lambda: None), Probe('disk', _failing)
+    monitor = HealthMonitor([ok, down]).ensure_started()
+    try:
+        ready, report = monitor.readiness()
+        assert report['checks']['db']['ok'] and not ready
+    finally:
+        monitor.stop()
+
+
+def test_probe_slower_than_the_startup_wait_reports_starting():
+    release = threading.Event()
+    slow = Probe('db', lambda: release.wait(5))
+    monitor = HealthMonitor([slow]).ensure_started(timeout=0.01)
+    try:
+        ready, report = monitor.readiness()
+        assert ready and report['status'] == 'starting'
+        assert report['checks']['db']['starting']
+    finally:
+        release.set()
+        monitor.stop()
+
+
+def test_disk_probe_reports_low_space(tmp_path):
+    assert 'free_mb' in health.disk_probe(str(tmp_path), min_free_mb=0)()
+    probe = Probe('disk', health.disk_probe(str(tmp_path), min_free_mb=1e12))
+    assert not probe.run_once()['ok']
+
+
+def test_health_endpoints(client):
+    assert client.get('/health/live').status_code == 200
+    response = client.get('/health/ready')
+    assert response.status_code == 200 and response.get_json()['checks']['sqlite']['ok']
@@ -0,0 +1,55 @@
+import json
+from types import SimpleNamespace
+
+import analyser
+
+
+def _reply(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def _parser(monkeypatch, content):
+    monkeypatch.setattr(analyser.ShoppingItemParser, '_complete', staticmethod(lambda text, **request: _reply(content)))
+    return analyser.ShoppingItemParser()
+
+
+def test_one_call_returns_every_item_and_recovers_bad_entries(monkeypatch):
+    content = json.dumps({'items': [
+        {'itemName': 'rice', 'quantity': '', 'unit': '', 'source': '2 kg rice'},
+        {'itemName': '', 'source': '1 litre amul milk'},
+        {'itemName': '', 'source': ''},
+        'junk',
+    ]})
+    items = _parser(monkeypatch, content).analyze_list('2 kg rice\n1 litre amul milk')
+    assert [(item['itemName'], item['quantity'], item['unit']) for item in items] == [
+        ('rice', '2', 'kg'), ('milk', '1', 'l')]
+    assert items[0]['description'] == '2 kg rice'
+    assert items[1]['brand'] == 'Amul'
+
+
+def test_unusable_response_splits_the_transcript_locally(monkeypatch):
+    items = _parser(monkeypatch, 'no json here').analyze_list('2 kg rice and 1 litre milk\ntea')
+    assert [item['itemName'] for item in items] == ['rice', 'milk', 'tea']
+
+
+def test_list_mode_endpoint(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module.parser, 'analyze_list', lambda text: [analyser.ShoppingItem(itemName='tea')])
+    response = client.post('/api/analyze', json={'text': 'tea', 'mode': 'list'})
+    assert [item['itemName'] for item in response.get_json()['items']] == ['tea']
+
+
+def test_one_failing_entry_is_reparsed_alone(monkeypatch):
+    content = '{"items": [{"itemName": "rice", "quantity": NaN, "source": "2 kg rice"},' \
+              ' {"itemName": "tea", "quantity": Infinity, "source": "tea"},' \
+              ' {"itemName": "milk", "quantity": "1", "unit": "l", "source": "1 litre milk"}]}'
+    parser = _parser(monkeypatch, content)
+    fill = analyser.ShoppingItemParser._fill_from_regex
+
+    def flaky(item, text):
+        if text == 'tea':
+            raise RuntimeError('boom')
+        return fill(item, text)
+    monkeypatch.setattr(analyser.ShoppingItemParser, '_fill_from_regex', staticmethod(flaky))
+    items = parser.analyze_list('2 kg rice, tea and 1 litre milk')
+    assert [(item['itemName'], item['quantity']) for item in items] == [('rice', '2'), ('tea', ''), ('milk', '1')]
+    assert [item.get('fallback') for item in items] == [None, 'regex', None]
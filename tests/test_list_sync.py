@@ -0,0 +1,57 @@
+import pytest
+
+import list_sync
+
+
+class RecordingStore:
+    """Keeps lists in memory and reports repeated keys as duplicates, like the real stores"""
+
+    def __init__(self):
+        self.by_key = {}
+
+    def insert_new_lists(self, docs):
+        duplicates = set()
+        for index, doc in enumerate(docs):
+            if doc['idempotencyKey'] in self.by_key:
+                duplicates.add(index)
+            else:
+                doc['_id'] = f'id-{len(self.by_key)}'
+                self.by_key[doc['idempotencyKey']] = doc
+        return duplicates
+
+    def lists_by_key(self, keys):
+        return {key: self.by_key[key] for key in keys}
+
+
+@pytest.mark.parametrize('entries', [None, [], [{'billNumber': 'x'}], [{'idempotencyKey': ''}],
+                                     [{'idempotencyKey': 'k' * 129}], ['k']])
+def test_bad_batches_are_refused(entries):
+    with pytest.raises(ValueError):
+        list_sync.save_lists(RecordingStore(), entries, '2026-09-01 10:00:00')
+
+
+def test_too_many_lists_are_refused(monkeypatch):
+    monkeypatch.setattr(list_sync, 'SYNC_MAX_LISTS', 2)
+    with pytest.raises(ValueError):
+        list_sync.save_lists(RecordingStore(), [{'idempotencyKey': str(i)} for i in range(3)], 'now')
+
+
+def test_client_ids_and_versions_are_not_trusted():
+    store = RecordingStore()
+    [summary] = list_sync.save_lists(store, [{'idempotencyKey': 'k', '_id': 'evil', 'version': 9,
+                                              'items': [{'itemName': 'rice'}]}], '2026-09-01 10:00:00')
+    assert summary['id'] == 'id-0' and summary['version'] == 1 and len(summary['itemIds'][0]) == 12
+    assert store.by_key['k']['created_at'] == '2026-09-01 10:00:00'
+
+
+def test_sync_endpoint_is_safe_to_retry(client):
+    body = {'lists': [{'idempotencyKey': 'sync-test-1', 'billNumber': 'SYNC-1', 'items': [{'itemName': 'tea'}]},
+                      {'idempotencyKey': 'sync-test-2', 'billNumber': 'SYNC-2', 'items': []}]}
+    first = client.post('/api/sync', json=body).get_json()['results']
+    again = client.post('/api/sync', json=body).get_json()['results']
+    assert [r['status'] for r in first] == ['created', 'created']
+    assert [r['status'] for r in again] == ['duplicate', 'duplicate']
+    assert [r['id'] for r in again] == [r['id'] for r in first]
+    assert client.post('/api/sync', json={'lists': []}).status_code == 400
+    assert client.post('/api/sync', json=[]).status_code == 400
+    assert client.post('/api/sync', json='lists').status_code == 400
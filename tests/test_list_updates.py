@@ -0,0 +1,89 @@
+import mongomock
+import pytest
+from bson import ObjectId
+
+from list_updates import (VersionConflict, apply_patch, build_update, parse_patch, patched_list, prepare_new_list,
+                          reported_doc)
+
+
+def _items():
+    return [{'itemId': 'a', 'itemName': 'rice'}, {'itemId': 'b', 'itemName': 'milk'}]
+
+
+@pytest.mark.parametrize('patch', [
+    None,
+    {'update': [{'index': 0, 'fields': {'quantity': '2'}}]},
+    {'version': True, 'set': {'favoriteShop': 'x'}},
+    {'version': 1},
+    {'version': 1, 'set': {'billNumber': 'X'}},
+    {'version': 1, 'update': [{'fields': {'quantity': '2'}}]},
+    {'version': 1, 'add': ['rice']},
+])
+def test_bad_patches_are_refused(patch):
+    with pytest.raises(ValueError):
+        parse_patch(patch)
+
+
+def test_single_kind_patches_use_targeted_operators():
+    update = build_update(_items(), parse_patch({'version': 1, 'update': [{'itemId': 'b', 'fields': {'quantity': '3'}}]}))
+    assert update['$set']['items.1.quantity'] == '3'
+    assert update['$inc'] == {'version': 1}
+    update = build_update(_items(), parse_patch({'version': 1, 'remove': ['a']}))
+    assert update['$pull'] == {'items': {'itemId': {'$in': ['a']}}}
+    update = build_update(_items(), parse_patch({'version': 1, 'add': [{'itemName': 'tea'}]}))
+    assert update['$push']['items']['$each'][0]['itemName'] == 'tea'
+    with pytest.raises(ValueError):
+        build_update(_items(), parse_patch({'version': 1, 'remove': ['zzz']}))
+
+
+def test_mixed_patches_rebuild_the_items_the_same_way_in_python():
+    parsed = parse_patch({'version': 1, 'remove': [0], 'update': [{'itemId': 'b', 'fields': {'brand': 'Amul'}}],
+                          'add': [{'itemName': 'tea'}]})
+    rebuilt = build_update(_items(), parsed)['$set']['items']
+    patched = patched_list({'items': _items(), 'version': 1}, parsed)
+    assert rebuilt == patched['items']
+    assert [item['itemName'] for item in rebuilt] == ['milk', 'tea']
+    assert rebuilt[0]['brand'] == 'Amul'
+    assert patched['version'] == 2
+
+
+def test_apply_patch_checks_the_version():
+    lists = mongomock.MongoClient().db.lists
+    list_id = lists.insert_one(prepare_new_list({'items': [{'itemName': 'rice'}]})).inserted_id
+    assert apply_patch(lists, str(list_id), {'version': 1, 'set': {'favoriteShop': 'corner'}})['version'] == 2
+    with pytest.raises(VersionConflict):
+        apply_patch(lists, str(list_id), {'version': 1, 'set': {'favoriteShop': 'mall'}})
+    # Lists saved before versioning count as version 0
+    old_id = lists.insert_one({'items': []}).inserted_id
+    assert apply_patch(lists, str(old_id), {'version': 0, 'add': [{'itemName': 'tea'}]})['version'] == 1
+
+
+def test_apply_patch_queues_both_versions_for_the_reports():
+    lists = mongomock.MongoClient().db.lists
+    list_id = lists.insert_one(prepare_new_list({'favoriteShop': 'corner', 'items': [{'itemName': 'rice'}]})).inserted_id
+    apply_patch(lists, str(list_id), {'version': 1, 'set': {'favoriteShop': 'mall'}})
+    apply_patch(lists, str(list_id), {'version': 2, 'add': [{'itemName': 'tea'}]})
+    doc = lists.find_one({'_id': list_id})
+    first, second = doc['pending_changes']
+    assert (first['before']['favoriteShop'], first['after']['favoriteShop']) == ('corner', 'mall')
+    assert [item['itemName'] for item in second['after']['items']] == ['rice', 'tea']
+    assert second['after']['version'] == doc['version'] == 3
+    # Reported at version 2: the reports count the list as the first patch left it
+    lists.update_one({'_id': list_id}, {'$set': {'reported_version': 2}})
+    assert reported_doc(lists.find_one({'_id': list_id}))['favoriteShop'] == 'mall'
+    assert len(reported_doc(lists.find_one({'_id': list_id}))['items']) == 1
+
+
+def test_patch_endpoint(client):
+    created = client.post('/api', json={'billNumber': 'PATCH-1', 'customerName': 'asha',
+                                        'items': [{'itemName': 'rice', 'quantity': '1'}]})
+    assert created.status_code == 201
+    body = created.get_json()
+    url = f"/api/lists/{body['id']}"
+    change = {'version': 1, 'update': [{'itemId': body['itemIds'][0], 'fields': {'quantity': '2'}}]}
+    patched = client.patch(url, json=change).get_json()
+    assert patched['version'] == 2 and 'reportsUpdated' not in patched
+    assert client.patch(url, json=change).status_code == 409
+    assert client.patch(url, json={'version': 2}).status_code == 400
+    assert client.patch(f'/api/lists/{ObjectId()}', json=change).status_code == 404
+    assert client.get(url).get_json()['items'][0]['quantity'] == '2'
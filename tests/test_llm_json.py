@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+import analyser
+from llm_json import ITEM_SCHEMA, DecodeError, decode_item, decode_items, loads_tolerant
+
+
+@pytest.mark.parametrize('raw, repair', [
+    ('```json\n{"itemName": "rice"}\n```', 'fence'),
+    ('Sure! Here it is: {"itemName": "rice"} Hope that helps.', 'surrounding_text'),
+    ('{"itemName": "rice", "quantity": "2",', 'truncated'),
+    ('{"itemName": "rice",}', 'trailing_comma'),
+    ("{'itemName': 'rice'}", 'single_quotes'),
+    ('{itemName: "rice"}', 'unquoted_key'),
+    ('{"itemName": "rice", "organic": True}', 'python_literal'),
+    ('{“itemName”: “rice”}', 'smart_quotes'),
+])
+def test_common_defects_are_repaired(raw, repair):
+    value, repairs = loads_tolerant(raw)
+    assert value['itemName'] == 'rice'
+    assert repair in repairs
+
+
+def test_item_fields_are_coerced():
+    item = decode_item('{"Item": "rice", "qty": 2, "priority": "urgent", "brand": null}')
+    assert item['itemName'] == 'rice'
+    assert item['quantity'] == '2'
+    assert item['priority'] == 'HIGH'
+    assert item['brand'] == ''
+    assert decode_item('{"itemName": "rice", "quantity": "lots"}')['quantity'] == ''
+
+
+def test_items_arrays_keep_bad_entries_as_none():
+    assert decode_items('{"items": [{"itemName": "rice"}, 3]}') == [dict(decode_item('{"itemName": "rice"}'), source=''), None]
+    with pytest.raises(DecodeError):
+        decode_items('{"note": "nothing"}')
+
+
+def test_unknown_keys_are_dropped_and_reported():
+    item, coerced = ITEM_SCHEMA.validate({'itemName': 'rice', 'organic': True, 'Source': 'x'})
+    assert set(item) == set(ITEM_SCHEMA.fields)
+    assert coerced == ['unknown_organic', 'unknown_Source']
+    entry, = decode_items('{"items": [{"itemName": "rice", "source": "2 kg rice", "notes": "?"}]}')
+    assert entry['source'] == '2 kg rice' and 'notes' not in entry
+
+
+@pytest.mark.parametrize('raw', ['I could not parse that.', '{"itemName": "rice" "quantity": }', '[1, 2]'])
+def test_unusable_output_raises(raw):
+    with pytest.raises(DecodeError):
+        decode_item(raw)
+
+
+def test_undecodable_llm_output_falls_back_to_the_regex_parser(monkeypatch):
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='Sorry, no JSON today'))],
+                            usage=None)
+    monkeypatch.setattr(analyser.ShoppingItemParser, '_complete', staticmethod(lambda text, **request: reply))
+    item = analyser.ShoppingItemParser().analyze('2 kg basmati rice')
+    assert (item['itemName'], item['quantity'], item['unit']) == ('basmati rice', '2', 'kg')
+    assert item['description'] == '2 kg basmati rice'
+
+
+def test_fallback_results_are_marked_and_not_cached(app_module, client, monkeypatch):
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='Sorry, no JSON today'))],
+                            usage=None)
+    monkeypatch.setattr(analyser.ShoppingItemParser, '_complete', staticmethod(lambda text, **request: reply))
+    monkeypatch.setattr(app_module, 'PARSE_CACHE_TTL', 60)
+    response = client.post('/api/analyze', json={'text': '2 kg basmati rice', 'engine': 'llm'})
+    assert response.get_json()['fallback'] == 'regex'
+    assert app_module.store.cached_parse(app_module.parse_cache_key('llm', None, '2 kg basmati rice')) is None
+
+
+def test_parse_cache_is_keyed_on_the_normalized_text(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'PARSE_CACHE_TTL', 60)
+    assert app_module.parse_cache_key('llm', None, 'do kilo chawal') == \
+        app_module.parse_cache_key('llm', None, '2 kilo rice')
+
+
+@pytest.mark.parametrize('quantity', ['NaN', 'Infinity', '-Infinity', '1e999'])
+def test_non_finite_quantities_are_dropped(quantity):
+    assert decode_item('{"itemName": "rice", "quantity": %s}' % quantity)['quantity'] == ''
+    assert decode_item('{"itemName": "rice", "quantity": "%s"}' % quantity)['quantity'] == ''
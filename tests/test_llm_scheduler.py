@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+import analyser
+from llm_scheduler import LLMScheduler, QueueFull, INTERACTIVE, BULK
+
+
+def _hold_slot(scheduler):
+    """Occupy the only slot until the returned event is set"""
+    release, started = threading.Event(), threading.Event()
+
+    def call():
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=scheduler.run, args=(call,), kwargs={'request_class': INTERACTIVE})
+    thread.start()
+    started.wait(5)
+    return release, thread
+
+
+def _queued(scheduler):
+    return sum(len(tickets) for clients in scheduler._levels.values() for tickets in clients.values())
+
+
+def _queue(scheduler, order, label, **kwargs):
+    expected = _queued(scheduler) + 1
+    thread = threading.Thread(target=scheduler.run, args=(lambda: order.append(label),), kwargs=kwargs)
+    thread.start()
+    # Wait until the ticket is queued, so arrival order is deterministic
+    deadline = time.time() + 5
+    while _queued(scheduler) < expected:
+        assert time.time() < deadline
+        time.sleep(0.001)
+    return thread
+
+
+def test_high_priority_item_is_dequeued_before_low():
+    scheduler = LLMScheduler(max_concurrent=1)
+    release, holder = _hold_slot(scheduler)
+    order = []
+    threads = [
+        _queue(scheduler, order, 'low', request_class=INTERACTIVE, client='a', item_priority='LOW'),
+        _queue(scheduler, order, 'high', request_class=INTERACTIVE, client='a', item_priority='HIGH'),
+    ]
+    release.set()
+    for thread in [holder] + threads:
+        thread.join(5)
+    assert order == ['high', 'low']
+
+
+def test_interactive_calls_go_before_bulk():
+    scheduler = LLMScheduler(max_concurrent=1)
+    release, holder = _hold_slot(scheduler)
+    order = []
+    threads = [
+        _queue(scheduler, order, 'bulk', request_class=BULK, client='a', item_priority='HIGH'),
+        _queue(scheduler, order, 'interactive', request_class=INTERACTIVE, client='a', item_priority='LOW'),
+    ]
+    release.set()
+    for thread in [holder] + threads:
+        thread.join(5)
+    assert order == ['interactive', 'bulk']
+
+
+def test_full_queue_sheds():
+    scheduler = LLMScheduler(max_concurrent=1, max_queue={INTERACTIVE: 0, BULK: 0})
+    release, holder = _hold_slot(scheduler)
+    with pytest.raises(QueueFull):
+        scheduler.run(lambda: None, request_class=INTERACTIVE)
+    release.set()
+    holder.join(5)
+    assert scheduler.stats[INTERACTIVE].shed == 1
+
+
+def test_analyser_passes_the_item_priority_level(monkeypatch):
+    seen = []
+    monkeypatch.setattr(analyser.llm_scheduler, 'run', lambda call, item_priority='MEDIUM': seen.append(item_priority))
+    analyser.ShoppingItemParser._complete('2 kg rice with high priority')
+    analyser.ShoppingItemParser._complete('2 kg rice')
+    assert seen == ['HIGH', 'MEDIUM']
@@ -0,0 +1,62 @@
+import pytest
+
+from normalize import normalize_text
+from regex_parser import RegexItemParser
+from splitter import split_utterance
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('two and a half kilo chawal', '2.5 kilo rice'),
+    ('ek dozen ande', '1 dozen eggs'),
+    ('dozen ande', '1 dozen eggs'),
+    ('half a kilo sugar', '0.5 kilo sugar'),
+    ('sawa do kilo atta', '2.25 kilo atta'),
+    ('saadhe teen kilo aloo', '3.5 kilo potatoes'),
+    ('teen kilo aloo', '3 kilo potatoes'),
+    ('three apples', '3 apples'),
+    ('two hundred grams butter', '200 grams butter'),
+])
+def test_spoken_quantities_before_a_unit_or_item_are_rewritten(text, expected):
+    assert normalize_text(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    '2 five star chocolates',
+    'Fifty Fifty biscuits',
+    'one more thing',
+    'teen patti',
+    'I need to do the shopping',
+    'get it done in one day',
+    'quarter chicken',
+    'do apples',
+])
+def test_number_words_that_are_not_quantities_are_kept(text):
+    assert normalize_text(text) == text
+
+
+def test_normalization_is_idempotent():
+    once = normalize_text('do kilo chawal aur ek dozen ande')
+    assert once == '2 kilo rice and 1 dozen eggs'
+    assert normalize_text(once) == once
+
+
+def test_regex_parser_reads_the_normalized_text_but_keeps_the_description():
+    item = RegexItemParser().analyze('do kilo chawal')
+    assert (item['itemName'], item['quantity'], item['unit']) == ('rice', '2', 'kg')
+    assert item['description'] == 'do kilo chawal'
+
+
+def test_hinglish_utterances_split_on_aur():
+    clauses, _ = split_utterance('do kilo chawal aur ek dozen ande')
+    assert clauses == ['do kilo chawal', 'ek dozen ande']
+
+
+def test_llm_engine_gets_the_original_text(app_module, client, monkeypatch):
+    seen = []
+    llm = app_module.engine_router.registry.get('llm')
+    monkeypatch.setattr(llm, '_method', lambda text: seen.append(text) or {'itemName': 'chocolates'})
+    response = client.post('/api/analyze', json={'text': '2 five star chocolates aur ek dozen ande',
+                                                  'engine': 'llm'})
+    assert response.status_code == 200
+    assert seen == ['2 five star chocolates aur ek dozen ande']
+    assert response.get_json()['description'] == '2 five star chocolates aur ek dozen ande'
@@ -0,0 +1,60 @@
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profiling_settings(monkeypatch):
+    def configure(token='', enabled=True):
+        monkeypatch.setattr(profiling, 'PROFILE_TOKEN', token)
+        monkeypatch.setattr(profiling, 'ENABLED', enabled)
+    return configure
+
+
+@pytest.mark.parametrize('path', ['/api/debug/profiles', '/api/debug/memory'])
+def test_debug_endpoints_closed_without_a_token(client, profiling_settings, path):
+    # e.g. PROFILE_SAMPLE_RATE or TRACEMALLOC_FRAMES set, PROFILE_TOKEN not
+    profiling_settings(token='')
+    assert client.get(path).status_code == 404
+    assert client.get(path, headers={'X-Profile-Token': ''}).status_code == 404
+
+
+@pytest.mark.parametrize('path', ['/api/debug/profiles', '/api/debug/memory'])
+def test_debug_endpoints_need_the_matching_token(client, profiling_settings, path):
+    profiling_settings(token='secret')
+    assert client.get(path, headers={'X-Profile-Token': 'wrong'}).status_code == 404
+
+
+def test_profiles_listed_with_the_token(client, profiling_settings):
+    profiling_settings(token='secret')
+    response = client.get('/api/debug/profiles', headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 200
+    assert 'profiles' in response.get_json()
+
+
+def test_memory_endpoint_closed_when_profiling_is_disabled(client, profiling_settings):
+    profiling_settings(token='secret', enabled=False)
+    assert client.get('/api/debug/memory', headers={'X-Profile-Token': 'secret'}).status_code == 404
+
+
+def test_profile_header_is_compared_in_constant_time(app_module, profiling_settings, monkeypatch):
+    profiling_settings(token='secret')
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 0)
+    compared = []
+    real = profiling.hmac.compare_digest
+    monkeypatch.setattr(profiling.hmac, 'compare_digest', lambda a, b: compared.append((a, b)) or real(a, b))
+    for value, wanted in [('secret', True), ('wrong', False), ('sécret', False)]:
+        with app_module.app.test_request_context(headers={'X-Profile': value}):
+            assert profiling._wanted() is wanted
+    assert len(compared) == 3
+
+
+def test_memory_top_is_validated_and_clamped(client, profiling_settings, monkeypatch):
+    profiling_settings(token='secret')
+    limits = []
+    monkeypatch.setattr(profiling, 'memory_report', lambda limit, **kwargs: limits.append(limit) or {'top': []})
+    headers = {'X-Profile-Token': 'secret'}
+    assert client.get('/api/debug/memory?top=abc', headers=headers).status_code == 400
+    for top in ('0', '5', '100000'):
+        assert client.get(f'/api/debug/memory?top={top}', headers=headers).status_code == 200
+    assert limits == [1, 5, 200]
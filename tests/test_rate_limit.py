@@ -0,0 +1,106 @@
+import time
+
+import mongomock
+import pytest
+
+from rate_limit import (BucketServer, MemoryBucketStore, MongoBucketStore, RateLimiter, RateLimited,
+                        SocketBucketStore, parse_budget)
+
+
+@pytest.fixture
+def bucket_server(tmp_path):
+    server = BucketServer(str(tmp_path / 'buckets.sock')).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(params=['memory', 'mongo', 'socket'])
+def store(request):
+    if request.param == 'memory':
+        return MemoryBucketStore()
+    if request.param == 'socket':
+        return SocketBucketStore(request.getfixturevalue('bucket_server').path)
+    return MongoBucketStore(mongomock.MongoClient()['test']['rate_limits'])
+
+
+def test_parse_budget():
+    assert parse_budget('30/60') == (30.0, 0.5)
+    assert parse_budget('10') == (10.0, 10 / 60)
+    assert parse_budget('off') is None
+    assert parse_budget('') is None
+    assert parse_budget('0/60') is None
+    for spec in ('5/0', '5/-1', '-5/60', 'five/60', '5/inf'):
+        with pytest.raises(ValueError):
+            parse_budget(spec)
+
+
+def test_bucket_refuses_when_empty_and_refills(store):
+    # Real timestamps: the Mongo store's TTL index drops buckets that expired in the past
+    now = time.time()
+    assert store.take('k', 2, 1.0, 1, now=now) == (True, 0.0)
+    assert store.take('k', 2, 1.0, 1, now=now) == (True, 0.0)
+    allowed, retry_after = store.take('k', 2, 1.0, 1, now=now)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    assert store.take('k', 2, 1.0, 1, now=now + 1)[0]
+
+
+def test_refund_never_exceeds_capacity(store):
+    now = time.time()
+    store.take('k', 2, 0.001, -5, now=now)
+    assert store.take('k', 2, 0.001, 2, now=now)[0]
+    assert not store.take('k', 2, 0.001, 1, now=now)[0]
+
+
+def test_limiter_budgets_are_separate():
+    limiter = RateLimiter(MemoryBucketStore(), {'llm': (1, 0.001), 'local': (2, 0.001), 'llm_tokens': None})
+    limiter.hit('llm', 'a')
+    with pytest.raises(RateLimited) as e:
+        limiter.hit('llm', 'a')
+    assert e.value.budget == 'llm'
+    limiter.hit('llm', 'b')
+    limiter.hit('local', 'a')
+    limiter.hit('llm_tokens', 'global', 10 ** 9)   # disabled budget
+    assert limiter.rejected['llm'] == 1
+
+
+def test_limiter_refund_gives_the_token_back():
+    limiter = RateLimiter(MemoryBucketStore(), {'llm': (1, 0.001)})
+    limiter.hit('llm', 'a')
+    limiter.refund('llm', 'a')
+    limiter.hit('llm', 'a')
+
+
+def test_reserve_is_left_for_other_callers(store):
+    now = time.time()
+    assert store.take('k', 10, 1.0, 7, now=now, reserve=2)[0]
+    allowed, retry_after = store.take('k', 10, 1.0, 2, now=now, reserve=2)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    # Without a reserve the remaining tokens can be spent
+    assert store.take('k', 10, 1.0, 3, now=now)[0]
+
+
+def test_memory_store_evicts_refilled_then_least_recent():
+    store = MemoryBucketStore(max_keys=10)
+    for index in range(10):
+        store.take(f'idle{index}', 5, 100.0, 1, now=0.0)
+    # Refilled long ago: all dropped once the cap is passed
+    store.take('busy', 5, 100.0, 1, now=10.0)
+    assert len(store) == 1
+    for index in range(20):
+        store.take(f'spoofed{index}', 5, 0.001, 1, now=11.0)
+    assert len(store) <= 10
+
+
+def test_socket_stores_share_the_server_buckets(bucket_server):
+    first, second = SocketBucketStore(bucket_server.path), SocketBucketStore(bucket_server.path)
+    now = time.time()
+    assert first.take('k', 1, 0.001, 1, now=now)[0]
+    assert not second.take('k', 1, 0.001, 1, now=now)[0]
+    assert len(bucket_server.store) == 1 and len(second.fallback) == 0
+
+
+def test_socket_store_limits_per_worker_without_its_server(tmp_path):
+    store = SocketBucketStore(str(tmp_path / 'missing.sock'))
+    now = time.time()
+    assert store.take('k', 1, 0.001, 1, now=now)[0]
+    assert not store.take('k', 1, 0.001, 1, now=now)[0]
@@ -0,0 +1,180 @@
+import mongomock
+import pytest
+
+import analytics
+import export_store
+import reporting
+from list_updates import apply_patch, prepare_new_list
+
+LISTS = [
+    {'created_at': '2026-09-01 10:00:00', 'favoriteShop': 'Corner', 'items': [
+        {'itemName': 'rice', 'quantity': '2', 'unit': 'kg', 'priority': 'HIGH'},
+        'sugar',
+        {'itemName': 'milk', 'quantity': '1', 'unit': 'l'},
+    ]},
+    {'created_at': '2026-09-01 11:00:00', 'favoriteShop': 'Corner', 'items': ['tea']},
+]
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()['grocery_db']
+    reporting.ensure_indexes(db)
+    analytics.ensure_indexes(db)
+    db.lists.insert_many([dict(doc) for doc in LISTS])
+    return db
+
+
+def test_non_dict_items_are_skipped():
+    operations = reporting.report_operations(LISTS)
+    assert len(operations) == 1
+    assert operations[0]._doc['$inc'] == {'lists': 2, 'items': 2, 'priority.HIGH': 1, 'priority.MEDIUM': 1}
+    assert [op._filter['itemName'] for op in analytics.rollup_operations(LISTS[0])] == ['rice', 'milk']
+    assert [row['itemName'] for row in export_store.flatten_list(LISTS[0])] == ['rice', 'milk']
+    assert [row['item_index'] for row in export_store.flatten_list(LISTS[0])] == [0, 2]
+    assert len(export_store.flatten_list(LISTS[1])) == 1
+
+
+def _worker(db, handlers):
+    worker = reporting.ReportingWorker(db, handlers=handlers, settle_seconds=0)
+    assert worker.acquire_lease()
+    return worker
+
+
+def test_failed_handler_keeps_the_checkpoint_and_others_are_not_replayed(db):
+    calls = {'counted': 0, 'flaky': 0}
+
+    def counted(db, lists):
+        calls['counted'] += len(lists)
+
+    def flaky(db, lists):
+        calls['flaky'] += 1
+        if calls['flaky'] == 1:
+            raise RuntimeError('transient')
+
+    worker = _worker(db, [counted, flaky])
+    with pytest.raises(reporting.HandlerFailed):
+        worker.poll_once()
+    assert worker.checkpoint() == ('', None)
+
+    assert worker.poll_once() == 2
+    assert calls == {'counted': 2, 'flaky': 2}
+    assert worker.checkpoint()[0] == '2026-09-01 11:00:00'
+    assert worker.poll_once() == 0
+
+
+def test_reports_and_rollups_from_lists_with_bad_items(db):
+    worker = _worker(db, [reporting.update_reports, reporting.update_rollups])
+    assert worker.poll_once() == 2
+    report, = reporting.daily_reports(db, '2026-09-01')
+    assert (report['lists'], report['items']) == (2, 2)
+    items = {row['itemName'] for row in analytics.top_items(db, days=1, end_day='2026-09-01')}
+    assert items == {'rice', 'milk'}
+
+
+class FakeStream:
+    def __init__(self, docs):
+        self.events = [{'fullDocument': doc} for doc in docs]
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def alive(self):
+        return bool(self.events)
+
+    def try_next(self):
+        self.resume_token = {'n': len(self.events)}
+        return self.events.pop(0)
+
+
+def test_change_stream_takes_late_inserts_and_skips_caught_up_lists(db):
+    seen = []
+    worker = _worker(db, [lambda db, lists: seen.extend(doc['_id'] for doc in lists)])
+    existing = db.lists.find_one({'created_at': '2026-09-01 11:00:00'})
+    # Stamped before the newest list but inserted after it, as two app workers can do
+    late = {'_id': 'late', 'created_at': '2026-09-01 10:30:00', 'items': ['tea']}
+    db.lists.watch = lambda *args, **kwargs: FakeStream([existing, late])
+    worker._watch_loop()
+    assert len(seen) == 3 and seen.count(existing['_id']) == 1 and seen[-1] == 'late'
+
+
+def test_handler_marks_the_newest_list_of_an_unordered_batch(db):
+    worker = _worker(db, [reporting.update_reports])
+    docs = list(db.lists.find().sort('created_at', -1))
+    assert worker.process(docs) == 2
+    assert worker.checkpoint()[0] == '2026-09-01 11:00:00'
+    mark = db[reporting.STATE_COLLECTION].find_one()['handlers']['update_reports']
+    assert mark['last_created_at'] == '2026-09-01 11:00:00'
+    assert worker.process(docs) == 2
+    report, = reporting.daily_reports(db, '2026-09-01')
+    assert report['lists'] == 2
+
+
+def test_rollup_batch_failing_midway_is_not_double_counted(db, monkeypatch):
+    writes = []
+    original = mongomock.collection.Collection.bulk_write
+
+    def bulk_write(self, operations, **kwargs):
+        if self.name != analytics.ROLLUP_COLLECTION:
+            return original(self, operations, **kwargs)
+        writes.append(len(operations))
+        if len(writes) == 2:
+            raise RuntimeError('connection reset')
+        return original(self, operations, **kwargs)
+    monkeypatch.setattr(mongomock.collection.Collection, 'bulk_write', bulk_write)
+
+    worker = _worker(db, [reporting.update_rollups])
+    db.lists.insert_one({'created_at': '2026-09-01 12:00:00', 'favoriteShop': 'Corner',
+                         'items': [{'itemName': 'rice', 'quantity': '1', 'unit': 'kg', 'priority': 'HIGH'}]})
+    while True:
+        try:
+            if worker.poll_once() == 0:
+                break
+        except reporting.HandlerFailed:
+            pass
+    rice, = [row for row in analytics.top_items(db, days=1, end_day='2026-09-01') if row['itemName'] == 'rice']
+    assert rice['count'] == 2
+
+
+def test_patches_to_reported_lists_move_the_counts(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(export_store, 'EXPORT_DIR', str(tmp_path))
+    calls = {'flaky': 0}
+
+    def flaky(db, lists, retired=()):
+        calls['flaky'] += 1
+        if calls['flaky'] == 2:
+            raise RuntimeError('transient')
+
+    handlers = [reporting.update_reports, reporting.update_rollups, reporting.update_export, flaky]
+    worker = _worker(db, handlers)
+    list_id = db.lists.insert_one(prepare_new_list({
+        'created_at': '2026-09-01 12:00:00', 'favoriteShop': 'Corner',
+        'items': [{'itemName': 'rice', 'priority': 'HIGH'}, {'itemName': 'milk'}]})).inserted_id
+    assert worker.poll_once() == 3
+    rice_id = db.lists.find_one({'_id': list_id})['items'][0]['itemId']
+    apply_patch(db.lists, str(list_id), {'version': 1, 'set': {'favoriteShop': 'Mall'},
+                                         'remove': [rice_id], 'add': [{'itemName': 'eggs', 'priority': 'LOW'}]})
+
+    with pytest.raises(reporting.HandlerFailed):
+        worker.process_changes()
+    assert worker.process_changes() == 1
+    assert worker.process_changes() == 0
+
+    corner, = reporting.daily_reports(db, '2026-09-01', 'Corner')
+    mall, = reporting.daily_reports(db, '2026-09-01', 'Mall')
+    assert (corner['lists'], corner['items']) == (2, 2)
+    assert (mall['lists'], mall['items'], mall['priority']) == (1, 2, {'MEDIUM': 1, 'LOW': 1})
+    counts = {row['itemName']: row['count'] for row in analytics.top_items(db, shop='Mall', days=1, end_day='2026-09-01')}
+    assert counts == {'milk': 1, 'eggs': 1}
+    counts = {row['itemName']: row['count'] for row in analytics.top_items(db, shop='Corner', days=1, end_day='2026-09-01')}
+    assert counts == {'rice': 1, 'milk': 1}
+    rows = export_store.read_items('2026-09-01', '2026-09-01', shop='Mall')
+    assert sorted(rows['itemName']) == ['eggs', 'milk']
+    assert len(export_store.read_items('2026-09-01', '2026-09-01', shop='Corner')) == 3
+    doc = db.lists.find_one({'_id': list_id})
+    assert doc['reported_version'] == 2 and not doc['pending_changes']
@@ -0,0 +1,35 @@
+import os
+import sys
+import types
+import runpy
+
+import pytest
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+@pytest.mark.parametrize('profile, worker_class', [('gthread', 'gthread'), ('gevent', 'gevent'), ('sync', 'sync')])
+def test_profiles_pick_the_worker_model(monkeypatch, profile, worker_class):
+    monkeypatch.setenv('GUNICORN_PROFILE', profile)
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    monkeypatch.setitem(sys.modules, 'gevent', types.ModuleType('gevent'))
+    settings = runpy.run_path(CONFIG)
+    assert settings['worker_class'] == worker_class
+    assert settings['workers'] == 3
+    assert settings['preload_app'] is True
+    assert settings['max_requests_jitter'] == settings['max_requests'] // 10
+
+
+def test_gevent_profile_refused_without_gevent(monkeypatch):
+    monkeypatch.setenv('GUNICORN_PROFILE', 'gevent')
+    monkeypatch.setitem(sys.modules, 'gevent', None)
+    with pytest.raises(RuntimeError, match='requirements-gevent.txt'):
+        runpy.run_path(CONFIG)
+
+
+def test_reinit_after_fork_gives_the_worker_fresh_clients(app_module, client):
+    old_store, old_limiter = app_module.store, app_module.rate_limiter
+    app_module.reinit_after_fork()
+    assert app_module.store is not old_store and app_module.rate_limiter is not old_limiter
+    assert client.post('/api', json={'billNumber': 'FORK-1', 'items': []}).status_code == 201
+    assert app_module.store.list_by_bill('FORK-1')['billNumber'] == 'FORK-1'
@@ -0,0 +1,38 @@
+import json
+
+import analyser
+import shopping_item
+from shopping_item import ShoppingItem
+
+
+def test_dict_compatibility():
+    item = ShoppingItem(itemName='rice', quantity='2', unit='kg')
+    item['utterance'] = '2 kg rice and milk'
+    assert item['itemName'] == 'rice' and item.get('brand') == '' and item.get('missing', 'x') == 'x'
+    assert 'utterance' in item and 'missing' not in item
+    assert item.to_dict()['utterance'] == '2 kg rice and milk'
+    assert item == dict(item.items())
+    assert item.pop('utterance') == '2 kg rice and milk'
+    assert item.pop('quantity') == '2' and item.quantity == ''
+
+
+def test_from_dict_round_trip():
+    data = {'itemName': 'milk', 'quantity': '1', 'unit': 'l', 'priority': 'HIGH', 'source': 'llm'}
+    item = ShoppingItem.from_dict(data)
+    assert item.priority == 'HIGH' and item.extra == {'source': 'llm'}
+    assert ShoppingItem.from_dict(item.to_dict()) == item
+
+
+def test_dumps_and_loads():
+    payload = {'items': [ShoppingItem(itemName='tea'), ShoppingItem(itemName='sugar')]}
+    raw = shopping_item.dumps(payload)
+    assert json.loads(raw)['items'][1]['itemName'] == 'sugar'
+    decoded = shopping_item.loads(raw)
+    assert [item.itemName for item in decoded['items']] == ['tea', 'sugar']
+
+
+def test_parser_results_are_json_ready():
+    parser = analyser.ShoppingItemParser()
+    for result in (parser._fallback_parse('something'), parser._regex_fallback('2 kg rice')):
+        assert isinstance(result, ShoppingItem)
+        assert json.loads(json.dumps(result.to_dict()))['description']
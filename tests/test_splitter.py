@@ -0,0 +1,41 @@
+import pytest
+
+from engines import ParserAdapter
+from regex_parser import RegexItemParser
+from splitter import analyze_multi, split_utterance
+
+
+@pytest.mark.parametrize('text, clauses', [
+    ('2 kg rice and 1 litre milk', ['2 kg rice', '1 litre milk']),
+    ('tea, sugar and milk', ['tea', 'sugar', 'milk']),
+    ('bread and some eggs', ['bread', 'some eggs']),
+    ('sugar and head & shoulders', ['sugar', 'head & shoulders']),
+    ('two and a half kilo rice and 1 dozen eggs', ['two and a half kilo rice', '1 dozen eggs']),
+    ('1 kg rice and 3 eggs', ['1 kg rice', '3 eggs']),
+    ('bread and 2kg sugar', ['bread', '2kg sugar']),
+])
+def test_items_are_split_with_or_without_quantities(text, clauses):
+    assert split_utterance(text)[0] == clauses
+
+
+@pytest.mark.parametrize('text', [
+    'rice and a lot of love',
+    'pasta with high priority and make sure it is whole wheat',
+    '1 kg rice and one more thing',
+    '2 kg rice and 3 kids',
+])
+def test_separators_that_do_not_start_an_item_are_kept(text):
+    assert split_utterance(text) == ([text], {})
+
+
+def test_shared_context_applies_to_every_item():
+    clauses, context = split_utterance('2 kg rice, a dozen eggs and amul butter, all with high priority')
+    assert clauses == ['2 kg rice', '1 dozen eggs', 'amul butter']
+    assert context == {'priority': 'HIGH'}
+
+
+def test_analyze_multi_parses_each_clause():
+    items = analyze_multi(ParserAdapter('regex', RegexItemParser()), 'tea, sugar and milk with high priority')
+    assert [item['itemName'] for item in items] == ['tea', 'sugar', 'milk']
+    assert {item['priority'] for item in items} == {'HIGH'}
+    assert {item['utterance'] for item in items} == {'tea, sugar and milk with high priority'}
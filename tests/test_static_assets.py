@@ -0,0 +1,46 @@
+import gzip
+
+from flask import Flask
+
+from static_assets import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, StaticAssetServer, precompress
+
+
+def _build(tmp_path):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'index-BjqSSsyA.js').write_text('console.log("hi");\n' * 100)
+    (tmp_path / 'favicon.svg').write_text('<svg/>')
+    (tmp_path / 'index.html').write_text('<html></html>')
+    precompress(str(tmp_path))
+    return StaticAssetServer(str(tmp_path))
+
+
+def _get(server, path, **headers):
+    with Flask(__name__).test_request_context(headers=headers) as context:
+        return server.serve(path, context.request)
+
+
+def test_precompress_skips_small_files(tmp_path):
+    _build(tmp_path)
+    assert (tmp_path / 'assets' / 'index-BjqSSsyA.js.gz').exists()
+    assert not (tmp_path / 'favicon.svg.gz').exists()
+
+
+def test_hashed_assets_are_immutable_and_compressed(tmp_path):
+    server = _build(tmp_path)
+    response = _get(server, 'assets/index-BjqSSsyA.js', **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()).startswith(b'console.log')
+    assert response.headers['ETag'].endswith('-gzip"')
+
+    plain = _get(server, 'assets/index-BjqSSsyA.js')
+    assert 'Content-Encoding' not in plain.headers and plain.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_revalidation_and_missing_files(tmp_path):
+    server = _build(tmp_path)
+    first = _get(server, 'favicon.svg')
+    assert first.headers['Cache-Control'] == REVALIDATE_CACHE_CONTROL
+    assert first.headers['Content-Type'] == 'image/svg+xml; charset=utf-8'
+    assert _get(server, 'favicon.svg', **{'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert _get(server, '../secret') is None
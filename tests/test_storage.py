@@ -0,0 +1,93 @@
+import mongomock
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+import list_sync
+from list_updates import ListNotFound, VersionConflict, prepare_new_list
+from storage import MongoStore, SQLiteStore
+
+
+@pytest.fixture(params=['sqlite', 'mongo'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        store = SQLiteStore(str(tmp_path / 'grocery.db'))
+    else:
+        store = MongoStore(mongomock.MongoClient().db)
+    store.ensure_indexes()
+    return store
+
+
+def _list(bill, created_at='2026-09-01 10:00:00', **extra):
+    return prepare_new_list(dict({
+        'billNumber': bill,
+        'customerName': 'asha',
+        'favoriteShop': 'corner',
+        'created_at': created_at,
+        'items': [{'itemName': 'rice', 'quantity': '2', 'unit': 'kg', 'brand': 'India Gate'},
+                  {'itemName': 'milk', 'quantity': '1', 'unit': 'l', 'brand': 'Amul'}],
+    }, **extra))
+
+
+def test_insert_and_read_back(store):
+    list_id = store.insert_list(_list('BILL-1'))
+    doc = store.get_list(str(list_id))
+    assert doc['billNumber'] == 'BILL-1'
+    assert doc['version'] == 1
+    assert store.list_by_bill('BILL-1')['customerName'] == 'asha'
+    assert store.get_list('not-an-id') is None
+
+
+def test_duplicate_key_raises_the_same_error(store):
+    store.insert_list(_list('BILL-1', idempotencyKey='k1'))
+    with pytest.raises(DuplicateKeyError):
+        store.insert_list(_list('BILL-2', idempotencyKey='k1'))
+
+
+def test_patch_bumps_the_version_and_refuses_stale_edits(store):
+    list_id = str(store.insert_list(_list('BILL-1')))
+    result = store.patch_list(list_id, {'version': 1, 'update': [{'index': 0, 'fields': {'quantity': '5'}}]})
+    assert result['version'] == 2
+    assert store.get_list(list_id)['items'][0]['quantity'] == '5'
+    with pytest.raises(VersionConflict) as conflict:
+        store.patch_list(list_id, {'version': 1, 'set': {'favoriteShop': 'mall'}})
+    assert conflict.value.current == 2
+    with pytest.raises(ListNotFound):
+        store.patch_list('5f0000000000000000000000', {'version': 1, 'set': {'favoriteShop': 'mall'}})
+
+
+def test_sync_stores_each_key_once(store):
+    entries = [{'idempotencyKey': 'a', 'billNumber': 'BILL-A', 'items': []},
+               {'idempotencyKey': 'b', 'billNumber': 'BILL-B', 'items': []}]
+    first = list_sync.save_lists(store, entries, '2026-09-01 10:00:00')
+    again = list_sync.save_lists(store, [dict(entry) for entry in entries], '2026-09-01 10:05:00')
+    assert [s['status'] for s in first] == ['created', 'created']
+    assert [s['status'] for s in again] == ['duplicate', 'duplicate']
+    assert [s['id'] for s in again] == [s['id'] for s in first]
+
+
+def test_day_and_name_queries(store):
+    store.insert_list(_list('BILL-1', created_at='2026-09-01 10:00:00'))
+    store.insert_list(_list('BILL-2', created_at='2026-09-01 23:59:59'))
+    store.insert_list(_list('BILL-3', created_at='2026-09-02 00:00:00'))
+    assert sorted(doc['billNumber'] for doc in store.lists_for_day('2026-09-01')) == ['BILL-1', 'BILL-2']
+    assert dict(store.name_counts('itemName', 10)) == {'rice': 3, 'milk': 3}
+    assert dict(store.name_counts('brand', 1)) in ({'India Gate': 3}, {'Amul': 3})
+
+
+def test_parse_cache_and_corrections(store):
+    assert store.cached_parse('k') is None
+    store.cache_parse('k', {'itemName': 'rice'})
+    assert store.cached_parse('k') == {'itemName': 'rice'}
+    store.cache_parse('old', {'itemName': 'tea'}, ttl=-1)
+    assert store.cached_parse('old') is None
+
+    store.record_correction('chawal', 'rice')
+    store.record_correction('chawal', 'rice')
+    store.record_correction('cheeni', 'sugar')
+    corrections = store.corrections()
+    assert corrections[0] == {'original': 'chawal', 'corrected': 'rice', 'frequency': 2}
+    assert len(corrections) == 2
+
+
+def test_excel_export_needs_mongo(client):
+    assert client.get('/api/export/excel').status_code == 501
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from suggest import RadixTrie, Suggester
+
+
+def _brute_force(weights, prefix, limit):
+    prefix = prefix.lower()
+    # A term matches when the prefix starts at one of its words
+    hits = [(-weight, term) for term, weight in weights.items()
+            if any(' '.join(term.split()[i:]).startswith(prefix) for i in range(len(term.split())))]
+    return [(term, -weight) for weight, term in sorted(hits)[:limit]]
+
+
+def test_completions_rank_by_weight_and_match_later_words():
+    trie = RadixTrie.build([('Basmati Rice', 5), ('brown rice', 2), ('rice', 9), ('rusk', 1)])
+    assert trie.complete('ri') == [('rice', 9), ('Basmati Rice', 5), ('brown rice', 2)]
+    assert trie.complete('BASMATI r') == [('Basmati Rice', 5)]
+    assert trie.complete('x') == []
+
+
+def test_incremental_adds_match_a_bulk_build():
+    rng = random.Random(1)
+    words = ['rice', 'ric', 'rich', 'tea', 'team', 'green tea', 'tomato', 'tomatoes', 'toor dal', 'oil']
+    names = [(rng.choice(words), rng.randint(1, 5)) for _ in range(200)]
+    incremental = RadixTrie(top=3)
+    for name, weight in names:
+        incremental.add(name, weight)
+    bulk = RadixTrie.build(names, top=3)
+    for prefix in ['r', 'ri', 'ric', 'rich', 't', 'te', 'tom', 'to', 'd', 'o', 'g']:
+        expected = _brute_force(bulk.weights, prefix, 3)
+        assert incremental.complete(prefix) == expected
+        assert bulk.complete(prefix) == expected
+
+
+def test_edge_splits_publish_a_new_edge_instead_of_mutating_the_old_one():
+    trie = RadixTrie.build([('rice', 3)])
+    before = trie.root.edges['r']
+    trie.add('rye', 5)
+    # A reader holding the old edge still walks a consistent label and child
+    assert before[0] == 'rice' and before[1].top == [(-3, 'rice')]
+    label, middle = trie.root.edges['r']
+    assert label == 'r' and middle.edges['i'] == ('ice', before[1])
+    assert trie.complete('r') == [('rye', 5), ('rice', 3)]
+
+
+class FakeStore:
+    def name_counts(self, field, limit):
+        return [('Amul Gold', 4)] if field == 'brand' else [('rice', 3)]
+
+
+def test_suggester_merges_catalog_and_history_and_takes_new_saves():
+    suggester = Suggester(FakeStore(), catalog={'product': ['rice', 'rusk'], 'brand': ['Amul']})
+    assert suggester.suggest('item', 'r') == [{'text': 'rice', 'count': 4}, {'text': 'rusk', 'count': 1}]
+    assert suggester.suggest('brand', 'am')[0] == {'text': 'Amul Gold', 'count': 4}
+    suggester.add_list({'items': [{'itemName': 'rusk', 'brand': 'Britannia'}] * 4 + ['junk']})
+    assert suggester.suggest('item', 'r')[0] == {'text': 'rusk', 'count': 5}
+    with pytest.raises(ValueError):
+        suggester.suggest('shop', 'a')
+
+
+def test_saves_during_a_rebuild_reach_the_new_tries():
+    class SlowStore(FakeStore):
+        def name_counts(self, field, limit):
+            # A list is saved after the store was read but before the new tries are swapped in
+            if field == 'brand':
+                suggester.add_list({'items': [{'itemName': 'ragi'}]})
+            return super().name_counts(field, limit)
+
+    suggester = Suggester(SlowStore(), catalog={'product': ['rice'], 'brand': []})
+    suggester.build()
+    suggester.build()
+    assert {'text': 'ragi', 'count': 1} in suggester.suggest('item', 'r')
+
+
+def test_endpoint_caps_the_limit_at_what_the_tries_keep(app_module, client, monkeypatch):
+    seen = []
+    monkeypatch.setattr(app_module.suggestions, 'suggest', lambda field, prefix, limit: seen.append(limit) or [])
+    for limit in ('50', '3', '-2'):
+        assert client.get(f'/api/suggest?q=r&limit={limit}').status_code == 200
+    assert seen == [app_module.SUGGEST_TOP, 3, 1]
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from units import add_canonical, canonicalize_frame, parse_quantity, standardize_unit, to_canonical
+
+
+def test_scalar_conversion():
+    assert standardize_unit('Kilos') == 'kg'
+    assert parse_quantity('2 1/2') == 2.5
+    assert to_canonical('1.5', 'kg') == (1500.0, 'g')
+    assert to_canonical('1', 'dozen') == (12.0, 'pcs')
+    assert to_canonical('a few', 'packets') == (None, 'packet')
+
+
+def test_commas_as_thousands_separators_and_decimal_commas():
+    assert parse_quantity('1,000') == 1000.0
+    assert parse_quantity('12,500.5') == 12500.5
+    assert to_canonical('1,000', 'ml') == (1000.0, 'ml')
+    assert parse_quantity('1,5') == 1.5
+    assert parse_quantity('2,25') == 2.25
+    # Neither a thousands group nor a decimal comma
+    assert parse_quantity('1,0000') is None
+    assert parse_quantity('1,2,3') is None
+
+
+def test_add_canonical_keeps_the_parsed_unit():
+    item = add_canonical({'itemName': 'rice', 'quantity': '2', 'unit': 'Kilos'})
+    assert item['unit'] == 'Kilos'
+    assert (item['canonicalQuantity'], item['canonicalUnit']) == (2000.0, 'g')
+
+
+def test_canonicalize_frame_leaves_the_input_alone():
+    df = pd.DataFrame({'quantity': ['2', '1/2', '3'], 'unit': ['kgs', 'litre', 'boxes']})
+    out = canonicalize_frame(df)
+    assert list(df.columns) == ['quantity', 'unit']
+    assert out['canonicalQuantity'].tolist() == [2000.0, 500.0, 3.0]
+    assert out['canonicalUnit'].tolist() == ['g', 'ml', 'box']
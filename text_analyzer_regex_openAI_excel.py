@@ -9,6 +9,8 @@ import pandas as pd
 from datetime import datetime
 import httpx
 
+from units import standardize_unit
+
 # Load environment variables
 load_dotenv()
 
@@ -105,7 +107,7 @@ Return the information in this exact JSON format and similar english meaning wor
         for std_unit, variations in self.units.items():
             if unit in variations or unit.rstrip('s') in variations:
                 return std_unit
-        return unit
+        return standardize_unit(unit)
     
     def _fallback_parse(self, text):
         """Basic fallback parsing when OpenAI fails"""
@@ -0,0 +1,118 @@
+import re
+
+import pandas as pd
+
+# ----------------------------
+# 1. Unit table
+# ----------------------------
+# standard unit -> (canonical base unit, factor to the base unit, aliases)
+# Mass is summed in grams, volume in millilitres and counts in pieces. Packets
+# and boxes have no fixed size, so they stay in their own unit.
+UNIT_TABLE = {
+    'kg': ('g', 1000.0, ['kg', 'kgs', 'kilo', 'kilos', 'kilogram', 'kilograms', 'kilogramme']),
+    'g': ('g', 1.0, ['g', 'gm', 'gms', 'gr', 'gram', 'grams', 'gramme', 'grammes']),
+    'mg': ('g', 0.001, ['mg', 'milligram', 'milligrams']),
+    'quintal': ('g', 100000.0, ['quintal', 'quintals']),
+    'l': ('ml', 1000.0, ['l', 'lt', 'ltr', 'ltrs', 'liter', 'liters', 'litre', 'litres']),
+    'ml': ('ml', 1.0, ['ml', 'mls', 'milliliter', 'milliliters', 'millilitre', 'millilitres']),
+    'pcs': ('pcs', 1.0, ['pcs', 'pc', 'piece', 'pieces', 'unit', 'units', 'nos', 'no', 'number', 'numbers']),
+    'dozen': ('pcs', 12.0, ['dozen', 'dozens', 'dz', 'doz']),
+    'packet': ('packet', 1.0, ['packet', 'packets', 'pack', 'packs', 'pkt', 'pkts', 'pouch', 'pouches']),
+    'box': ('box', 1.0, ['box', 'boxes', 'bx', 'carton', 'cartons']),
+    'bottle': ('bottle', 1.0, ['bottle', 'bottles', 'btl']),
+}
+
+# Flattened lookups built once at import
+UNIT_ALIASES = {alias: std for std, (_, _, aliases) in UNIT_TABLE.items() for alias in aliases}
+UNIT_FACTORS = {alias: UNIT_TABLE[std][1] for alias, std in UNIT_ALIASES.items()}
+UNIT_BASES = {alias: UNIT_TABLE[std][0] for alias, std in UNIT_ALIASES.items()}
+
+_FRACTION_PATTERN = re.compile(r'^\s*(?:(\d+)\s+)?(\d+)\s*/\s*(\d+)\s*$')
+# '1,000' and '12,500.5' group thousands; a single comma before 1-2 digits ('1,5') is a decimal comma
+_THOUSANDS_PATTERN = re.compile(r'^\d{1,3}(?:,\d{3})+(?:\.\d+)?$')
+_DECIMAL_COMMA_PATTERN = re.compile(r'^\d+,\d{1,2}$')
+
+
+# ----------------------------
+# 2. Scalar conversion
+# ----------------------------
+def standardize_unit(unit) -> str:
+    """Map a free-form unit to its standard short form ('Kilos' -> 'kg')"""
+    if not unit:
+        return ""
+    key = str(unit).strip().lower().rstrip('.')
+    if key in UNIT_ALIASES:
+        return UNIT_ALIASES[key]
+    if key.endswith('s') and key[:-1] in UNIT_ALIASES:
+        return UNIT_ALIASES[key[:-1]]
+    return key
+
+
+def parse_quantity(quantity):
+    """Parse '2', '1.5', '1,5', '1,000', '1/2' or '2 1/2' into a float, None if not numeric"""
+    if quantity is None or quantity == "":
+        return None
+    if isinstance(quantity, (int, float)):
+        return float(quantity)
+    text = str(quantity).strip()
+    if _THOUSANDS_PATTERN.match(text):
+        text = text.replace(',', '')
+    elif _DECIMAL_COMMA_PATTERN.match(text):
+        text = text.replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    match = _FRACTION_PATTERN.match(text)
+    if match and int(match.group(3)):
+        whole = int(match.group(1) or 0)
+        return whole + int(match.group(2)) / int(match.group(3))
+    return None
+
+
+def to_canonical(quantity, unit):
+    """Return (canonical quantity, canonical unit); quantity is None if not numeric"""
+    std_unit = standardize_unit(unit)
+    value = parse_quantity(quantity)
+    if std_unit in UNIT_TABLE:
+        base, factor, _ = UNIT_TABLE[std_unit]
+    else:
+        # Unknown units are kept as-is so they still group with themselves
+        base, factor = std_unit, 1.0
+    if value is None:
+        return None, base
+    return value * factor, base
+
+
+def add_canonical(item: dict) -> dict:
+    """Attach canonicalQuantity/canonicalUnit to a parser result; quantity and unit are left as parsed"""
+    canonical_quantity, canonical_unit = to_canonical(item.get("quantity"), item.get("unit", ""))
+    item["canonicalQuantity"] = canonical_quantity
+    item["canonicalUnit"] = canonical_unit
+    return item
+
+
+# ----------------------------
+# 3. Vectorized conversion
+# ----------------------------
+def canonicalize_frame(df: pd.DataFrame, quantity_col: str = "quantity", unit_col: str = "unit") -> pd.DataFrame:
+    """Copy of df with canonicalQuantity/canonicalUnit columns added in one pass"""
+    df = df.copy()
+    units = df[unit_col].fillna("").astype(str).str.strip().str.lower().str.rstrip('.')
+    # Plural forms that are not listed fall back to the singular alias
+    known = units.isin(UNIT_ALIASES.keys())
+    singular = units.str[:-1]
+    units = units.where(known | ~singular.isin(UNIT_ALIASES.keys()), singular)
+
+    factors = units.map(UNIT_FACTORS).fillna(1.0)
+    bases = units.map(UNIT_BASES).fillna(units)
+
+    quantities = pd.to_numeric(df[quantity_col], errors="coerce")
+    # Rare fraction strings ('1/2') go through the scalar parser
+    needs_parse = quantities.isna() & df[quantity_col].notna() & (df[quantity_col].astype(str).str.strip() != "")
+    if needs_parse.any():
+        quantities.loc[needs_parse] = df.loc[needs_parse, quantity_col].map(parse_quantity).astype(float)
+
+    df["canonicalQuantity"] = quantities * factors
+    df["canonicalUnit"] = bases
+    return df